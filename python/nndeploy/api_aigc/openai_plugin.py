@@ -1,7 +1,6 @@
 import json
 import logging
 import base64
-import requests
 import numpy as np
 from io import BytesIO
 from PIL import Image
@@ -9,6 +8,7 @@ import os
 
 import nndeploy.dag
 import nndeploy.base
+from nndeploy.base.http_pool import get_http_session, run_concurrently
 
 
 class OpenAIImageNode(nndeploy.dag.Node):
@@ -31,6 +31,78 @@ class OpenAIImageNode(nndeploy.dag.Node):
         self.size = "1024x1024"  # 图像尺寸
         self.quality = "standard"  # 图像质量
         self.style = "vivid"  # 图像风格
+        self.max_concurrency = 4  # 输入为提示词列表时同时进行的请求数
+
+    def _generate(self, prompt: str) -> np.ndarray:
+        """生成一张图像，失败时抛出 RuntimeError"""
+        # 构建请求
+        self._logger.debug("[OpenAIImageNode] Building request | base_url=%s model=%s size=%s quality=%s style=%s",
+                           self.base_url, self.model, self.size, self.quality, self.style)
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+
+        data = {
+            "model": self.model,
+            "prompt": prompt,
+            "size": self.size,
+            "quality": self.quality,
+            "style": self.style,
+            "n": 1
+        }
+
+        # 发送请求（使用可配置base_url），共享连接池中的 keep-alive 连接
+        url = f"{self.base_url.rstrip('/')}/images/generations"
+        self._logger.info("[OpenAIImageNode] POST %s", url)
+        response = get_http_session(url).post(
+            url,
+            headers=headers,
+            json=data,
+            timeout=60
+        )
+        self._logger.info("[OpenAIImageNode] Response status: %s", response.status_code)
+
+        if response.status_code != 200:
+            raise RuntimeError(f"图像生成API请求失败: {response.status_code} - {response.text}")
+
+        result = response.json()
+        self._logger.debug("[OpenAIImageNode] Response JSON keys: %s", list(result.keys()))
+        # 优先读取b64_json，其次读取url（兼容不同服务实现）
+        image_b64 = None
+        image_url = None
+        if isinstance(result.get("data"), list) and result["data"]:
+            item = result["data"][0]
+            image_b64 = item.get("b64_json")
+            image_url = item.get("url")
+        self._logger.debug("[OpenAIImageNode] Have b64:%s url:%s", bool(image_b64), bool(image_url))
+
+        if image_b64:
+            img = Image.open(BytesIO(base64.b64decode(image_b64)))
+            return np.array(img)
+        if image_url:
+            self._logger.info("[OpenAIImageNode] Downloading image: %s", image_url)
+            img_response = get_http_session(image_url).get(image_url, timeout=30)
+            if img_response.status_code != 200:
+                raise RuntimeError(f"图像下载失败: {img_response.status_code}")
+            img = Image.open(BytesIO(img_response.content))
+            return np.array(img)
+        raise RuntimeError("返回结果中未包含图像数据")
+
+    def _save(self, img_array: np.ndarray, index: int = None):
+        # 保存到文件，批量输入时按序号区分
+        try:
+            save_dir = os.path.join("resources", "images")
+            os.makedirs(save_dir, exist_ok=True)
+            name = "result.openai.jpg" if index is None else f"result.openai.{index}.jpg"
+            save_path = os.path.join(save_dir, name)
+            pil_to_save = Image.fromarray(img_array)
+            if pil_to_save.mode in ("RGBA", "P"):
+                pil_to_save = pil_to_save.convert("RGB")
+            pil_to_save.save(save_path, format="JPEG")
+            self._logger.info("[OpenAIImageNode] Image saved to %s", save_path)
+        except Exception:
+            self._logger.exception("[OpenAIImageNode] Failed to save image to file")
 
     def run(self):
         try:
@@ -44,84 +116,26 @@ class OpenAIImageNode(nndeploy.dag.Node):
                 self._logger.error("[OpenAIImageNode] API key not set")
                 return nndeploy.base.Status.error("OpenAI API密钥未设置")
 
-            # 构建请求
-            self._logger.debug("[OpenAIImageNode] Building request | base_url=%s model=%s size=%s quality=%s style=%s",
-                               self.base_url, self.model, self.size, self.quality, self.style)
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-
-            data = {
-                "model": self.model,
-                "prompt": prompt,
-                "size": self.size,
-                "quality": self.quality,
-                "style": self.style,
-                "n": 1
-            }
-
-            # 发送请求（使用可配置base_url）
-            url = f"{self.base_url.rstrip('/')}/images/generations"
-            self._logger.info("[OpenAIImageNode] POST %s", url)
-            response = requests.post(
-                url,
-                headers=headers,
-                json=data,
-                timeout=60
-            )
-            self._logger.info("[OpenAIImageNode] Response status: %s", response.status_code)
-
-            if response.status_code == 200:
-                result = response.json()
-                self._logger.debug("[OpenAIImageNode] Response JSON keys: %s", list(result.keys()))
-                # 优先读取b64_json，其次读取url（兼容不同服务实现）
-                image_b64 = None
-                image_url = None
-                if isinstance(result.get("data"), list) and result["data"]:
-                    item = result["data"][0]
-                    image_b64 = item.get("b64_json")
-                    image_url = item.get("url")
-                self._logger.debug("[OpenAIImageNode] Have b64:%s url:%s", bool(image_b64), bool(image_url))
-
-                if image_b64:
-                    img = Image.open(BytesIO(base64.b64decode(image_b64)))
-                    img_array = np.array(img)
-                elif image_url:
-                    self._logger.info("[OpenAIImageNode] Downloading image: %s", image_url)
-                    img_response = requests.get(image_url, timeout=30)
-                    if img_response.status_code != 200:
-                        self._logger.error("[OpenAIImageNode] Image download failed: %s", img_response.status_code)
-                        return nndeploy.base.Status.error("图像下载失败")
-                    img = Image.open(BytesIO(img_response.content))
-                    img_array = np.array(img)
-                else:
-                    self._logger.error("[OpenAIImageNode] No image data in response")
-                    return nndeploy.base.Status.error("返回结果中未包含图像数据")
-
-                # 保存到文件
-                try:
-                    save_dir = os.path.join("resources", "images")
-                    os.makedirs(save_dir, exist_ok=True)
-                    save_path = os.path.join(save_dir, "result.openai.jpg")
-                    pil_to_save = Image.fromarray(img_array)
-                    if pil_to_save.mode in ("RGBA", "P"):
-                        pil_to_save = pil_to_save.convert("RGB")
-                    pil_to_save.save(save_path, format="JPEG")
-                    self._logger.info("[OpenAIImageNode] Image saved to %s", save_path)
-                except Exception:
-                    self._logger.exception("[OpenAIImageNode] Failed to save image to file")
-
-                # 设置输出
-                output_edge = self.get_output(0)
-                output_edge.set(img_array)
-                self._logger.info("[OpenAIImageNode] Output image set: shape=%s dtype=%s",
-                                  getattr(img_array, 'shape', None), getattr(img_array, 'dtype', None))
-                return nndeploy.base.Status.ok()
+            if isinstance(prompt, (list, tuple)):
+                # 多个提示词并发请求，最多 max_concurrency 个同时进行，输出按输入顺序的图像列表
+                results = run_concurrently(self._generate, list(prompt), self.max_concurrency)
+                for result in results:
+                    if isinstance(result, Exception):
+                        self._logger.error("[OpenAIImageNode] %s", result)
+                        return nndeploy.base.Status.error(f"图像生成错误: {str(result)}")
+                for i, img_array in enumerate(results):
+                    self._save(img_array, i)
+                output = results
             else:
-                error_msg = f"图像生成API请求失败: {response.status_code} - {response.text}"
-                self._logger.error("[OpenAIImageNode] %s", error_msg)
-                return nndeploy.base.Status.error(error_msg)
+                output = self._generate(prompt)
+                self._save(output)
+
+            # 设置输出
+            output_edge = self.get_output(0)
+            output_edge.set(output)
+            self._logger.info("[OpenAIImageNode] Output image set: shape=%s dtype=%s",
+                              getattr(output, 'shape', None), getattr(output, 'dtype', None))
+            return nndeploy.base.Status.ok()
 
         except Exception as e:
             self._logger.exception("[OpenAIImageNode] Exception during run")
@@ -136,7 +150,8 @@ class OpenAIImageNode(nndeploy.dag.Node):
             "model": self.model,
             "size": self.size,
             "quality": self.quality,
-            "style": self.style
+            "style": self.style,
+            "max_concurrency": self.max_concurrency
         })
         return json.dumps(json_obj)
 
@@ -148,6 +163,7 @@ class OpenAIImageNode(nndeploy.dag.Node):
         self.size = json_obj.get("size", "1024x1024")
         self.quality = json_obj.get("quality", "standard")
         self.style = json_obj.get("style", "vivid")
+        self.max_concurrency = json_obj.get("max_concurrency", 4)
         return super().deserialize(target)
 
 
@@ -0,0 +1,129 @@
+# LLM 响应的持久化缓存: 规范化请求 (模型、消息、采样参数、响应格式) 的内容哈希 -> 响应文本与 token 用量
+# 反复调试下游节点时，相同的请求不再重复调用接口，节省延迟与费用
+
+import os
+import json
+import time
+import hashlib
+import threading
+import collections
+
+
+def make_cache_key(api_base: str, payload: dict) -> str:
+    """
+    payload 为 call_llm 构造的请求体 (消息已经过 _normalize_messages)，stream 不参与哈希:
+    流式与非流式请求得到同样的文本
+    """
+    normalized = {
+        "api_base": api_base.rstrip("/"),
+        "model": payload.get("model"),
+        "messages": payload.get("messages"),
+        "temperature": payload.get("temperature"),
+        "max_tokens": payload.get("max_tokens"),
+        "response_format": payload.get("response_format"),
+    }
+    data = json.dumps(normalized, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    每个条目是目录下的一个 .json 文件。条目写入超过 ttl_s 秒后失效 (ttl_s <= 0 表示不过期)，
+    文件总大小超过 max_bytes 时按最近访问时间淘汰，访问时间记录在文件 mtime 上，进程重启后依然有效。
+    """
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024, ttl_s: float = 7 * 24 * 3600.0):
+        self.directory = directory
+        self.max_bytes = max(1, max_bytes)
+        self.ttl_s = ttl_s
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+        # 磁盘条目按访问时间排序的索引: key -> 文件大小
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                path = os.path.join(self.directory, name)
+                entries.append((os.path.getmtime(path), name[:-5], os.path.getsize(path)))
+        self.index = collections.OrderedDict((key, size) for _, key, size in sorted(entries))
+        self.total_bytes = sum(self.index.values())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".json")
+
+    def _remove(self, key: str):
+        self.total_bytes -= self.index.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def get(self, key: str):
+        """返回 (text, usage)，未命中或已过期时返回 None"""
+        with self.lock:
+            if key not in self.index:
+                self.misses += 1
+                return None
+            path = self._path(key)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                self.total_bytes -= self.index.pop(key, 0)
+                self.misses += 1
+                return None
+            if self.ttl_s > 0 and time.time() - entry.get("created", 0.0) > self.ttl_s:
+                self._remove(key)
+                self.misses += 1
+                return None
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            self.index.move_to_end(key)
+            self.hits += 1
+            return entry.get("text", ""), entry.get("usage", {})
+
+    def put(self, key: str, text: str, usage: dict = None):
+        data = json.dumps({"created": time.time(), "text": text, "usage": usage or {}}, ensure_ascii=False)
+        data = data.encode("utf-8")
+        # 先写临时文件再改名，多进程共享目录时不会读到写了一半的条目
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self.lock:
+            self.total_bytes -= self.index.pop(key, 0)
+            self.index[key] = len(data)
+            self.total_bytes += len(data)
+            while self.total_bytes > self.max_bytes and len(self.index) > 1:
+                old_key = next(iter(self.index))
+                self._remove(old_key)
+
+    def clear(self):
+        with self.lock:
+            for key in list(self.index.keys()):
+                self._remove(key)
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {"entries": len(self.index), "bytes": self.total_bytes, "hits": self.hits, "misses": self.misses}
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_llm_response_cache(directory: str, max_bytes: int = 256 * 1024 * 1024,
+                           ttl_s: float = 7 * 24 * 3600.0) -> LLMResponseCache:
+    """同一进程内按目录共享缓存对象，服务端每个任务重建图时不会重复扫描目录"""
+    key = os.path.abspath(directory)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = LLMResponseCache(directory, max_bytes, ttl_s)
+            _caches[key] = cache
+        cache.max_bytes = max(1, max_bytes)
+        cache.ttl_s = ttl_s
+        return cache
@@ -137,4 +137,9 @@ try:
 except:
     pass
 
+try:
+    from .http_pool import HttpSessionPool, get_http_session, get_http_pool, run_concurrently
+except:
+    pass
+
 
@@ -0,0 +1,84 @@
+# 进程内共享的 HTTP 连接池: 每个服务地址 (scheme://host:port) 一个 requests.Session，
+# 连接保持 keep-alive 并在节点之间、多次调用之间复用，省去每次请求的 TCP + TLS 握手
+
+import threading
+import http.cookiejar
+import concurrent.futures
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class HttpSessionPool:
+    """
+    pool_maxsize 为每个服务地址保持的空闲连接上限，应不小于并发请求数，
+    超出的并发请求会临时建立连接，用完即关闭
+    """
+    def __init__(self, pool_maxsize: int = 32):
+        self.pool_maxsize = pool_maxsize
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def make_key(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}".lower()
+
+    def get_session(self, url: str) -> requests.Session:
+        key = self.make_key(url)
+        with self.lock:
+            session = self.sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                # Session 在不同节点、不同调用方之间共享，不保存服务端下发的 cookie，
+                # 避免一个调用方的会话状态被附加到其他调用方的请求上
+                session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self.sessions[key] = session
+            return session
+
+    def close(self):
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions.clear()
+
+
+_http_pool = HttpSessionPool()
+
+
+def get_http_session(url: str) -> requests.Session:
+    """url 所在服务的共享 Session (代理、证书校验等按请求传入)"""
+    return _http_pool.get_session(url)
+
+
+def get_http_pool() -> HttpSessionPool:
+    return _http_pool
+
+
+def run_concurrently(fn, items: list, max_concurrency: int) -> list:
+    """
+    对 items 逐个调用 fn，最多 max_concurrency 个同时进行，结果按输入顺序返回；
+    fn 抛出的异常作为对应位置的结果返回，由调用方决定如何处理
+    """
+    if max_concurrency <= 1 or len(items) <= 1:
+        results = []
+        for item in items:
+            try:
+                results.append(fn(item))
+            except Exception as e:
+                results.append(e)
+        return results
+    workers = min(max_concurrency, len(items))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(fn, item) for item in items]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
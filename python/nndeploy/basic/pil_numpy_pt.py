@@ -13,31 +13,136 @@ import numpy as np
 import torch
 
 
-class PILImage2Numpy(nndeploy.dag.Node):
+# PIL / numpy / torch 之间的转换函数，在内存布局允许时不拷贝数据:
+#   numpy <-> torch (cpu): torch.from_numpy / Tensor.numpy 共享内存
+#   PIL -> numpy: np.array 得到可写的数组 (np.asarray 省一次拷贝但结果只读，下游原地修改会出错)
+#   numpy -> PIL: Image.fromarray 对 L / RGBA 等模式直接引用数组内存，RGB 等模式由 PIL 拷贝
+def to_numpy(obj) -> np.ndarray:
+    if isinstance(obj, np.ndarray):
+        return obj
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().cpu().numpy()
+    return np.array(obj)
+
+
+def to_torch(obj) -> torch.Tensor:
+    if isinstance(obj, torch.Tensor):
+        return obj
+    array = to_numpy(obj)
+    if not array.flags.writeable:
+        # torch 不支持只读内存，只读的输入数组需要拷贝一次
+        array = array.copy()
+    return torch.from_numpy(array)
+
+
+def numpy_to_pil(numpy_array: np.ndarray) -> Image.Image:
+    # 确保数组格式正确
+    if numpy_array.dtype != np.uint8:
+        # 如果是浮点数，假设范围是[0,1]，转换为[0,255]
+        if numpy_array.dtype in [np.float32, np.float64]:
+            scaled = np.multiply(numpy_array, 255, dtype=numpy_array.dtype)
+            numpy_array = scaled.astype(np.uint8, copy=False)
+        else:
+            numpy_array = numpy_array.astype(np.uint8)
+    # 转换为PIL Image
+    return Image.fromarray(np.ascontiguousarray(numpy_array))
+
+
+def torch_to_pil(tensor: torch.Tensor) -> Image.Image:
+    # 确保tensor在cpu且为uint8或float
+    tensor = tensor.detach()
+    if tensor.is_cuda:
+        tensor = tensor.cpu()
+    if tensor.dtype == torch.float32 or tensor.dtype == torch.float64:
+        # 假设范围为[0,1]，乘法之后的 clamp / 类型转换不再产生新的浮点临时张量
+        tensor = tensor.mul(255).clamp_(0, 255).to(torch.uint8)
+    elif tensor.dtype != torch.uint8:
+        tensor = tensor.to(torch.uint8)
+    # 不做通道转换，直接转为numpy
+    return Image.fromarray(np.ascontiguousarray(tensor.numpy()))
+
+
+_to_kind = {"pil": lambda obj: obj, "numpy": to_numpy, "torch": to_torch}
+
+# 经 numpy 往返后模式与像素都不变的 PIL 模式 (P / 1 等模式会变成 L)
+_exact_modes = ("L", "RGB", "RGBA")
+
+
+def run_conversion(node_type, obj, forward_only: bool = False):
+    """node_type 为 ConversionNode 子类，forward_only 表示该节点已被下游转换节点融合"""
+    if forward_only:
+        # 被下游转换节点融合，原样传递
+        return obj
+    if node_type.lossless:
+        # 上游可能是被融合的节点，obj 可以是链条起点的任意类型，直接转换为目标类型
+        if isinstance(obj, torch.Tensor) and node_type.input_kind != "torch":
+            # 经过被融合的 Pt2Numpy，与逐个执行一样落到 cpu 上
+            obj = obj.detach().cpu()
+        return _to_kind[node_type.output_kind](obj)
+    if isinstance(obj, Image.Image) and obj.mode in _exact_modes:
+        # 上游融合了 PIL -> numpy / torch，转回 PIL 得到的就是原图;
+        # 拷贝一份，输出边不与上游边共用同一个 PIL 对象
+        return obj.copy()
+    return node_type.convert(_to_kind[node_type.input_kind](obj))
+
+
+class ConversionNode(nndeploy.dag.Node):
+    """
+    转换节点的公共实现。init 时 (图已经建好) 检查输出边: 若唯一的消费者也是转换节点且不是图输出，
+    本节点只把输入原样传给下游，由链条末端的节点一次完成整条链的转换，
+    例如 PIL -> numpy -> torch -> numpy 只在末端把 PIL 转成 numpy 一次，numpy -> torch -> numpy 不拷贝。
+    只有无损转换 (不改变数值) 的节点会被融合，转成 PIL 的节点会量化为 uint8，始终按原语义执行。
+    """
+    input_kind = "numpy"
+    output_kind = "numpy"
+    lossless = True
+
     def __init__(self, name, inputs: [nndeploy.dag.Edge] = [], outputs: [nndeploy.dag.Edge] = []):
         super().__init__(name, inputs, outputs)
-        self.set_key("nndeploy.basic.PILImage2Numpy")
-        self.set_desc("PIL Image to Numpy")
-        self.set_input_type(Image)
-        self.set_output_type(np.ndarray)
-        
+        self.fuse = True
+        self.forward_only = False
+
+    def _feeds_conversion_only(self) -> bool:
+        outputs = self.get_all_output()
+        if len(outputs) != 1:
+            return False
+        # 图输出边的消费者中有 None
+        consumers = outputs[0].get_consumers()
+        return len(consumers) == 1 and isinstance(consumers[0], ConversionNode) and consumers[0].fuse
+
+    def init(self):
+        self.forward_only = self.fuse and self.lossless and self._feeds_conversion_only()
+        return nndeploy.base.Status.ok()
+
     def run(self) -> bool:
         input_edge = self.get_input(0) # 获取输入边
-        image = input_edge.get(self) # 获取输入的image
-        image_array = np.array(image)
-        cv_mat = image_array
+        result = run_conversion(type(self), input_edge.get(self), self.forward_only)
         output_edge = self.get_output(0) # 获取输出边
-        output_edge.set(cv_mat) # 将输出写入到输出边中
+        output_edge.set(result) # 将输出写入到输出边中
         return nndeploy.base.Status.ok()
-      
+
     def serialize(self):
         json_str = super().serialize()
         json_obj = json.loads(json_str)
+        json_obj["fuse"] = self.fuse
         return json.dumps(json_obj)
-        
+
     def deserialize(self, target: str):
         json_obj = json.loads(target)
+        self.fuse = json_obj.get("fuse", True)
         return super().deserialize(target)
+
+
+class PILImage2Numpy(ConversionNode):
+    input_kind = "pil"
+    output_kind = "numpy"
+
+    def __init__(self, name, inputs: [nndeploy.dag.Edge] = [], outputs: [nndeploy.dag.Edge] = []):
+        super().__init__(name, inputs, outputs)
+        self.set_key("nndeploy.basic.PILImage2Numpy")
+        self.set_desc("PIL Image to Numpy")
+        self.set_input_type(Image)
+        self.set_output_type(np.ndarray)
       
 class PILImage2NumpyCreator(nndeploy.dag.NodeCreator):
     def __init__(self):
@@ -51,41 +156,18 @@ pil_image2numpy_node_creator = PILImage2NumpyCreator()
 nndeploy.dag.register_node("nndeploy.basic.PILImage2Numpy", pil_image2numpy_node_creator)
 
 
-class Numpy2PILImage(nndeploy.dag.Node):
+class Numpy2PILImage(ConversionNode):
+    input_kind = "numpy"
+    output_kind = "pil"
+    lossless = False
+
     def __init__(self, name, inputs: [nndeploy.dag.Edge] = [], outputs: [nndeploy.dag.Edge] = []):
         super().__init__(name, inputs, outputs)
         self.set_key("nndeploy.basic.Numpy2PILImage")
         self.set_desc("Numpy to PIL Image")
         self.set_input_type(np.ndarray)
         self.set_output_type(Image)
-        
-    def run(self) -> bool:
-        input_edge = self.get_input(0) # 获取输入边
-        numpy_array = input_edge.get(self) # 获取输入的numpy数组
-        
-        # 确保数组格式正确
-        if numpy_array.dtype != np.uint8:
-            # 如果是浮点数，假设范围是[0,1]，转换为[0,255]
-            if numpy_array.dtype in [np.float32, np.float64]:
-                numpy_array = (numpy_array * 255).astype(np.uint8)
-            else:
-                numpy_array = numpy_array.astype(np.uint8)
-        
-        # 转换为PIL Image
-        pil_image = Image.fromarray(numpy_array)
-        
-        output_edge = self.get_output(0) # 获取输出边
-        output_edge.set(pil_image) # 将输出写入到输出边中
-        return nndeploy.base.Status.ok()
-      
-    def serialize(self):
-        json_str = super().serialize()
-        json_obj = json.loads(json_str)
-        return json.dumps(json_obj)
-        
-    def deserialize(self, target: str):
-        json_obj = json.loads(target)
-        return super().deserialize(target)
+    convert = staticmethod(numpy_to_pil)
       
 class Numpy2PILImageCreator(nndeploy.dag.NodeCreator):
     def __init__(self):
@@ -99,32 +181,16 @@ numpy2pil_image_node_creator = Numpy2PILImageCreator()
 nndeploy.dag.register_node("nndeploy.basic.Numpy2PILImage", numpy2pil_image_node_creator)
 
 # PILImage2Pt && Pt2PILImage
-class PILImage2Pt(nndeploy.dag.Node):
+class PILImage2Pt(ConversionNode):
+    input_kind = "pil"
+    output_kind = "torch"
+
     def __init__(self, name, inputs: [nndeploy.dag.Edge] = [], outputs: [nndeploy.dag.Edge] = []):
         super().__init__(name, inputs, outputs)
         self.set_key("nndeploy.basic.PILImage2Pt")
         self.set_desc("PIL Image to PyTorch Tensor")
         self.set_input_type(Image)
         self.set_output_type(torch.Tensor)
-    
-    def run(self) -> bool:
-        input_edge = self.get_input(0)  # 获取输入边
-        image = input_edge.get(self)    # 获取输入的PIL Image
-        image_array = np.array(image)
-        # 不做通道转换，直接转为torch tensor
-        tensor = torch.from_numpy(image_array)
-        output_edge = self.get_output(0)
-        output_edge.set(tensor)
-        return nndeploy.base.Status.ok()
-    
-    def serialize(self):
-        json_str = super().serialize()
-        json_obj = json.loads(json_str)
-        return json.dumps(json_obj)
-    
-    def deserialize(self, target: str):
-        json_obj = json.loads(target)
-        return super().deserialize(target)
 
 class PILImage2PtCreator(nndeploy.dag.NodeCreator):
     def __init__(self):
@@ -138,40 +204,18 @@ pil_image2pt_node_creator = PILImage2PtCreator()
 nndeploy.dag.register_node("nndeploy.basic.PILImage2Pt", pil_image2pt_node_creator)
 
 
-class Pt2PILImage(nndeploy.dag.Node):
+class Pt2PILImage(ConversionNode):
+    input_kind = "torch"
+    output_kind = "pil"
+    lossless = False
+
     def __init__(self, name, inputs: [nndeploy.dag.Edge] = [], outputs: [nndeploy.dag.Edge] = []):
         super().__init__(name, inputs, outputs)
         self.set_key("nndeploy.basic.Pt2PILImage")
         self.set_desc("PyTorch Tensor to PIL Image")
         self.set_input_type(torch.Tensor)
         self.set_output_type(Image)
-    
-    def run(self) -> bool:
-        input_edge = self.get_input(0)
-        tensor = input_edge.get(self)
-        # 确保tensor在cpu且为uint8或float
-        if tensor.is_cuda:
-            tensor = tensor.cpu()
-        if tensor.dtype == torch.float32 or tensor.dtype == torch.float64:
-            # 假设范围为[0,1]
-            tensor = (tensor * 255).clamp(0, 255).to(torch.uint8)
-        elif tensor.dtype != torch.uint8:
-            tensor = tensor.to(torch.uint8)
-        # 不做通道转换，直接转为numpy
-        array = tensor.numpy()
-        pil_image = Image.fromarray(array)
-        output_edge = self.get_output(0)
-        output_edge.set(pil_image)
-        return nndeploy.base.Status.ok()
-    
-    def serialize(self):
-        json_str = super().serialize()
-        json_obj = json.loads(json_str)
-        return json.dumps(json_obj)
-    
-    def deserialize(self, target: str):
-        json_obj = json.loads(target)
-        return super().deserialize(target)
+    convert = staticmethod(torch_to_pil)
 
 class Pt2PILImageCreator(nndeploy.dag.NodeCreator):
     def __init__(self):
@@ -186,31 +230,17 @@ nndeploy.dag.register_node("nndeploy.basic.Pt2PILImage", pt2pil_image_node_creat
 
 
 # Numpy2Pt
-class Numpy2Pt(nndeploy.dag.Node):
+class Numpy2Pt(ConversionNode):
+    input_kind = "numpy"
+    output_kind = "torch"
+
     def __init__(self, name, inputs: [nndeploy.dag.Edge] = [], outputs: [nndeploy.dag.Edge] = []):
         super().__init__(name, inputs, outputs)
         self.set_key("nndeploy.basic.Numpy2Pt")
-        self.set_desc("Numpy ndarray to PyTorch Tensor")
+        self.set_desc("Numpy ndarray to PyTorch Tensor (shares memory)")
         self.set_input_type(np.ndarray)
         self.set_output_type(torch.Tensor)
 
-    def run(self) -> bool:
-        input_edge = self.get_input(0)
-        array = input_edge.get(self)
-        tensor = torch.from_numpy(array)
-        output_edge = self.get_output(0)
-        output_edge.set(tensor)
-        return nndeploy.base.Status.ok()
-
-    def serialize(self):
-        json_str = super().serialize()
-        json_obj = json.loads(json_str)
-        return json.dumps(json_obj)
-
-    def deserialize(self, target: str):
-        json_obj = json.loads(target)
-        return super().deserialize(target)
-
 class Numpy2PtCreator(nndeploy.dag.NodeCreator):
     def __init__(self):
         super().__init__()
@@ -223,33 +253,17 @@ numpy2pt_node_creator = Numpy2PtCreator()
 nndeploy.dag.register_node("nndeploy.basic.Numpy2Pt", numpy2pt_node_creator)
 
 # Pt2Numpy
-class Pt2Numpy(nndeploy.dag.Node):
+class Pt2Numpy(ConversionNode):
+    input_kind = "torch"
+    output_kind = "numpy"
+
     def __init__(self, name, inputs: [nndeploy.dag.Edge] = [], outputs: [nndeploy.dag.Edge] = []):
         super().__init__(name, inputs, outputs)
         self.set_key("nndeploy.basic.Pt2Numpy")
-        self.set_desc("PyTorch Tensor to Numpy ndarray")
+        self.set_desc("PyTorch Tensor to Numpy ndarray (shares memory on cpu)")
         self.set_input_type(torch.Tensor)
         self.set_output_type(np.ndarray)
 
-    def run(self) -> bool:
-        input_edge = self.get_input(0)
-        tensor = input_edge.get(self)
-        if tensor.is_cuda:
-            tensor = tensor.cpu()
-        array = tensor.numpy()
-        output_edge = self.get_output(0)
-        output_edge.set(array)
-        return nndeploy.base.Status.ok()
-
-    def serialize(self):
-        json_str = super().serialize()
-        json_obj = json.loads(json_str)
-        return json.dumps(json_obj)
-
-    def deserialize(self, target: str):
-        json_obj = json.loads(target)
-        return super().deserialize(target)
-
 class Pt2NumpyCreator(nndeploy.dag.NodeCreator):
     def __init__(self):
         super().__init__()
@@ -260,4 +274,3 @@ class Pt2NumpyCreator(nndeploy.dag.NodeCreator):
 
 pt2numpy_node_creator = Pt2NumpyCreator()
 nndeploy.dag.register_node("nndeploy.basic.Pt2Numpy", pt2numpy_node_creator)
-
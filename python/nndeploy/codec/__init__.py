@@ -43,3 +43,13 @@ try:
     from nndeploy.codec.detail_zoom_compare import DetailZoomCompare
 except ImportError:
     pass
+
+try:
+    from nndeploy.codec.prefetch import FrameRing, PrefetchVideoDecode
+except ImportError:
+    pass
+
+try:
+    from nndeploy.codec.video_segment import ParallelVideoRunner, split_video, concat_videos
+except ImportError:
+    pass
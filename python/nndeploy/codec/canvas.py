@@ -0,0 +1,132 @@
+import numpy as np
+import cv2
+
+
+def resize_into(src: np.ndarray, dst: np.ndarray, interpolation=cv2.INTER_LINEAR) -> np.ndarray:
+    """
+    将 src 缩放写入预分配的 dst (可以是画布的子视图)，不产生新的整帧分配
+
+    OpenCV 对非连续视图无法原地写入时会返回新数组，此时回写到 dst
+    """
+    h, w = dst.shape[:2]
+    if src.shape[:2] == (h, w):
+        np.copyto(dst, src)
+        return dst
+    out = cv2.resize(src, (w, h), dst=dst, interpolation=interpolation)
+    if out is not dst:
+        np.copyto(dst, out)
+    return dst
+
+
+class TextStamp:
+    """
+    预渲染的文字叠加层
+
+    文字只光栅化一次得到 mask，每帧只在文字包围框内按 mask 写入颜色，
+    适合叠加在每帧都会被覆盖的图像区域上
+    """
+    def __init__(self, text: str, org, color, font_scale=0.7, thickness=2,
+                 font=cv2.FONT_HERSHEY_SIMPLEX):
+        (tw, th), baseline = cv2.getTextSize(text, font, font_scale, thickness)
+        x, y = org
+        self.x0 = max(0, x - thickness)
+        self.y0 = max(0, y - th - thickness)
+        self.x1 = x + tw + thickness
+        self.y1 = y + baseline + thickness
+        mask = np.zeros((self.y1 - self.y0, self.x1 - self.x0), dtype=np.uint8)
+        cv2.putText(mask, text, (x - self.x0, y - self.y0), font, font_scale, 255, thickness)
+        self.mask = mask.astype(bool)[..., None]
+        self.color = np.array(color, dtype=np.uint8)
+
+    def apply(self, canvas: np.ndarray):
+        region = canvas[self.y0:self.y1, self.x0:self.x1]
+        mask = self.mask[:region.shape[0], :region.shape[1]]
+        np.copyto(region, self.color, where=mask)
+
+
+class GridBuilder:
+    """
+    把多张同类图像拼成 rows x cols 网格
+
+    布局 (单元尺寸/通道/dtype) 只在输入形状变化时重新计算，每张图直接缩放进网格中对应单元的视图，
+    不再逐张 resize 后拼接。默认每次调用输出新的数组，下游可以任意持有；
+    reuse_output=True 时复用同一块输出内存，下一次调用会覆盖上一次的结果，
+    只适用于调用方在下一次调用前已经拷走结果的场景 (如 Image.fromarray 转成 RGB 图像)。
+    """
+    def __init__(self, rows: int, cols: int, resize_h: int = -1, resize_w: int = -1, reuse_output: bool = False):
+        self.rows = rows
+        self.cols = cols
+        self.resize_h = resize_h
+        self.resize_w = resize_w
+        self.reuse_output = reuse_output
+        self.layout_key = None
+        self.scratch = None
+
+    def _layout(self, shape, dtype):
+        h, w = shape[:2]
+        if self.resize_h != -1 and self.resize_w != -1:
+            h, w = self.resize_h, self.resize_w
+        c = shape[2] if len(shape) == 3 else 1
+        key = (c, np.dtype(dtype), h, w)
+        if key == self.layout_key:
+            return
+        self.layout_key = key
+        self.cell_h, self.cell_w, self.channels = h, w, c
+        self.dtype = np.dtype(dtype)
+        self.scratch = None
+
+    def _new_output(self) -> np.ndarray:
+        # 每个单元都会被完整写入，不需要清零
+        shape = (self.rows * self.cell_h, self.cols * self.cell_w, self.channels)
+        if not self.reuse_output:
+            return np.empty(shape, dtype=self.dtype)
+        if self.scratch is None:
+            self.scratch = np.empty(shape, dtype=self.dtype)
+        return self.scratch
+
+    def _cells(self, out):
+        h, w = self.cell_h, self.cell_w
+        return [out[(i // self.cols) * h:(i // self.cols + 1) * h, (i % self.cols) * w:(i % self.cols + 1) * w]
+                for i in range(self.rows * self.cols)]
+
+    def _output(self, out):
+        return out[..., 0] if self.channels == 1 else out
+
+    def build(self, arrays) -> np.ndarray:
+        """arrays: rows*cols 个 HxW 或 HxWxC 数组，尺寸不一致时需设置 resize_h/resize_w"""
+        if len(arrays) != self.rows * self.cols:
+            raise ValueError(f"输入图像数量({len(arrays)})与网格(rows*cols={self.rows * self.cols})不符")
+        self._layout(arrays[0].shape, arrays[0].dtype)
+        out = self._new_output()
+        h, w = self.cell_h, self.cell_w
+        for cell, a in zip(self._cells(out), arrays):
+            if a.ndim == 2:
+                a = a[..., None]
+            if a.shape[2] != self.channels:
+                raise ValueError(f"输入通道数不一致，得到 {a.shape}，期望 {self.channels} 通道")
+            if a.shape[:2] == (h, w):
+                np.copyto(cell, a)
+            else:
+                if self.resize_h == -1 or self.resize_w == -1:
+                    raise ValueError(f"输入尺寸不一致，得到 {a.shape}，期望 {(h, w, self.channels)}")
+                interp = cv2.INTER_AREA if (w < a.shape[1] or h < a.shape[0]) else cv2.INTER_LINEAR
+                resize_into(a if self.channels > 1 else a[..., 0],
+                            cell if self.channels > 1 else cell[..., 0], interp)
+        return self._output(out)
+
+    def build_from_batch(self, batch: np.ndarray) -> np.ndarray:
+        """batch: N x H x W (x C) 的批量图像，尺寸一致时一次向量化拷贝完成拼接"""
+        if batch.shape[0] != self.rows * self.cols:
+            raise ValueError(f"输入图像数量({batch.shape[0]})与网格(rows*cols={self.rows * self.cols})不符")
+        if batch.ndim == 3:
+            batch = batch[..., None]
+        needs_resize = self.resize_h != -1 and self.resize_w != -1 and \
+            batch.shape[1:3] != (self.resize_h, self.resize_w)
+        if needs_resize:
+            return self.build(list(batch))
+        self._layout(batch.shape[1:], batch.dtype)
+        out = self._new_output()
+        # 网格的单元视图: (rows, cols, h, w, c)
+        grid_view = out.reshape(self.rows, self.cell_h, self.cols, self.cell_w, self.channels).transpose(0, 2, 1, 3, 4)
+        np.copyto(grid_view, batch.reshape(self.rows, self.cols, *batch.shape[1:]))
+        return self._output(out)
@@ -5,6 +5,7 @@ import time
 
 import nndeploy.base
 import nndeploy.dag
+from nndeploy.codec.canvas import resize_into, TextStamp
 
 class DetailZoomCompare(nndeploy.dag.Node):
     """局部放大细节对比节点"""
@@ -31,6 +32,75 @@ class DetailZoomCompare(nndeploy.dag.Node):
         self.window_created = False
         self.fps_detected_ = False
         
+        # 持久画布与预渲染标签，输入尺寸/参数不变时复用
+        self.canvas = None
+        self.canvas_key = None
+        
+    def _build_canvas(self, h1, w1, h2, w2):
+        """计算 ROI 与布局，分配画布并预渲染标签"""
+        center_x = int(w1 * self.roi_x_)
+        center_y = int(h1 * self.roi_y_)
+        half_size = self.roi_size_ // 2
+        x1 = max(0, center_x - half_size)
+        y1 = max(0, center_y - half_size)
+        x2 = min(w1, center_x + half_size)
+        y2 = min(h1, center_y + half_size)
+        self.roi = (x1, y1, x2, y2)
+        
+        # 超分图对应区域（考虑scale）
+        self.scale = w2 / w1
+        self.roi_sr = (int(x1 * self.scale), int(y1 * self.scale),
+                       int(x2 * self.scale), int(y2 * self.scale))
+        
+        zoom_h = (y2 - y1) * self.zoom_factor_
+        zoom_w = (x2 - x1) * self.zoom_factor_
+        display_h = max(h1, h2, zoom_h)
+        
+        # 左侧原图 | 中间原图ROI放大 | 右侧超分ROI放大，留白区域只清零一次
+        self.canvas = np.zeros((display_h, w1 + 2 * zoom_w, 3), dtype=np.uint8)
+        self.left_view = self.canvas[:h1, :w1]
+        self.middle_view = self.canvas[:zoom_h, w1:w1 + zoom_w]
+        self.right_view = self.canvas[:zoom_h, w1 + zoom_w:]
+        
+        # 标签叠加在每帧刷新的图像上，预渲染后每帧只按 mask 写入
+        self.stamps = [
+            TextStamp("ROI", (x1, y1 - 10), (0, 255, 0)),
+            TextStamp(f"Original x{self.zoom_factor_}", (w1 + 10, 30), (255, 255, 255)),
+            TextStamp(f"Enhanced x{self.zoom_factor_}", (w1 + zoom_w + 10, 30), (0, 255, 0)),
+        ]
+        # 底部信息栏落在留白区域的部分不会被图像刷新，每帧需单独清零
+        self.info_y0 = display_h - 45
+        self.left_pad_y0 = max(self.info_y0, h1)
+        self.zoom_pad_y0 = max(self.info_y0, zoom_h)
+        self.canvas_key = (h1, w1, h2, w2, self.zoom_factor_, self.roi_x_, self.roi_y_, self.roi_size_)
+        
+    def compose(self, frame_original, frame_enhanced, fps=None):
+        """将两帧渲染进持久画布并返回画布（下一次调用会覆盖其内容）"""
+        h1, w1 = frame_original.shape[:2]
+        h2, w2 = frame_enhanced.shape[:2]
+        key = (h1, w1, h2, w2, self.zoom_factor_, self.roi_x_, self.roi_y_, self.roi_size_)
+        if self.canvas_key != key:
+            self._build_canvas(h1, w1, h2, w2)
+        
+        x1, y1, x2, y2 = self.roi
+        x1_sr, y1_sr, x2_sr, y2_sr = self.roi_sr
+        np.copyto(self.left_view, frame_original)
+        resize_into(frame_original[y1:y2, x1:x2], self.middle_view, cv2.INTER_NEAREST)
+        resize_into(frame_enhanced[y1_sr:y2_sr, x1_sr:x2_sr], self.right_view, cv2.INTER_NEAREST)
+        
+        cv2.rectangle(self.canvas, (x1, y1), (x2, y2), (0, 255, 0), 2)
+        for stamp in self.stamps:
+            stamp.apply(self.canvas)
+        
+        # 底部信息栏（FPS 每帧变化）
+        if fps is not None:
+            self.canvas[self.left_pad_y0:, :w1] = 0
+            self.canvas[self.zoom_pad_y0:, w1:] = 0
+            info_text = f"FPS: {fps:.1f} | Scale: {self.scale:.1f}x | Zoom: {self.zoom_factor_}x"
+            cv2.putText(self.canvas, info_text, (10, self.canvas.shape[0] - 20),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+        return self.canvas
+        
     def init(self):
         try:
             cv2.namedWindow(self.window_name_, cv2.WINDOW_NORMAL)
@@ -87,74 +157,7 @@ class DetailZoomCompare(nndeploy.dag.Node):
             else:
                 fps = self.frame_count / max(elapsed, 0.001)
             
-            h1, w1 = frame_original.shape[:2]
-            h2, w2 = frame_enhanced.shape[:2]
-            
-            # 计算ROI区域（原图）
-            center_x = int(w1 * self.roi_x_)
-            center_y = int(h1 * self.roi_y_)
-            half_size = self.roi_size_ // 2
-            
-            x1 = max(0, center_x - half_size)
-            y1 = max(0, center_y - half_size)
-            x2 = min(w1, center_x + half_size)
-            y2 = min(h1, center_y + half_size)
-            
-            # 提取原图ROI并放大
-            roi_original = frame_original[y1:y2, x1:x2]
-            roi_h, roi_w = roi_original.shape[:2]
-            zoomed_original = cv2.resize(roi_original, 
-                                        (roi_w * self.zoom_factor_, roi_h * self.zoom_factor_),
-                                        interpolation=cv2.INTER_NEAREST)
-            
-            # 计算超分图对应区域（考虑scale）
-            scale = w2 / w1
-            x1_sr = int(x1 * scale)
-            y1_sr = int(y1 * scale)
-            x2_sr = int(x2 * scale)
-            y2_sr = int(y2 * scale)
-            
-            # 提取超分图ROI并放大
-            roi_enhanced = frame_enhanced[y1_sr:y2_sr, x1_sr:x2_sr]
-            roi_sr_h, roi_sr_w = roi_enhanced.shape[:2]
-            zoomed_enhanced = cv2.resize(roi_enhanced,
-                                        (roi_w * self.zoom_factor_, roi_h * self.zoom_factor_),
-                                        interpolation=cv2.INTER_NEAREST)
-            
-            # 创建完整显示图
-            display_h = max(h1, h2, zoomed_original.shape[0])
-            
-            # 左侧：原图+ROI框
-            left_img = frame_original.copy()
-            cv2.rectangle(left_img, (x1, y1), (x2, y2), (0, 255, 0), 2)
-            cv2.putText(left_img, "ROI", (x1, y1-10), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            
-            # 中间：原图ROI放大
-            middle_canvas = np.zeros((display_h, zoomed_original.shape[1], 3), dtype=np.uint8)
-            middle_canvas[:zoomed_original.shape[0], :] = zoomed_original
-            cv2.putText(middle_canvas, f"Original x{self.zoom_factor_}", (10, 30),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-            
-            # 右侧：超分ROI放大
-            right_canvas = np.zeros((display_h, zoomed_enhanced.shape[1], 3), dtype=np.uint8)
-            right_canvas[:zoomed_enhanced.shape[0], :] = zoomed_enhanced
-            cv2.putText(right_canvas, f"Enhanced x{self.zoom_factor_}", (10, 30),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            
-            # 调整左图高度
-            if left_img.shape[0] != display_h:
-                left_canvas = np.zeros((display_h, left_img.shape[1], 3), dtype=np.uint8)
-                left_canvas[:left_img.shape[0], :] = left_img
-                left_img = left_canvas
-            
-            # 拼接三部分
-            combined = np.hstack([left_img, middle_canvas, right_canvas])
-            
-            # 添加FPS和信息
-            info_text = f"FPS: {fps:.1f} | Scale: {scale:.1f}x | Zoom: {self.zoom_factor_}x"
-            cv2.putText(combined, info_text, (10, combined.shape[0] - 20),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+            combined = self.compose(frame_original, frame_enhanced, fps)
             
             cv2.imshow(self.window_name_, combined)
             
@@ -14,6 +14,8 @@ from typing import List
 import numpy as np
 import cv2
 
+from nndeploy.codec.canvas import GridBuilder
+
 class MakeNumpyGrid(nndeploy.dag.Node):
     def __init__(self, name, inputs: [nndeploy.dag.Edge] = [], outputs: [nndeploy.dag.Edge] = []):
         super().__init__(name, inputs, outputs)
@@ -26,24 +28,8 @@ class MakeNumpyGrid(nndeploy.dag.Node):
         self.set_input_type(np.ndarray)    # 动态输入：numpy.ndarray
         self.set_output_type(np.ndarray)
         self.set_dynamic_input(True)
-
-    def _ensure_3d(self, arr: np.ndarray) -> np.ndarray:
-        """将 HxW 转为 HxWx1, 其他保持不变。"""
-        if arr.ndim == 2:
-            return arr[..., None]
-        if arr.ndim == 3:
-            return arr
-        raise ValueError(f"输入数组维度应为2或3,得到 {arr.ndim}")
-
-    def _resize_np(self, arr: np.ndarray, new_w: int, new_h: int) -> np.ndarray:
-        """使用 cv2.resize 统一尺寸。"""
-        arr3 = self._ensure_3d(arr)
-        h, w, _ = arr3.shape
-        interp = cv2.INTER_AREA if (new_w < w or new_h < h) else cv2.INTER_LINEAR
-        out = cv2.resize(arr3, dsize=(new_w, new_h), interpolation=interp)
-        if out.ndim == 2:  # 单通道情况下，cv2 可能返回 HxW
-            out = out[..., None]
-        return out
+        self.grid_builder = None
+        self.grid_builder_key = None
 
     def run(self) -> bool:
         try:
@@ -58,40 +44,16 @@ class MakeNumpyGrid(nndeploy.dag.Node):
                         return nndeploy.base.Status.error()
                     arrays.append(arr)
 
-            expected = self.rows * self.cols
-            if len(arrays) != expected:
-                print(f"MakeNumpyGrid: 输入图像数量({len(arrays)})与网格(rows*cols={expected})不符")
-                return nndeploy.base.Status.error()
-
-            # 可选 resize，否则确保尺寸/通道一致
-            if self.resize_h != -1 and self.resize_w != -1:
-                arrays = [self._resize_np(a, self.resize_w, self.resize_h) for a in arrays]
+            # 布局只在 rows/cols/resize/输入形状变化时重建，每帧输出新的网格数组，下游可以任意持有
+            key = (self.rows, self.cols, self.resize_h, self.resize_w)
+            if self.grid_builder is None or self.grid_builder_key != key:
+                self.grid_builder = GridBuilder(self.rows, self.cols, self.resize_h, self.resize_w)
+                self.grid_builder_key = key
+            if len(arrays) == 1 and arrays[0].ndim == 4:
+                # 单个 NxHxWxC 批量输入 (如扩散模型的批量输出)，一次拷贝完成拼接
+                out = self.grid_builder.build_from_batch(arrays[0])
             else:
-                arrays = [self._ensure_3d(a) for a in arrays]
-
-            # 校验尺寸一致
-            h0, w0, c0 = arrays[0].shape
-            for idx, a in enumerate(arrays):
-                if a.shape != (h0, w0, c0):
-                    print(f"MakeNumpyGrid: 第 {idx} 个输入尺寸不一致，得到 {a.shape}，期望 {(h0, w0, c0)}")
-                    return nndeploy.base.Status.error()
-
-            # 预分配输出 (rows*h, cols*w, C)
-            grid_h = self.rows * h0
-            grid_w = self.cols * w0
-            out = np.zeros((grid_h, grid_w, c0), dtype=arrays[0].dtype)
-
-            # 逐格拷贝
-            for i, a in enumerate(arrays):
-                r = i // self.cols
-                c = i % self.cols
-                y0, y1 = r * h0, (r + 1) * h0
-                x0, x1 = c * w0, (c + 1) * w0
-                out[y0:y1, x0:x1, :] = a
-
-            # 若是单通道，输出为 HxW
-            if c0 == 1:
-                out = out[..., 0]
+                out = self.grid_builder.build(arrays)
 
             # 输出到输出边
             output_edge = self.get_output(0)
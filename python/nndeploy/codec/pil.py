@@ -11,6 +11,8 @@ from PIL import Image
 import numpy as np
 from typing import List
 
+from nndeploy.codec.canvas import GridBuilder
+
 class PILImageEncodec(nndeploy.dag.Node):
     def __init__(self, name, inputs: [nndeploy.dag.Edge] = [], outputs: [nndeploy.dag.Edge] = []):
         super().__init__(name, inputs, outputs)
@@ -145,6 +147,8 @@ class MakeImageGrid(nndeploy.dag.Node):
         self.set_input_type(Image)  # 动态输入，类型为PIL.Image
         self.set_output_type(Image)
         self.set_dynamic_input(True)
+        self.grid_builder = None
+        self.grid_builder_key = None
 
     def run(self) -> bool:
         try:
@@ -158,13 +162,15 @@ class MakeImageGrid(nndeploy.dag.Node):
             if len(images) != self.rows * self.cols:
                 print(f"MakeImageGrid: 输入图像数量({len(images)})与网格(rows*cols={self.rows*self.cols})不符")
                 return nndeploy.base.Status.error()
-            # 可选resize
-            if self.resize_h != -1 and self.resize_w != -1:
-                images = [img.resize((self.resize_w, self.resize_h)) for img in images]
-            w, h = images[0].size
-            grid = Image.new("RGB", size=(self.cols * w, self.rows * h))
-            for i, img in enumerate(images):
-                grid.paste(img, box=(i % self.cols * w, i // self.cols * h))
+            # PIL -> ndarray 视图，缩放直接写入预分配网格的单元，避免逐张 resize + paste
+            arrays = [np.asarray(img if img.mode == "RGB" else img.convert("RGB")) for img in images]
+            key = (self.rows, self.cols, self.resize_h, self.resize_w)
+            if self.grid_builder is None or self.grid_builder_key != key:
+                # Image.fromarray 转 RGB 时会拷贝像素，网格缓冲可以每帧复用
+                self.grid_builder = GridBuilder(self.rows, self.cols, self.resize_h, self.resize_w,
+                                                reuse_output=True)
+                self.grid_builder_key = key
+            grid = Image.fromarray(self.grid_builder.build(arrays), mode="RGB")
             # 输出到输出边
             output_edge = self.get_output(0)
             output_edge.set(grid)
@@ -0,0 +1,253 @@
+import collections
+import json
+import threading
+import time
+
+import cv2
+import numpy as np
+
+import nndeploy.base
+import nndeploy.dag
+
+
+class FrameRing:
+    """
+    固定容量的预分配帧缓冲环
+
+    生产者 acquire() 一个空闲槽位、原地写入后 publish()；消费者 get() 取得已就绪的帧
+    (不拷贝，直接返回槽位内存)，用完后 release() 归还槽位供生产者复用。
+    """
+    def __init__(self, capacity: int, shape, dtype=np.uint8):
+        self.capacity = capacity
+        self.buffers = [np.empty(shape, dtype=dtype) for _ in range(capacity)]
+        self.free_ = collections.deque(range(capacity))
+        self.ready_ = collections.deque()
+        self.cond_ = threading.Condition()
+        self.closed_ = False
+        # 生产者异常退出时记录的异常，消费者取完剩余帧后据此区分出错与正常结束
+        self.error = None
+        # 统计: 消费者等待解码的时间 / 生产者等待空闲槽位的时间
+        self.consumer_stall_time = 0.0
+        self.producer_stall_time = 0.0
+        self.consumer_stall_count = 0
+        self.produced_count = 0
+
+    def acquire(self):
+        """生产者获取一个空闲槽位，返回 (index, buffer)，环已关闭时返回 (None, None)"""
+        with self.cond_:
+            if not self.free_ and not self.closed_:
+                start = time.perf_counter()
+                while not self.free_ and not self.closed_:
+                    self.cond_.wait()
+                self.producer_stall_time += time.perf_counter() - start
+            if self.closed_:
+                return None, None
+            index = self.free_.popleft()
+            return index, self.buffers[index]
+
+    def publish(self, index: int):
+        with self.cond_:
+            self.ready_.append(index)
+            self.produced_count += 1
+            self.cond_.notify_all()
+
+    def get(self):
+        """消费者获取下一帧，返回 (index, frame)；生产结束且无剩余帧时返回 (None, None)"""
+        with self.cond_:
+            if not self.ready_ and not self.closed_:
+                start = time.perf_counter()
+                while not self.ready_ and not self.closed_:
+                    self.cond_.wait()
+                self.consumer_stall_time += time.perf_counter() - start
+                self.consumer_stall_count += 1
+            if not self.ready_:
+                return None, None
+            index = self.ready_.popleft()
+            return index, self.buffers[index]
+
+    def release(self, index: int):
+        with self.cond_:
+            self.free_.append(index)
+            self.cond_.notify_all()
+
+    def close(self, error: Exception = None):
+        with self.cond_:
+            if error is not None and self.error is None:
+                self.error = error
+            self.closed_ = True
+            self.cond_.notify_all()
+
+    def get_stats(self) -> dict:
+        with self.cond_:
+            return {
+                "capacity": self.capacity,
+                "ready": len(self.ready_),
+                "produced": self.produced_count,
+                "consumer_stall_time": self.consumer_stall_time,
+                "consumer_stall_count": self.consumer_stall_count,
+                "producer_stall_time": self.producer_stall_time,
+            }
+
+
+class PrefetchVideoDecode(nndeploy.dag.Node):
+    """
+    带预解码环形缓冲的视频解码节点，可替换 OpenCvVideoDecode
+
+    后台线程提前解码 capacity_ 帧到预分配缓冲中，下游不再同步等待解码。
+    串行 / 任务并行模式下每次图执行完毕后下游才会再次调用 run()，run() 直接输出缓冲内存，
+    输出的帧在其后 hold_frames_ 帧输出后才会被回收覆盖 (供跨帧保留引用的下游节点使用)。
+    流水线并行模式下边会缓存多帧、多个节点同时处理不同的帧，无法得知下游何时用完，
+    run() 输出槽位的拷贝并立即归还槽位。
+    """
+    def __init__(self, name, inputs: list[nndeploy.dag.Edge] = None, outputs: list[nndeploy.dag.Edge] = None):
+        super().__init__(name, inputs, outputs)
+        super().set_key("nndeploy.codec.PrefetchVideoDecode")
+        super().set_desc("视频解码(预解码环形缓冲)，输出BGR帧")
+        super().set_node_type(nndeploy.dag.NodeType.Input)
+        super().set_io_type(nndeploy.dag.IOType.Video)
+        self.set_output_type(np.ndarray)
+
+        self.path_ = ""
+        self.capacity_ = 8
+        self.hold_frames_ = 4
+
+        self.cap_ = None
+        self.ring = None
+        self.thread = None
+        self.held_ = collections.deque()
+        self.copy_output_ = False
+        self.width_ = 0
+        self.height_ = 0
+        self.fps_ = 0.0
+        self.size_ = 0
+        self.index_ = 0
+
+    def init(self):
+        if self.hold_frames_ >= self.capacity_:
+            print(f"PrefetchVideoDecode: hold_frames_({self.hold_frames_}) 必须小于 capacity_({self.capacity_})")
+            return nndeploy.base.Status(nndeploy.base.StatusCode.ErrorInvalidParam)
+        self.cap_ = cv2.VideoCapture(self.path_)
+        if not self.cap_.isOpened():
+            print(f"PrefetchVideoDecode: 无法打开视频文件: {self.path_}")
+            return nndeploy.base.Status(nndeploy.base.StatusCode.ErrorInvalidParam)
+        self.width_ = int(self.cap_.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height_ = int(self.cap_.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps_ = self.cap_.get(cv2.CAP_PROP_FPS)
+        self.size_ = int(self.cap_.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.set_loop_count(self.size_)
+
+        self.ring = FrameRing(self.capacity_, (self.height_, self.width_, 3))
+        self.held_.clear()
+        self.copy_output_ = self.get_parallel_type() == nndeploy.base.ParallelType.Pipeline
+        self.index_ = 0
+        self.thread = threading.Thread(target=self._decode_loop, name=f"{self.get_name()}_prefetch", daemon=True)
+        self.thread.start()
+        return nndeploy.base.Status.ok()
+
+    def _decode_loop(self):
+        error = None
+        try:
+            while True:
+                index, buffer = self.ring.acquire()
+                if index is None:
+                    break
+                # cv2 在尺寸/类型一致时原地写入 buffer
+                ret, frame = self.cap_.read(buffer)
+                if not ret:
+                    self.ring.release(index)
+                    break
+                if frame is not buffer:
+                    np.copyto(buffer, frame)
+                self.ring.publish(index)
+        except Exception as e:
+            # 例如流中途改变了分辨率，np.copyto 无法写入预分配的缓冲
+            error = e
+        finally:
+            # 无论如何都要关闭，否则 run() 会一直阻塞在 get()
+            self.ring.close(error)
+
+    def run(self):
+        index, frame = self.ring.get()
+        if index is None:
+            if self.ring.error is not None:
+                print(f"PrefetchVideoDecode: 解码失败 (第 {self.index_} 帧): {self.ring.error}")
+                return nndeploy.base.Status(nndeploy.base.StatusCode.ErrorIO)
+            # 实际帧数少于 CAP_PROP_FRAME_COUNT: 与 OpenCvVideoDecode 一致，
+            # 把 size_ 和 loop_count 更新为实际帧数，正常结束图的执行
+            print(f"PrefetchVideoDecode: Video playback finished at frame {self.index_}")
+            self.size_ = self.index_
+            self.set_loop_count(self.index_)
+            return nndeploy.base.Status.ok()
+        self.index_ += 1
+        if self.copy_output_:
+            frame = frame.copy()
+            self.ring.release(index)
+            self.get_output(0).set(frame)
+            return nndeploy.base.Status.ok()
+        self.held_.append(index)
+        while len(self.held_) > self.hold_frames_:
+            self.ring.release(self.held_.popleft())
+        self.get_output(0).set(frame)
+        return nndeploy.base.Status.ok()
+
+    def deinit(self):
+        if self.ring is not None:
+            stats = self.ring.get_stats()
+            print(f"PrefetchVideoDecode: 解码等待 {stats['consumer_stall_time'] * 1000:.1f}ms "
+                  f"({stats['consumer_stall_count']} 次), 缓冲满等待 {stats['producer_stall_time'] * 1000:.1f}ms")
+            self.ring.close()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        if self.cap_ is not None:
+            self.cap_.release()
+            self.cap_ = None
+        return nndeploy.base.Status.ok()
+
+    def get_prefetch_stats(self) -> dict:
+        """解码预取统计: consumer_stall_time 即下游因解码而阻塞的累计时间(秒)"""
+        if self.ring is None:
+            return {}
+        return self.ring.get_stats()
+
+    def get_width(self):
+        return self.width_
+
+    def get_height(self):
+        return self.height_
+
+    def get_fps(self):
+        return self.fps_
+
+    def get_size(self):
+        return self.size_
+
+    def serialize(self):
+        self.add_io_param("path_")
+        self.add_required_param("path_")
+        json_str = super().serialize()
+        json_obj = json.loads(json_str)
+        json_obj["path_"] = self.path_
+        json_obj["capacity_"] = self.capacity_
+        json_obj["hold_frames_"] = self.hold_frames_
+        return json.dumps(json_obj)
+
+    def deserialize(self, target: str):
+        json_obj = json.loads(target)
+        self.path_ = json_obj.get("path_", "")
+        self.capacity_ = json_obj.get("capacity_", 8)
+        self.hold_frames_ = json_obj.get("hold_frames_", 4)
+        return super().deserialize(target)
+
+
+class PrefetchVideoDecodeCreator(nndeploy.dag.NodeCreator):
+    def __init__(self):
+        super().__init__()
+
+    def create_node(self, name: str, inputs: list[nndeploy.dag.Edge], outputs: list[nndeploy.dag.Edge]):
+        self.node = PrefetchVideoDecode(name, inputs, outputs)
+        return self.node
+
+
+prefetch_video_decode_node_creator = PrefetchVideoDecodeCreator()
+nndeploy.dag.register_node("nndeploy.codec.PrefetchVideoDecode", prefetch_video_decode_node_creator)
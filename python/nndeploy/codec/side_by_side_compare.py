@@ -5,6 +5,7 @@ import time
 
 import nndeploy.base
 import nndeploy.dag
+from nndeploy.codec.canvas import resize_into
 
 class SideBySideCompare(nndeploy.dag.Node):
     """左右对比显示节点"""
@@ -31,6 +32,62 @@ class SideBySideCompare(nndeploy.dag.Node):
         self.window_created = False
         self.fps_detected_ = False
         
+        # 持久画布: 输入尺寸不变时复用，标题栏等静态内容只绘制一次
+        self.title_height = 40
+        self.canvas = None
+        self.canvas_key = None
+        self.title_bar = None
+        self.left_view = None
+        self.right_view = None
+        
+    def _build_canvas(self, h1, w1, h2, w2):
+        """按输入尺寸计算布局，分配画布并绘制静态叠加层"""
+        if self.original_size_:
+            new_w1, new_h1, new_w2, new_h2 = w1, h1, w2, h2
+        else:
+            new_h1 = new_h2 = self.target_height_
+            new_w1 = int(w1 * self.target_height_ / h1)
+            new_w2 = int(w2 * self.target_height_ / h2)
+        
+        th = self.title_height
+        canvas = np.zeros((max(new_h1, new_h2) + th, new_w1 + new_w2, 3), dtype=np.uint8)
+        canvas[:th] = (40, 40, 40)
+        cv2.putText(canvas, f"{self.left_title_} ({w1}x{h1})", 
+                   (10, 28), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+        cv2.putText(canvas, f"{self.right_title_} ({w2}x{h2})", 
+                   (new_w1 + 10, 28), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        cv2.putText(canvas, f"Scale: {w2/w1:.1f}x", 
+                   (canvas.shape[1]//2 - 50, 28),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 255), 2)
+        
+        self.canvas = canvas
+        self.title_bar = canvas[:th].copy()
+        self.left_view = canvas[th:th + new_h1, :new_w1]
+        self.right_view = canvas[th:th + new_h2, new_w1:]
+        self.canvas_key = (h1, w1, h2, w2, self.original_size_, self.target_height_,
+                           self.left_title_, self.right_title_)
+        
+    def compose(self, frame_original, frame_enhanced, fps=None):
+        """将两帧渲染进持久画布并返回画布（下一次调用会覆盖其内容）"""
+        h1, w1 = frame_original.shape[:2]
+        h2, w2 = frame_enhanced.shape[:2]
+        key = (h1, w1, h2, w2, self.original_size_, self.target_height_,
+               self.left_title_, self.right_title_)
+        if self.canvas_key != key:
+            self._build_canvas(h1, w1, h2, w2)
+        
+        resize_into(frame_original, self.left_view)
+        resize_into(frame_enhanced, self.right_view)
+        
+        # FPS 是唯一的动态文字，只恢复其所在的标题栏右端
+        if self.show_fps_ and fps is not None:
+            x0 = self.canvas.shape[1] - 160
+            self.canvas[:self.title_height, x0:] = self.title_bar[:, x0:]
+            cv2.putText(self.canvas, f"FPS: {fps:.1f}", 
+                       (self.canvas.shape[1] - 150, 28),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+        return self.canvas
+        
     def init(self):
         try:
             import platform
@@ -107,70 +164,7 @@ class SideBySideCompare(nndeploy.dag.Node):
             else:
                 fps = self.frame_count / max(elapsed, 0.001)
             
-            # 统一缩放到目标高度
-            h1, w1 = frame_original.shape[:2]
-            h2, w2 = frame_enhanced.shape[:2]
-            
-            # 添加标题和信息
-            title_height = 40
-            
-            if self.original_size_:
-                # 显示原始尺寸，不缩放
-                left_img = frame_original
-                right_img = frame_enhanced
-                
-                # 创建标题画布
-                left_canvas = np.zeros((h1 + title_height, w1, 3), dtype=np.uint8)
-                right_canvas = np.zeros((h2 + title_height, w2, 3), dtype=np.uint8)
-            else:
-                # 缩放到统一高度
-                scale1 = self.target_height_ / h1
-                scale2 = self.target_height_ / h2
-                new_w1 = int(w1 * scale1)
-                new_w2 = int(w2 * scale2)
-                left_img = cv2.resize(frame_original, (new_w1, self.target_height_))
-                right_img = cv2.resize(frame_enhanced, (new_w2, self.target_height_))
-                
-                # 创建标题画布
-                left_canvas = np.zeros((self.target_height_ + title_height, new_w1, 3), dtype=np.uint8)
-                right_canvas = np.zeros((self.target_height_ + title_height, new_w2, 3), dtype=np.uint8)
-            
-            # 填充标题区域
-            left_canvas[:title_height] = (40, 40, 40)
-            right_canvas[:title_height] = (40, 40, 40)
-            
-            # 绘制标题
-            cv2.putText(left_canvas, f"{self.left_title_} ({w1}x{h1})", 
-                       (10, 28), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-            cv2.putText(right_canvas, f"{self.right_title_} ({w2}x{h2})", 
-                       (10, 28), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            
-            # 放置图像
-            left_canvas[title_height:, :] = left_img
-            right_canvas[title_height:, :] = right_img
-            
-            # 拼接左右图像（使用最大高度对齐）
-            max_height = max(left_canvas.shape[0], right_canvas.shape[0])
-            if left_canvas.shape[0] < max_height:
-                padding = np.zeros((max_height - left_canvas.shape[0], left_canvas.shape[1], 3), dtype=np.uint8)
-                left_canvas = np.vstack([left_canvas, padding])
-            if right_canvas.shape[0] < max_height:
-                padding = np.zeros((max_height - right_canvas.shape[0], right_canvas.shape[1], 3), dtype=np.uint8)
-                right_canvas = np.vstack([right_canvas, padding])
-            
-            combined = np.hstack([left_canvas, right_canvas])
-            
-            # 显示 FPS
-            if self.show_fps_:
-                cv2.putText(combined, f"FPS: {fps:.1f}", 
-                           (combined.shape[1] - 150, 28),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
-            
-            # 显示倍率信息
-            scale_info = f"Scale: {w2/w1:.1f}x"
-            cv2.putText(combined, scale_info, 
-                       (combined.shape[1]//2 - 50, 28),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 255), 2)
+            combined = self.compose(frame_original, frame_enhanced, fps)
             
             # 仅在窗口存在时显示
             if self.window_created:
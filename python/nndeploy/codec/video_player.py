@@ -25,6 +25,7 @@ class VideoPlayer(nndeploy.dag.Node):
         self.last_time = time.time()
         self.window_created = False
         self.fps_detected_ = False  # FPS 是否已检测
+        self.display_buffer = None
         
     def init(self):
         try:
@@ -94,21 +95,20 @@ class VideoPlayer(nndeploy.dag.Node):
                 fps = self.frame_count / elapsed
                 self.frame_count = 0
                 self.last_time = current_time
-                
-                if self.show_fps_:
-                    display_frame = input_frame.copy()
-                    cv2.putText(display_frame, f"FPS: {fps:.1f}", (10, 30),
-                               cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                else:
-                    display_frame = input_frame
             else:
-                if self.show_fps_:
-                    display_frame = input_frame.copy()
-                    fps = self.frame_count / max(elapsed, 0.001)
-                    cv2.putText(display_frame, f"FPS: {fps:.1f}", (10, 30),
-                               cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                else:
-                    display_frame = input_frame
+                fps = self.frame_count / max(elapsed, 0.001)
+            
+            if self.show_fps_:
+                # 输入帧可能被其他节点共享，FPS 画在复用的显示缓冲上，避免每帧分配新帧
+                if self.display_buffer is None or self.display_buffer.shape != input_frame.shape \
+                        or self.display_buffer.dtype != input_frame.dtype:
+                    self.display_buffer = np.empty_like(input_frame)
+                np.copyto(self.display_buffer, input_frame)
+                display_frame = self.display_buffer
+                cv2.putText(display_frame, f"FPS: {fps:.1f}", (10, 30),
+                           cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+            else:
+                display_frame = input_frame
             
             # 仅在窗口存在时显示
             if self.window_created:
@@ -0,0 +1,357 @@
+# video_segment.py
+# 离线视频任务的分段并行处理：按关键帧切分 -> 多进程各自运行一份图 -> 按序拼接
+
+from __future__ import annotations
+import os
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import subprocess
+import multiprocessing
+import concurrent.futures
+from typing import Dict, List
+
+import cv2
+
+logger = logging.getLogger("video_segment")
+
+# 节点 key -> 输入视频路径参数名，分段时替换为分段文件
+DEFAULT_INPUT_PARAMS = {
+    "nndeploy::codec::OpenCvVideoDecode": "path_",
+    "nndeploy.codec.PrefetchVideoDecode": "path_",
+    "nndeploy.face.InsightVideoFaceId": "video_path_",
+    "nndeploy.face.VideoInsightFaceSwapperWithMap": "origin_video_path_",
+}
+
+# 节点 key -> 输出视频路径参数名，分段时替换为分段输出文件
+DEFAULT_OUTPUT_PARAMS = {
+    "nndeploy::codec::OpenCvVideoEncode": "path_",
+    "nndeploy.face.VideoInsightFaceSwapperWithMap": "video_path_",
+}
+
+
+class VideoSegment:
+    """一个分段: 起始帧、帧数以及分段输入/输出文件"""
+    def __init__(self, index: int, start_frame: int, num_frames: int, input_path: str, output_path: str):
+        self.index = index
+        self.start_frame = start_frame
+        self.num_frames = num_frames
+        self.input_path = input_path
+        self.output_path = output_path
+
+    def __repr__(self):
+        return (f"VideoSegment(index={self.index}, frames=[{self.start_frame}, "
+                f"{self.start_frame + self.num_frames}), input={self.input_path})")
+
+
+def _has_ffmpeg() -> bool:
+    return shutil.which("ffmpeg") is not None and shutil.which("ffprobe") is not None
+
+
+def _video_info(path: str):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise RuntimeError(f"无法打开视频文件: {path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    num_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    cap.release()
+    return fps, num_frames, width, height
+
+
+def get_keyframe_indices(path: str, fps: float = None) -> List[int]:
+    """
+    通过 ffprobe 获取关键帧的帧序号 (显示顺序)，没有 ffprobe 时返回空列表
+
+    packet 按解码顺序排列，有 B 帧时 packet 序号不等于帧序号；这里只解码关键帧
+    (-skip_frame nokey)，用显示时间戳相对流起始时间换算出帧序号
+    """
+    if not _has_ffmpeg():
+        return []
+    cmd = ["ffprobe", "-v", "error", "-select_streams", "v:0", "-skip_frame", "nokey",
+           "-show_entries", "stream=start_time,avg_frame_rate:frame=best_effort_timestamp_time",
+           "-of", "json", path]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        return []
+    try:
+        info = json.loads(result.stdout)
+    except ValueError:
+        return []
+    streams = info.get("streams") or [{}]
+    start_time = _parse_float(streams[0].get("start_time"), 0.0)
+    if not fps:
+        num, _, den = str(streams[0].get("avg_frame_rate", "0/1")).partition("/")
+        fps = _parse_float(num, 0.0) / (_parse_float(den, 1.0) or 1.0)
+    if fps <= 0:
+        return []
+    indices = set()
+    for frame in info.get("frames", []):
+        t = _parse_float(frame.get("best_effort_timestamp_time"), None)
+        if t is not None:
+            indices.add(max(0, int(round((t - start_time) * fps))))
+    return sorted(indices)
+
+
+def _parse_float(value, default):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def plan_segments(num_frames: int, num_segments: int, keyframes: List[int] = None) -> List[int]:
+    """
+    计算各分段的起始帧
+
+    有关键帧信息时，每个切分点对齐到距离均分点最近的关键帧，保证流拷贝切分无需重编码；
+    否则按帧数均分
+
+    Returns:
+        升序的起始帧列表，首项为 0；num_frames 为 0 时返回空列表
+    """
+    if num_frames <= 0:
+        return []
+    num_segments = max(1, min(num_segments, num_frames))
+    starts = [0]
+    for i in range(1, num_segments):
+        target = num_frames * i // num_segments
+        if keyframes:
+            target = min(keyframes, key=lambda k: abs(k - target))
+        if starts[-1] < target < num_frames:
+            starts.append(target)
+    return starts
+
+
+def _split_ffmpeg(input_path: str, starts: List[int], fps: float, work_dir: str) -> List[str]:
+    # segment muxer 在 segment_times 之后的第一个关键帧处切分，流拷贝，不重编码；
+    # 切分点 (均为关键帧) 提前半帧，避免时间戳取整误差跳到下一个关键帧
+    pattern = os.path.join(work_dir, "segment_%04d" + os.path.splitext(input_path)[1])
+    cmd = ["ffmpeg", "-v", "error", "-y", "-i", input_path, "-map", "0:v:0", "-c", "copy",
+           "-an", "-f", "segment", "-reset_timestamps", "1"]
+    if len(starts) > 1:
+        cmd += ["-segment_times", ",".join(f"{(s - 0.5) / fps:.6f}" for s in starts[1:])]
+    cmd.append(pattern)
+    subprocess.run(cmd, check=True)
+    return [pattern % i for i in range(len(starts))]
+
+
+def _split_opencv(input_path: str, starts: List[int], fps: float, size, work_dir: str) -> List[str]:
+    # 没有 ffmpeg 时解码后重新写入 MJPG 中间文件，切分点可落在任意帧
+    paths = [os.path.join(work_dir, f"segment_{i:04d}.avi") for i in range(len(starts))]
+    bounds = starts[1:] + [None]
+    cap = cv2.VideoCapture(input_path)
+    fourcc = cv2.VideoWriter_fourcc(*"MJPG")
+    frame_index = 0
+    for path, end in zip(paths, bounds):
+        writer = cv2.VideoWriter(path, fourcc, fps, size)
+        while end is None or frame_index < end:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            writer.write(frame)
+            frame_index += 1
+        writer.release()
+    cap.release()
+    return paths
+
+
+def split_video(input_path: str, num_segments: int, work_dir: str, output_ext: str = ".mp4") -> List[VideoSegment]:
+    """
+    将视频切分为 num_segments 个分段文件
+
+    Args:
+        input_path: 输入视频
+        num_segments: 期望分段数 (关键帧稀疏时实际分段可能更少)
+        work_dir: 分段文件目录
+        output_ext: 分段输出文件的扩展名
+
+    Returns:
+        VideoSegment 列表，按起始帧排序
+    """
+    fps, num_frames, width, height = _video_info(input_path)
+    use_ffmpeg = _has_ffmpeg()
+    keyframes = get_keyframe_indices(input_path, fps) if use_ffmpeg else []
+    starts = plan_segments(num_frames, num_segments, keyframes)
+    if not starts:
+        return []
+
+    os.makedirs(work_dir, exist_ok=True)
+    if use_ffmpeg and keyframes:
+        paths = _split_ffmpeg(input_path, starts, fps, work_dir)
+    else:
+        paths = _split_opencv(input_path, starts, fps, (width, height), work_dir)
+
+    segments = []
+    for i, (start, path) in enumerate(zip(starts, paths)):
+        end = starts[i + 1] if i + 1 < len(starts) else num_frames
+        output_path = os.path.join(work_dir, f"segment_{i:04d}_out{output_ext}")
+        segments.append(VideoSegment(i, start, end - start, path, output_path))
+    return segments
+
+
+def concat_videos(paths: List[str], output_path: str, audio_source: str = None):
+    """
+    按顺序拼接编码好的分段
+
+    有 ffmpeg 时使用 concat demuxer 流拷贝，并可选从 audio_source 复用原音轨；
+    否则用 OpenCV 逐帧重新写入 (不含音频)
+    """
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(output_dir, exist_ok=True)
+    if _has_ffmpeg():
+        list_path = os.path.join(os.path.dirname(os.path.abspath(paths[0])), "concat_list.txt")
+        with open(list_path, "w", encoding="utf-8") as f:
+            for path in paths:
+                f.write(f"file '{os.path.abspath(path)}'\n")
+        cmd = ["ffmpeg", "-v", "error", "-y", "-f", "concat", "-safe", "0", "-i", list_path]
+        if audio_source:
+            cmd += ["-i", audio_source, "-map", "0:v:0", "-map", "1:a?", "-shortest"]
+        cmd += ["-c", "copy", output_path]
+        subprocess.run(cmd, check=True)
+        return
+
+    fps, _, width, height = _video_info(paths[0])
+    writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    for path in paths:
+        cap = cv2.VideoCapture(path)
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            writer.write(frame)
+        cap.release()
+    writer.release()
+
+
+def find_node_params(graph_json: dict, params: Dict[str, str]) -> List[tuple]:
+    """递归查找图中匹配 params 的节点，返回 [(node_name, param_key)]"""
+    found = []
+    for node in graph_json.get("node_repository_", []):
+        key = node.get("key_")
+        if key in params and params[key] in node:
+            found.append((node["name_"], params[key]))
+        found.extend(find_node_params(node, params))
+    return found
+
+
+def _run_segment(graph_json_str: str, name: str, node_param: List[str], plugin: List[str]):
+    # 子进程入口: 独立加载插件并运行一份图
+    import nndeploy.base
+    import nndeploy.dag
+    from nndeploy.dag.node import add_global_import_lib, import_global_import_lib
+    from nndeploy.dag.run_json import GraphRunnerArgs
+
+    if plugin:
+        for plugin_path in plugin:
+            add_global_import_lib(plugin_path)
+        import_global_import_lib()
+    try:
+        import nndeploy.codec
+    except Exception:
+        pass
+
+    args = GraphRunnerArgs()
+    args.name = name
+    args.node_param = node_param
+    args.plugin = plugin
+    gr = nndeploy.dag.GraphRunner()
+    start = time.perf_counter()
+    _, _, status, msg = gr.run(graph_json_str, name, name, args)
+    ok = status == nndeploy.base.StatusCode.Ok
+    gr.release()
+    return ok, msg, time.perf_counter() - start
+
+
+class ParallelVideoRunner:
+    """
+    把一个离线视频工作流拆成多个帧区间，在进程池中并行运行后拼接
+
+    每个子进程运行一份完整的图，图中视频输入/输出节点的路径参数通过 node_param
+    替换为各自分段的文件。注意依赖全视频上下文的节点 (如人脸聚类) 在各分段内独立计算。
+    """
+    def __init__(self, graph_json_str: str, num_workers: int = 0,
+                 input_params: Dict[str, str] = None, output_params: Dict[str, str] = None,
+                 plugin: List[str] = None, work_dir: str = None, keep_audio: bool = True):
+        self.graph_json_str = graph_json_str
+        self.num_workers = num_workers if num_workers > 0 else (os.cpu_count() or 1)
+        self.input_params = input_params if input_params is not None else DEFAULT_INPUT_PARAMS
+        self.output_params = output_params if output_params is not None else DEFAULT_OUTPUT_PARAMS
+        self.plugin = plugin or []
+        self.work_dir = work_dir
+        self.keep_audio = keep_audio
+
+    def _segment_node_param(self, graph_json: dict, segment: VideoSegment) -> List[str]:
+        node_param = []
+        for node_name, key in find_node_params(graph_json, self.input_params):
+            node_param.append(f"{node_name}:{key}:{segment.input_path}")
+        for node_name, key in find_node_params(graph_json, self.output_params):
+            node_param.append(f"{node_name}:{key}:{segment.output_path}")
+        return node_param
+
+    def run(self, input_path: str, output_path: str, name: str = "parallel_video") -> List[VideoSegment]:
+        graph_json = json.loads(self.graph_json_str)
+        if not find_node_params(graph_json, self.input_params):
+            raise RuntimeError("图中没有可替换输入路径的视频节点")
+        if not find_node_params(graph_json, self.output_params):
+            raise RuntimeError("图中没有可替换输出路径的视频节点")
+
+        work_dir = self.work_dir or tempfile.mkdtemp(prefix="nndeploy_segments_")
+        segments = split_video(input_path, self.num_workers, work_dir,
+                               os.path.splitext(output_path)[1] or ".mp4")
+        if not segments:
+            raise RuntimeError(f"视频中没有可处理的帧: {input_path}")
+        logger.info(f"split {input_path} into {len(segments)} segments: {segments}")
+
+        # spawn: 子进程不继承父进程中已初始化的推理后端/线程池
+        ctx = multiprocessing.get_context("spawn")
+        with concurrent.futures.ProcessPoolExecutor(max_workers=len(segments), mp_context=ctx) as pool:
+            futures = [pool.submit(_run_segment, self.graph_json_str, f"{name}_{s.index}",
+                                   self._segment_node_param(graph_json, s), self.plugin)
+                       for s in segments]
+            for segment, future in zip(segments, futures):
+                ok, msg, cost = future.result()
+                if not ok:
+                    raise RuntimeError(f"segment {segment.index} failed: {msg}")
+                logger.info(f"segment {segment.index} done, {segment.num_frames} frames, {cost:.2f}s")
+
+        concat_videos([s.output_path for s in segments], output_path,
+                      input_path if self.keep_audio else None)
+        if self.work_dir is None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        return segments
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分段并行运行离线视频工作流")
+    parser.add_argument("--json_file", type=str, required=True)
+    parser.add_argument("--input", type=str, required=True, help="输入视频")
+    parser.add_argument("--output", type=str, required=True, help="输出视频")
+    parser.add_argument("--name", type=str, default="parallel_video")
+    parser.add_argument("--workers", type=int, default=0, help="进程数，0 表示 CPU 核数")
+    parser.add_argument("--work_dir", type=str, default=None, help="分段文件目录，指定时保留分段")
+    parser.add_argument("--plugin", type=str, nargs='*', default=[])
+    parser.add_argument("--no_audio", action="store_true", default=False)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="[%(asctime)s] [%(levelname)s] %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
+    with open(args.json_file, "r", encoding="utf-8") as f:
+        graph_json_str = f.read()
+    runner = ParallelVideoRunner(graph_json_str, num_workers=args.workers, plugin=args.plugin,
+                                 work_dir=args.work_dir, keep_audio=not args.no_audio)
+    start = time.perf_counter()
+    runner.run(args.input, args.output, args.name)
+    logger.info(f"done: {args.output}, {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -62,8 +62,26 @@ class GraphRunner:
                 json_obj[node_name] = {"time": run_status.init_time, "status": status}
             else:
                 json_obj[node_name] = {"time": run_status.average_time, "status": status}
+        self._add_phase_times(self.graph, json_obj)
         return json_obj
 
+    def _add_phase_times(self, graph, json_obj):
+        # 节点提供 get_phase_times() 时 (如扩散节点的文本编码/去噪/解码耗时)，附加到运行状态中，
+        # 其中的步数进度 (扩散节点当前完成的去噪步) 同时放在顶层，供 worker 的 progress 事件直接读取
+        for node in graph.get_nodes():
+            get_phase_times = getattr(node, "get_phase_times", None)
+            if get_phase_times is not None and node.get_name() in json_obj:
+                try:
+                    phases = get_phase_times()
+                    json_obj[node.get_name()]["phases"] = phases
+                    if "steps" in phases:
+                        json_obj[node.get_name()]["step"] = phases["steps"]
+                        json_obj[node.get_name()]["total_steps"] = phases.get("total_steps", 0)
+                except Exception:
+                    pass
+            if isinstance(node, Graph):
+                self._add_phase_times(node, json_obj)
+
     def release(self):
         if self.graph is not None:
             self.graph = None
@@ -490,6 +490,18 @@ class Node(_C.dag.Node):
     def synchronize(self) -> bool:
         """Synchronize the node execution."""
         return super().synchronize()
+
+    def interrupt(self) -> bool:
+        """Request the node to stop; long-running nodes poll check_interrupt_status()."""
+        return super().interrupt()
+
+    def check_interrupt_status(self) -> bool:
+        """Whether the node has been interrupted."""
+        return super().check_interrupt_status()
+
+    def clear_interrupt(self):
+        """Clear the interrupt flag."""
+        return super().clear_interrupt()
         
     def __call__(self, inputs):
         """Make the node callable with inputs."""
@@ -104,19 +104,20 @@ class Buffer(_C.device.Buffer):
         """Decrease the reference count of the buffer"""
         return super().subRef()
     
-    def to_numpy(self, *args, **kwargs):
+    def to_numpy(self, dtype, copy=False):
         """Convert the buffer to numpy array
         支持两种调用方式：
         1. to_numpy(dtype) - 直接传入dtype对象
         2. to_numpy(dtype_obj) - 传入可转换为dtype的对象
+        默认与Buffer共享内存 (数组持有Buffer的引用)，copy=True 时返回拷贝
         """
-        if len(args) == 1 and isinstance(args[0], np.dtype):
-            return super().to_numpy_v0(args[0])
+        if isinstance(dtype, np.dtype):
+            return super().to_numpy_v0(dtype, copy)
         else:
-            return super().to_numpy_v1(*args, **kwargs)
+            return super().to_numpy_v1(dtype, copy)
     
     @staticmethod
     def from_numpy(array):
-        """Convert numpy array to buffer"""
+        """Convert numpy array to buffer (shares the array's memory and keeps it alive)"""
         return _C.device.Buffer.from_numpy(array)   
 
@@ -8,17 +8,33 @@ from .type import BufferDesc, TensorDesc
 from .memory_pool import MemoryPool
 from .buffer import Buffer
 
-# 从numpy array返回一个Tensor
+# DLPack 设备类型 kDLCPU
+_DLPACK_CPU = 1
+
+
+def _wrap_tensor(c_tensor):
+    """
+    _C.device.Tensor -> Tensor。两者共享同一个 Buffer；host Tensor 直接引用外部内存 (numpy/DLPack)，
+    外部内存由 c_tensor 通过 keep_alive 持有，因此新对象需要保持 c_tensor 存活
+    """
+    tensor = Tensor(c_tensor)
+    tensor._base = c_tensor
+    return tensor
+
+# 从numpy array返回一个Tensor，host 设备上与数组共享内存
 def create_tensor_from_numpy(np_data, device="cpu"):
     device_type = nndeploy.base.DeviceType(device)
+    # Tensor 按紧凑布局解释内存，连续数组不会拷贝
+    np_data = np.ascontiguousarray(np_data)
     c_tensor = _C.device.Tensor.from_numpy(np_data, device_type)
-    tensor = Tensor(c_tensor)
-    return tensor
+    return _wrap_tensor(c_tensor)
 
-# 从Tensor返回一个numpy array
-def create_numpy_from_tensor(tensor):
-    # return np.array(tensor.to(nndeploy.base.name_to_device_type_code["cpu"]))
-    return np.array(tensor.to(nndeploy.base.DeviceType("cpu")))
+# 从Tensor返回一个numpy array，host Tensor 默认共享内存 (copy=True 时返回拷贝)
+def create_numpy_from_tensor(tensor, copy=False):
+    if _C.device.is_host_device_type(tensor.get_device_type()):
+        return tensor.to_numpy(copy=copy)
+    # 其他设备先拷贝到 host，数组持有拷贝出的 Tensor
+    return tensor.to(nndeploy.base.DeviceType("cpu")).to_numpy()
 
 
 class Tensor(_C.device.Tensor):
@@ -565,14 +581,59 @@ class Tensor(_C.device.Tensor):
         """
         return super().sub_ref()
 
-    def to_numpy(self):
+    def to_numpy(self, copy=False):
         """
-        将Tensor转换为numpy数组。
+        将Tensor转换为numpy数组。host Tensor 默认不拷贝: 数组与Tensor共享内存，
+        并持有Tensor的引用，数组存活期间Tensor不会被释放。
+
+        Args:
+            copy (bool): 是否返回独立的拷贝。默认为False。
 
         Returns:
             numpy.ndarray: numpy数组。
         """
-        return super().to_numpy()
+        return super().to_numpy(copy)
+
+    def __dlpack__(self, stream=None, **kwargs):
+        """
+        DLPack 导出 (torch.from_dlpack / np.from_dlpack 等)，仅支持 host Tensor，不拷贝内存。
+        导出的 capsule 经由 numpy 视图持有本Tensor的引用。
+
+        Returns:
+            PyCapsule: DLPack capsule。
+
+        Raises:
+            BufferError: Tensor不在host设备上。
+        """
+        if not _C.device.is_host_device_type(self.get_device_type()):
+            raise BufferError("DLPack export only supports host tensors, call to() first")
+        return self.to_numpy().__dlpack__(stream=stream, **kwargs)
+
+    def __dlpack_device__(self):
+        """
+        DLPack 设备描述。
+
+        Returns:
+            tuple: (设备类型, 设备编号)，host Tensor为 (kDLCPU, 0)。
+        """
+        if not _C.device.is_host_device_type(self.get_device_type()):
+            raise BufferError("DLPack export only supports host tensors, call to() first")
+        return (_DLPACK_CPU, 0)
+
+    @staticmethod
+    def from_dlpack(obj, device_type=nndeploy.base.DeviceType("cpu")):
+        """
+        从支持 DLPack 的对象 (torch.Tensor、numpy数组等) 创建Tensor。
+        CPU 上的数据不拷贝，Tensor 持有来源对象的引用。
+
+        Args:
+            obj: 实现 __dlpack__ 的对象，数据需在CPU上。
+            device_type (DeviceType): 目标设备类型，非host设备时拷贝到该设备。
+
+        Returns:
+            Tensor: 创建的Tensor。
+        """
+        return Tensor.from_numpy(np.from_dlpack(obj), device_type)
 
     def to(self, device_type):
         """
@@ -598,6 +659,7 @@ class Tensor(_C.device.Tensor):
         Returns:
             Tensor: 创建的Tensor。
         """
+        array = np.ascontiguousarray(array)
         c_tensor = _C.device.Tensor.from_numpy(array, device_type)
-        return Tensor(c_tensor)
+        return _wrap_tensor(c_tensor)
     
\ No newline at end of file
@@ -0,0 +1,187 @@
+# 文生图请求合批: 同一模型、相同分辨率/步数/引导系数/调度器的并发请求在短时间窗口内合并为
+# 一次 pipeline 调用 (一个去噪循环)，每个样本保留自己的提示词和初始噪声，结果按请求拆分返回
+
+import json
+import threading
+
+import torch
+
+
+class _Request:
+    def __init__(self, prompt_kwargs: dict, latents: torch.Tensor, num_images: int):
+        self.prompt_kwargs = prompt_kwargs
+        self.latents = latents
+        self.num_images = num_images
+        self.images = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class _Group:
+    def __init__(self, max_batch: int):
+        self.max_batch = max_batch
+        self.requests = []
+        self.num_images = 0
+        self.closed = False
+        self.full = threading.Event()
+
+    def add(self, request: _Request) -> bool:
+        if self.closed or (len(self.requests) > 0 and self.num_images + request.num_images > self.max_batch):
+            return False
+        self.requests.append(request)
+        self.num_images += request.num_images
+        if self.num_images >= self.max_batch:
+            self.full.set()
+        return True
+
+
+def _expand(value, count: int):
+    """单个请求的提示词参数按 num_images 展开到逐样本 (与 num_images_per_prompt 的复制顺序一致)"""
+    if isinstance(value, torch.Tensor):
+        return value.repeat_interleave(count, dim=0)
+    values = value if isinstance(value, (list, tuple)) else [value]
+    return [item for item in values for _ in range(count)]
+
+
+def merge_prompt_kwargs(requests: list) -> dict:
+    """
+    合并各请求的提示词参数: 嵌入张量按 batch 维拼接，字符串提示词拼成列表
+    (是否有反向提示词属于合批键，同组请求一致)
+    """
+    merged = {}
+    for name in requests[0].prompt_kwargs.keys():
+        values = [r.prompt_kwargs[name] for r in requests]
+        if all(v is None for v in values):
+            merged[name] = None
+            continue
+        if isinstance(values[0], torch.Tensor):
+            merged[name] = torch.cat([_expand(v, r.num_images) for v, r in zip(values, requests)], dim=0)
+        elif name in ("prompt", "negative_prompt"):
+            merged[name] = [item for v, r in zip(values, requests) for item in _expand(v, r.num_images)]
+        else:
+            # clip_skip 等标量参数已包含在合批键中，各请求一致
+            merged[name] = values[0]
+    return merged
+
+
+def scheduler_signature(scheduler) -> tuple:
+    """
+    调度器的合批键: 类名 + 配置。每个节点各自创建调度器实例，
+    按实例区分会让配置相同的节点永远无法合批
+    """
+    if scheduler is None:
+        return (None,)
+    config = getattr(scheduler, "config", None)
+    config = json.dumps(dict(config), sort_keys=True, default=str) if config is not None else None
+    return (type(scheduler).__name__, config)
+
+
+class DiffusionCoalescer:
+    """
+    请求合批器，没有后台线程: 分组内第一个到达的请求作为 leader 等待 window_ms (或攒满 max_batch 张图)，
+    随后关闭分组并执行一次合并的 pipeline 调用，其余请求阻塞等待自己的结果。
+    合批失败 (例如各请求的嵌入长度不同) 时退回逐个执行。
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.groups = {}
+        self.batches = 0
+        self.coalesced_requests = 0
+
+    @staticmethod
+    def make_key(pipeline, scheduler, prompt_kwargs: dict, latents: torch.Tensor, call_kwargs: dict) -> tuple:
+        prompt_signature = []
+        for name, value in sorted(prompt_kwargs.items()):
+            if isinstance(value, torch.Tensor):
+                prompt_signature.append((name, tuple(value.shape[1:]), value.dtype))
+            elif name in ("prompt", "negative_prompt"):
+                prompt_signature.append((name, value is None))
+            else:
+                prompt_signature.append((name, value))
+        scheduler = scheduler if scheduler is not None else getattr(pipeline, "scheduler", None)
+        return (id(pipeline), scheduler_signature(scheduler), tuple(prompt_signature),
+                tuple(latents.shape[1:]), latents.dtype, str(latents.device), tuple(sorted(call_kwargs.items())))
+
+    def submit(self, pipeline, pipeline_lock, prompt_kwargs: dict, latents: torch.Tensor, call_kwargs: dict,
+               window_ms: float, max_batch: int, scheduler=None) -> list:
+        """返回本请求的图像列表 (latents.shape[0] 张)；scheduler 为 None 时使用 pipeline 当前的调度器"""
+        request = _Request(prompt_kwargs, latents, latents.shape[0])
+        key = self.make_key(pipeline, scheduler, prompt_kwargs, latents, call_kwargs)
+        with self.lock:
+            group = self.groups.get(key)
+            if group is not None and group.add(request):
+                leader = False
+            else:
+                group = _Group(max_batch)
+                group.add(request)
+                self.groups[key] = group
+                leader = True
+
+        if not leader:
+            request.done.wait()
+            if request.error is not None:
+                raise request.error
+            return request.images
+
+        group.full.wait(timeout=window_ms / 1000.0)
+        with self.lock:
+            group.closed = True
+            if self.groups.get(key) is group:
+                del self.groups[key]
+            self.batches += 1
+            self.coalesced_requests += len(group.requests)
+        self._run(pipeline, pipeline_lock, scheduler, group.requests, call_kwargs)
+        if request.error is not None:
+            raise request.error
+        return request.images
+
+    def _run(self, pipeline, pipeline_lock, scheduler, requests: list, call_kwargs: dict):
+        try:
+            if len(requests) > 1:
+                try:
+                    self._run_batch(pipeline, pipeline_lock, scheduler, requests, call_kwargs)
+                    return
+                except Exception as e:
+                    print(f"Coalesced diffusion batch of {len(requests)} requests failed, running separately: {e}")
+            for request in requests:
+                try:
+                    self._run_batch(pipeline, pipeline_lock, scheduler, [request], call_kwargs)
+                except Exception as e:
+                    request.error = e
+        finally:
+            for request in requests:
+                request.done.set()
+
+    @staticmethod
+    def _run_batch(pipeline, pipeline_lock, scheduler, requests: list, call_kwargs: dict):
+        if len(requests) == 1:
+            prompt_kwargs = dict(requests[0].prompt_kwargs)
+            prompt_kwargs["num_images_per_prompt"] = requests[0].num_images
+            latents = requests[0].latents
+        else:
+            prompt_kwargs = merge_prompt_kwargs(requests)
+            prompt_kwargs["num_images_per_prompt"] = 1
+            latents = torch.cat([r.latents for r in requests], dim=0)
+        with pipeline_lock:
+            previous_scheduler = pipeline.scheduler
+            if scheduler is not None:
+                pipeline.scheduler = scheduler
+            try:
+                result = pipeline(**prompt_kwargs, latents=latents, **call_kwargs)
+            finally:
+                pipeline.scheduler = previous_scheduler
+        start = 0
+        for request in requests:
+            request.images = result.images[start:start + request.num_images]
+            start += request.num_images
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {"batches": self.batches, "requests": self.coalesced_requests}
+
+
+_coalescer = DiffusionCoalescer()
+
+
+def get_diffusion_coalescer() -> DiffusionCoalescer:
+    return _coalescer
@@ -0,0 +1,186 @@
+# 扩散节点的提示词嵌入与图像潜变量缓存
+# 批量任务常在固定提示词上扫随机种子，相同提示词只经过一次文本编码器，相同初始图像只经过一次 VAE 编码
+
+import hashlib
+import inspect
+import threading
+import collections
+
+import numpy as np
+import torch
+from PIL import Image
+
+from .tiled_vae import vae_upcast, scale_latents, tiled_encode
+
+
+class TensorLRUCache:
+    """线程安全的 LRU 缓存，值为张量或张量元组，调用方不能原地修改取出的张量"""
+    def __init__(self, max_entries: int):
+        self.max_entries = max(1, max_entries)
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+
+_prompt_cache = TensorLRUCache(256)
+_latent_cache = TensorLRUCache(64)
+
+
+def get_prompt_embedding_cache() -> TensorLRUCache:
+    return _prompt_cache
+
+
+def get_latent_cache() -> TensorLRUCache:
+    return _latent_cache
+
+
+def _hashable(value):
+    if isinstance(value, list):
+        return tuple(value)
+    return value
+
+
+def image_hash(image) -> str:
+    """PIL 图像 / numpy / torch 张量 (或它们的列表) 的内容哈希"""
+    h = hashlib.sha1()
+    images = image if isinstance(image, (list, tuple)) else [image]
+    for item in images:
+        if isinstance(item, Image.Image):
+            h.update(f"pil:{item.mode}:{item.size}".encode("utf-8"))
+            h.update(item.tobytes())
+        else:
+            if isinstance(item, torch.Tensor):
+                item = item.detach().cpu().numpy()
+            array = np.ascontiguousarray(item)
+            h.update(f"array:{array.shape}:{array.dtype.str}".encode("utf-8"))
+            h.update(memoryview(array).cast("B"))
+    return h.hexdigest()
+
+
+_signatures = {}
+
+
+def _pipeline_parameters(pipeline):
+    """(__call__ 参数, encode_prompt 参数)，按 pipeline 类型缓存，避免每次运行都做反射"""
+    signature = _signatures.get(type(pipeline))
+    if signature is None:
+        call_parameters = inspect.signature(pipeline.__call__).parameters
+        encode_prompt = getattr(pipeline, "encode_prompt", None)
+        encode_parameters = None
+        if encode_prompt is not None and "prompt_embeds" in call_parameters and "negative_prompt_embeds" in call_parameters:
+            encode_parameters = inspect.signature(encode_prompt).parameters
+        signature = (call_parameters, encode_parameters)
+        _signatures[type(pipeline)] = signature
+    return signature
+
+
+def encode_prompt_cached(pipeline, model_key: tuple, prompt, negative_prompt, guidance_scale: float,
+                         clip_skip: int = 0):
+    """
+    返回传给 pipeline 的提示词参数: 支持 prompt_embeds 的 pipeline (SD/SDXL/SD3 等) 返回缓存的嵌入，
+    否则原样返回 prompt/negative_prompt。嵌入按 num_images_per_prompt=1 编码，pipeline 内部会按需复制。
+    model_key 区分模型与精度，同一模型的不同 pipeline 类型 (from_pipe 共享文本编码器) 共用缓存。
+    """
+    clip_skip = clip_skip if clip_skip and clip_skip > 0 else None
+    fallback = {"prompt": prompt, "negative_prompt": negative_prompt}
+    call_parameters, parameters = _pipeline_parameters(pipeline)
+    if clip_skip is not None and "clip_skip" in call_parameters:
+        fallback["clip_skip"] = clip_skip
+    if parameters is None or prompt is None:
+        return fallback
+    do_classifier_free_guidance = guidance_scale > 1.0
+    device = pipeline._execution_device
+    key = (model_key, str(device), _hashable(prompt), _hashable(negative_prompt), clip_skip,
+           do_classifier_free_guidance)
+    embeds = _prompt_cache.get(key)
+    if embeds is None:
+        kwargs = {"prompt": prompt, "device": device, "num_images_per_prompt": 1,
+                  "do_classifier_free_guidance": do_classifier_free_guidance,
+                  "negative_prompt": negative_prompt, "clip_skip": clip_skip}
+        kwargs = {name: value for name, value in kwargs.items() if name in parameters}
+        if "prompt" not in kwargs:
+            return fallback
+        with torch.no_grad():
+            embeds = pipeline.encode_prompt(**kwargs)
+        if not isinstance(embeds, tuple) or len(embeds) not in (2, 4):
+            # 返回值格式未知 (如 Flux 的三元组)，记为不支持，之后不再调用 encode_prompt，
+            # 否则每次运行都会多做一次文本编码
+            _signatures[type(pipeline)] = (call_parameters, None)
+            return fallback
+        _prompt_cache.put(key, embeds)
+
+    names = ["prompt_embeds", "negative_prompt_embeds", "pooled_prompt_embeds", "negative_pooled_prompt_embeds"]
+    result = {name: value for name, value in zip(names, embeds) if value is not None}
+    if "prompt_embeds" not in result:
+        return fallback
+    return result
+
+
+# image 参数为潜变量时跳过 VAE 编码的 img2img pipeline
+_LATENT_IMAGE_PIPELINES = {
+    "StableDiffusionImg2ImgPipeline",
+    "StableDiffusionXLImg2ImgPipeline",
+    "StableDiffusion3Img2ImgPipeline",
+    "FluxImg2ImgPipeline",
+}
+
+
+def _vae_encode(pipeline, pixels: torch.Tensor, tile_size: int = 0, tile_overlap: int = 64) -> torch.Tensor:
+    vae = pipeline.vae
+    with vae_upcast(vae) as dtype:
+        pixels = pixels.to(device=pipeline._execution_device, dtype=dtype)
+        if tile_size > 0:
+            latents = tiled_encode(vae, pixels, tile_size, tile_overlap)
+        else:
+            with torch.no_grad():
+                latents = vae.encode(pixels).latent_dist.mode()
+    return scale_latents(vae, latents.to(vae.dtype))
+
+
+def encode_image_cached(pipeline, model_key: tuple, image, tile_size: int = 0, tile_overlap: int = 64):
+    """
+    img2img 初始图像的 VAE 潜变量 (已乘 scaling_factor)，可直接作为 pipeline 的 image 参数传入，
+    pipeline 检测到潜变量通道数后跳过 VAE 编码。不支持时返回 None，调用方应传原图。
+    取后验分布的均值而不是随机采样，VAE 后验方差很小，结果与原流程视觉上一致。
+    tile_size > 0 时分块编码 (像素尺寸)，降低大图编码的峰值内存。
+    """
+    if type(pipeline).__name__ not in _LATENT_IMAGE_PIPELINES or image is None:
+        return None
+    processor = pipeline.image_processor
+    vae = pipeline.vae
+    latent_channels = getattr(vae.config, "latent_channels", None)
+    if getattr(processor.config, "vae_latent_channels", latent_channels) != latent_channels:
+        return None
+    key = (model_key, str(pipeline._execution_device), image_hash(image), tile_size, tile_overlap)
+    latents = _latent_cache.get(key)
+    if latents is None:
+        pixels = processor.preprocess(image)
+        latents = _vae_encode(pipeline, pixels, tile_size, tile_overlap)
+        _latent_cache.put(key, latents)
+    return latents
@@ -0,0 +1,43 @@
+# 去噪过程中的低分辨率预览: 潜变量经线性投影近似为 RGB，不经过 VAE，开销可以忽略
+# 投影系数来自对 SD1.x/2.x 与 SDXL VAE 的线性拟合，其他模型退化为前三个通道的逐通道归一化
+
+import torch
+
+_SD_RGB_FACTORS = [
+    [0.3512, 0.2297, 0.3227],
+    [0.3250, 0.4974, 0.2350],
+    [-0.2829, 0.1762, 0.2721],
+    [-0.2120, -0.2616, -0.7177],
+]
+
+_SDXL_RGB_FACTORS = [
+    [0.3651, 0.4232, 0.4341],
+    [-0.2533, -0.0042, 0.1068],
+    [0.1076, 0.1111, -0.0362],
+    [-0.3165, -0.2492, -0.2188],
+]
+_SDXL_RGB_BIAS = [0.1084, -0.0175, -0.0011]
+
+
+def latents_to_rgb(pipeline, latents: torch.Tensor):
+    """
+    B x C x h x w 的潜变量 -> B x h x w x 3 的 uint8 数组 (RGB)，分辨率为潜变量分辨率。
+    打包成序列的潜变量 (如 Flux) 没有空间布局，返回 None
+    """
+    if latents.ndim != 4:
+        return None
+    latents = latents.detach().float()
+    channels = latents.shape[1]
+    if channels == 4:
+        is_sdxl = hasattr(pipeline, "text_encoder_2")
+        factors = torch.tensor(_SDXL_RGB_FACTORS if is_sdxl else _SD_RGB_FACTORS, device=latents.device)
+        rgb = torch.einsum("bchw,cr->bhwr", latents, factors)
+        if is_sdxl:
+            rgb = rgb + torch.tensor(_SDXL_RGB_BIAS, device=latents.device)
+        rgb = (rgb + 1.0) / 2.0
+    else:
+        rgb = latents[:, :3].permute(0, 2, 3, 1)
+        low = rgb.amin(dim=(1, 2), keepdim=True)
+        high = rgb.amax(dim=(1, 2), keepdim=True)
+        rgb = (rgb - low) / (high - low).clamp(min=1e-6)
+    return (rgb.clamp(0, 1) * 255).round().to(torch.uint8).cpu().numpy()
@@ -0,0 +1,78 @@
+# 扩散节点单次运行的分阶段耗时: 文本编码、逐步去噪、VAE 解码 (含后处理，或 pipeline 外的分块解码)
+# 去噪步的边界由 pipeline 的 callback_on_step_end 记录
+
+import time
+
+import torch
+
+
+class DiffusionPhaseTimer:
+    def __init__(self):
+        self.sync = torch.cuda.is_available()
+        self.reset()
+
+    def reset(self):
+        self.text_encode = 0.0
+        self.image_encode = 0.0
+        self.step_times = []
+        self.total_steps = 0
+        self.decode = 0.0
+        self.tiled_decode = 0.0  # output_type="latent" 后在 pipeline 外分块解码的耗时
+        self.call_time = 0.0
+        self.call_start = None
+        self.last_mark = None
+
+    def _now(self) -> float:
+        # GPU 异步执行，计时点前同步才能得到真实的阶段耗时
+        if self.sync:
+            torch.cuda.synchronize()
+        return time.perf_counter()
+
+    def measure(self, phase: str):
+        return _PhaseContext(self, phase)
+
+    def begin_call(self):
+        self.call_start = self._now()
+        self.last_mark = self.call_start
+
+    def step_callback(self, pipeline, step: int, timestep, callback_kwargs: dict) -> dict:
+        """作为 callback_on_step_end 传给 pipeline，记录每个去噪步的结束时间"""
+        now = self._now()
+        self.step_times.append(now - self.last_mark)
+        self.last_mark = now
+        self.total_steps = getattr(pipeline, "_num_timesteps", 0) or 0
+        return callback_kwargs
+
+    def end_call(self):
+        now = self._now()
+        if len(self.step_times) > 0:
+            self.decode = now - self.last_mark
+        self.call_time = now - self.call_start
+
+    def get_times(self) -> dict:
+        """毫秒为单位；第一个去噪步包含 pipeline 内部的准备工作 (设置时间步、准备潜变量)"""
+        denoise = sum(self.step_times)
+        return {
+            "text_encode_ms": self.text_encode * 1000.0,
+            "image_encode_ms": self.image_encode * 1000.0,
+            "denoise_ms": denoise * 1000.0,
+            "steps": len(self.step_times),
+            "total_steps": self.total_steps,
+            "denoise_per_step_ms": denoise * 1000.0 / len(self.step_times) if self.step_times else 0.0,
+            "vae_decode_ms": (self.decode + self.tiled_decode) * 1000.0,
+            "total_ms": (self.text_encode + self.image_encode + self.call_time + self.tiled_decode) * 1000.0,
+        }
+
+
+class _PhaseContext:
+    def __init__(self, timer: DiffusionPhaseTimer, phase: str):
+        self.timer = timer
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = self.timer._now()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        setattr(self.timer, self.phase, getattr(self.timer, self.phase) + self.timer._now() - self.start)
+        return False
@@ -9,6 +9,8 @@ import json
 import torch
 import time
 import os
+import inspect
+import contextlib
 
 from diffusers import DiffusionPipeline
 from diffusers import AutoPipelineForText2Image
@@ -24,14 +26,107 @@ from PIL import Image, ImageFilter, ImageOps
 from .diffusers_info.pretrain_model_paths import get_text2image_pipelines_pretrained_model_paths
 from .diffusers_info.pretrain_model_paths import get_image2image_pipelines_pretrained_model_paths
 from .diffusers_info.pretrain_model_paths import get_inpainting_pipelines_pretrained_model_paths
+from .pipeline_pool import get_pipeline_pool, get_pipeline_device, cpu_supports_bf16, EXECUTION_PROFILES
+from .embedding_cache import encode_prompt_cached, encode_image_cached
+from .coalescer import get_diffusion_coalescer
+from .phase_timer import DiffusionPhaseTimer
+from .tiled_vae import decode_latents_to_pil
+from .latent_preview import latents_to_rgb
 
 from diffusers.utils import logging
 
 logging.set_verbosity_info()
 
 def get_scheduler(pipeline, scheduler, scheduler_kwargs):
+    """按名字构造 diffusers 调度器 (如 "EulerDiscreteScheduler")，沿用 pipeline 当前调度器的配置"""
     if scheduler == "default":
         return pipeline.scheduler
+    import diffusers
+    scheduler_class = getattr(diffusers, scheduler, None)
+    if scheduler_class is None or not hasattr(scheduler_class, "from_config"):
+        raise ValueError(f"Unknown scheduler: {scheduler}")
+    parameters = inspect.signature(scheduler_class.__init__).parameters
+    kwargs = {key: value for key, value in (scheduler_kwargs or {}).items() if key in parameters}
+    return scheduler_class.from_config(pipeline.scheduler.config, **kwargs)
+
+class DiffusionInterrupted(RuntimeError):
+    pass
+
+def make_step_callback(node):
+    """
+    callback_on_step_end: 记录步耗时与进度 (经 get_phase_times 进入运行状态)，节点被中断
+    (GraphRunner.cancel_running) 时抛出 DiffusionInterrupted 中止去噪，
+    每 preview_interval 步把潜变量的近似 RGB 预览交给 node.preview_callback(step, rgb)
+    """
+    timer = node.phase_timer
+    def step_callback(pipeline, step, timestep, callback_kwargs):
+        timer.step_callback(pipeline, step, timestep, callback_kwargs)
+        if node.check_interrupt_status():
+            raise DiffusionInterrupted(f"{node.get_name()} interrupted at step {step + 1}")
+        if (node.preview_callback is not None and node.preview_interval > 0
+                and (step + 1) % node.preview_interval == 0):
+            latents = callback_kwargs.get("latents")
+            rgb = latents_to_rgb(pipeline, latents) if latents is not None else None
+            if rgb is not None:
+                node.preview_callback(step + 1, rgb)
+        return callback_kwargs
+    return step_callback
+
+def prepare_pipeline_node(node):
+    """init 时一次性确定 pipeline 支持的参数并构造调度器，run 时不再反射或重建"""
+    call_parameters = inspect.signature(node.pipeline.__call__).parameters
+    node.supports_guidance_rescale = "guidance_rescale" in call_parameters
+    node.supports_step_callback = "callback_on_step_end" in call_parameters
+    node.run_scheduler = None
+    if node.scheduler != "default":
+        node.run_scheduler = get_scheduler(node.pipeline, node.scheduler, node.scheduler_kwargs)
+    node.pipeline_lock = get_pipeline_pool().get_lock(node.pipeline)
+    node.phase_timer = DiffusionPhaseTimer()
+    node.step_callback = make_step_callback(node)
+    # cpu_optimized: 进程级线程数，以及 CPU 支持 bf16 时 fp32 模型以 bf16 autocast 推理
+    if node.cpu_num_threads > 0:
+        torch.set_num_threads(node.cpu_num_threads)
+    node.autocast_dtype = None
+    if (node.execution_profile == "cpu_optimized" and get_pipeline_device(node) == "cpu"
+            and node.torch_dtype == "float32" and cpu_supports_bf16()):
+        node.autocast_dtype = torch.bfloat16
+    # 分块 VAE 只接管 UNet 系 pipeline 的解码 (output_type="latent" 后由 decode_tiled 完成)
+    node.use_tiled_vae = (getattr(node, "vae_tiling", False) and hasattr(node.pipeline, "unet")
+                          and hasattr(node.pipeline, "vae") and hasattr(node.pipeline, "image_processor"))
+
+def pipeline_autocast(node):
+    if node.autocast_dtype is None:
+        return contextlib.nullcontext()
+    return torch.autocast("cpu", dtype=node.autocast_dtype)
+
+def call_pipeline(node, **kwargs):
+    """
+    持有 pipeline 锁，以节点自己的调度器调用 pipeline (pipeline 由多个节点共享，调用结束后恢复原调度器)，
+    并通过逐步回调记录耗时与进度、响应中断
+    """
+    pipeline = node.pipeline
+    timer = node.phase_timer
+    if node.supports_step_callback:
+        kwargs["callback_on_step_end"] = node.step_callback
+    if node.check_interrupt_status():
+        raise DiffusionInterrupted(f"{node.get_name()} interrupted")
+    with node.pipeline_lock, pipeline_autocast(node):
+        previous_scheduler = pipeline.scheduler
+        if node.run_scheduler is not None:
+            pipeline.scheduler = node.run_scheduler
+        try:
+            timer.begin_call()
+            result = pipeline(**kwargs)
+            timer.end_call()
+        finally:
+            pipeline.scheduler = previous_scheduler
+    return result.images
+
+def decode_tiled(node, latents):
+    """分块解码 output_type="latent" 的结果，每完成一行块把已确定的条带交给 node.tile_callback"""
+    with node.phase_timer.measure("tiled_decode"), node.pipeline_lock, pipeline_autocast(node):
+        return decode_latents_to_pil(node.pipeline, latents, node.vae_tile_size, node.vae_tile_overlap,
+                                     node.tile_callback)
 
 class Text2Image(nndeploy.dag.Node):
     """
@@ -61,6 +156,7 @@ class Text2Image(nndeploy.dag.Node):
         self.num_inference_steps = 50
         self.guidance_scale = 8.0
         self.guidance_rescale = 0.0
+        self.clip_skip = 0  # 跳过文本编码器最后几层，0 表示不跳过
         self.scheduler = "default"
         self.scheduler_kwargs = {"key": "value"}
         
@@ -68,78 +164,65 @@ class Text2Image(nndeploy.dag.Node):
         self.enable_model_cpu_offload = True
         self.enable_sequential_cpu_offload = False
         self.enable_xformers_memory_efficient_attention = False
+        # Execution profile: "default" or "cpu_optimized" (channels-last, bf16 autocast, VAE slicing/tiling)
+        self.execution_profile = "default"
+        self.enable_attention_slicing = False
+        self.compile_unet = False  # torch.compile the UNet (cpu_optimized profile)
+        self.cpu_num_threads = 0  # 0 keeps the torch default
+        # Step preview: every preview_interval steps (0 disables) preview_callback(step, rgb) receives an
+        # approximate latent-resolution uint8 RGB array (batch x h x w x 3); the callback is not serialized
+        self.preview_interval = 0
+        self.preview_callback = None
+        # Tiled VAE: decode (and encode) large images tile by tile, peak memory bounded by the tile size
+        self.vae_tiling = False
+        self.vae_tile_size = 512  # pixels
+        self.vae_tile_overlap = 64  # pixels, blended linearly
+        # Progressive output, called as tile_callback(y0, y1, rows) with rows a uint8 RGB array
+        # (batch x (y1 - y0) x width x 3) once a horizontal band is final; not serialized
+        self.tile_callback = None
+        
+        # Request coalescing: 0 disables, otherwise wait up to this long for compatible requests
+        self.coalesce_window_ms = 0
+        self.coalesce_max_batch = 8
         
         # Pipeline instance
         self.pipeline = None
+        self.phase_timer = None
         
-    def init(self):        
+    def init(self):
         try:
-            try:
-                # Try to load locally first
-                self.pipeline = AutoPipelineForText2Image.from_pretrained(
-                    pretrained_model_or_path=self.pretrained_model_name_or_path,
-                    local_files_only=True,
-                    torch_dtype=get_torch_dtype(self.torch_dtype),
-                    use_safetensors=self.use_safetensors,
-                )
-            except Exception as local_error:                
-                self.pipeline = AutoPipelineForText2Image.from_pretrained(
-                    pretrained_model_or_path=self.pretrained_model_name_or_path,
-                    torch_dtype=get_torch_dtype(self.torch_dtype),
-                    use_safetensors=self.use_safetensors,
-                )
-                
-            print("Text2Image pipeline:", self.pipeline)
-            
-            # Memory optimization
-            if self.enable_sequential_cpu_offload:
-                # self.pipeline.reset_device_map()
-                try:
-                    self.pipeline.enable_sequential_cpu_offload()
-                    self.enable_model_cpu_offload = False 
-                except ImportError as e:
-                    print("Accelerate library needs to be upgraded: pip install accelerate>=0.14.0")
-                    self.enable_model_cpu_offload = True  
-                except RuntimeError as e:
-                    print("No available accelerator device found")
-                    self.enable_model_cpu_offload = True  
-                except ValueError as e:
-                    print(f"Configuration conflict: {e}")
-                    self.enable_model_cpu_offload = True         
-            
-            # Move pipeline to the appropriate device
-            if not self.enable_sequential_cpu_offload:
-                device_type = self.get_device_type()
-                if device_type.code_ == nndeploy.base.DeviceTypeCode.cuda:
-                    device_id = device_type.device_id_
-                    target_device = f"cuda:{device_id}"
-                    self.pipeline.to(target_device)
-                elif device_type.code_ == nndeploy.base.DeviceTypeCode.cpu:
-                    self.pipeline.to("cpu")
-                
-            # More memory optimization    
-            if self.enable_model_cpu_offload:
-                self.pipeline.enable_model_cpu_offload()
-            if self.enable_xformers_memory_efficient_attention:
-                try:
-                    import xformers
-                    self.pipeline.enable_xformers_memory_efficient_attention()
-                    print("XFormers memory efficient attention enabled.")
-                except ImportError:
-                    print("Warning: xformers is not installed. Cannot enable memory efficient attention. Please refer to https://github.com/facebookresearch/xformers for installation.")
-                except Exception as e:
-                    print(f"Failed to enable XFormers memory efficient attention: {e}")
-                
-            return nndeploy.base.Status.ok()   
+            # 同一模型在进程内只加载一次，与其他扩散节点共享组件
+            self.pipeline = get_pipeline_pool().acquire(
+                "text2image",
+                self.pretrained_model_name_or_path,
+                torch_dtype=self.torch_dtype,
+                use_safetensors=self.use_safetensors,
+                device=get_pipeline_device(self),
+                enable_model_cpu_offload=self.enable_model_cpu_offload,
+                enable_sequential_cpu_offload=self.enable_sequential_cpu_offload,
+                enable_xformers_memory_efficient_attention=self.enable_xformers_memory_efficient_attention,
+                enable_attention_slicing=self.enable_attention_slicing,
+                execution_profile=self.execution_profile,
+                compile_unet=self.compile_unet,
+            )
+            prepare_pipeline_node(self)
+            return nndeploy.base.Status.ok()
         except Exception as e:
             print(f"Failed to initialize Diffusers pipeline: {e}")
             return nndeploy.base.Status.error()
-    
+
+    def deinit(self):
+        get_pipeline_pool().release(self.pipeline)
+        self.pipeline = None
+        return nndeploy.base.Status.ok()
+
+    def get_phase_times(self) -> dict:
+        """最近一次 run 的分阶段耗时 (文本编码 / 逐步去噪 / VAE 解码)"""
+        return self.phase_timer.get_times() if self.phase_timer is not None else {}
+
     def run(self) -> nndeploy.base.Status:
         """Run text-to-image generation"""
         try:
-            if self.scheduler != "default":
-                self.pipeline.scheduler = get_scheduler(self.pipeline, self.scheduler, self.scheduler_kwargs)
             
             # Get input text prompt
             input_edge = self.get_input(0)
@@ -153,37 +236,48 @@ class Text2Image(nndeploy.dag.Node):
             
             num_images_per_prompt = latent.shape[0]
             
-            # 检查pipeline是否支持guidance_rescale参数
-            import inspect
-            pipeline_call_signature = inspect.signature(self.pipeline.__call__)
-            supports_guidance_rescale = 'guidance_rescale' in pipeline_call_signature.parameters
-            if supports_guidance_rescale:
-                # print("Pipeline supports guidance_rescale parameter")
-                result = self.pipeline(
-                    prompt=prompt,
-                    num_inference_steps=self.num_inference_steps,
-                    guidance_scale=self.guidance_scale,
-                    negative_prompt=negative_prompt,
-                    num_images_per_prompt=num_images_per_prompt,
-                    latents=latent,
-                    guidance_rescale=self.guidance_rescale
-                )
+            call_kwargs = {
+                "num_inference_steps": self.num_inference_steps,
+                "guidance_scale": self.guidance_scale,
+            }
+            if self.supports_guidance_rescale:
+                call_kwargs["guidance_rescale"] = self.guidance_rescale
+            if self.use_tiled_vae:
+                call_kwargs["output_type"] = "latent"
+
+            timer = self.phase_timer
+            timer.reset()
+            # 共享组件的 pipeline 串行推理
+            with self.pipeline_lock:
+                # 相同提示词复用缓存的嵌入，跳过文本编码器
+                model_key = (self.pretrained_model_name_or_path, self.torch_dtype)
+                with timer.measure("text_encode"):
+                    prompt_kwargs = encode_prompt_cached(self.pipeline, model_key, prompt, negative_prompt,
+                                                         self.guidance_scale, self.clip_skip)
+            if self.coalesce_window_ms > 0:
+                # 与其他任务中参数兼容的请求合并为一次去噪循环 (只统计总耗时)
+                timer.begin_call()
+                with pipeline_autocast(self):
+                    images = get_diffusion_coalescer().submit(self.pipeline, self.pipeline_lock, prompt_kwargs, latent,
+                                                              call_kwargs, self.coalesce_window_ms,
+                                                              self.coalesce_max_batch, scheduler=self.run_scheduler)
+                timer.end_call()
             else:
-                # print("Pipeline does not support guidance_rescale parameter")
-                result = self.pipeline(
-                    prompt=prompt,
-                    num_inference_steps=self.num_inference_steps,
-                    guidance_scale=self.guidance_scale,
-                    negative_prompt=negative_prompt,
+                images = call_pipeline(
+                    self,
+                    **prompt_kwargs,
                     num_images_per_prompt=num_images_per_prompt,
                     latents=latent,
+                    **call_kwargs,
                 )
-                            
+            if self.use_tiled_vae:
+                images = decode_tiled(self, images)
+
             # Set output to output edges
-            min_len = min(len(result.images), len(self.get_all_output()))
+            min_len = min(len(images), len(self.get_all_output()))
             for i in range(min_len):
                 output_edge = self.get_output(i)
-                generated_image = result.images[i]
+                generated_image = images[i]
                 output_edge.set(generated_image)
             
             return nndeploy.base.Status.ok()            
@@ -196,6 +290,7 @@ class Text2Image(nndeploy.dag.Node):
             # Add required parameters
             self.add_required_param("pretrained_model_name_or_path")
             self.add_dropdown_param("pretrained_model_name_or_path", get_text2image_pipelines_pretrained_model_paths())
+            self.add_dropdown_param("execution_profile", EXECUTION_PROFILES)
             # Get base class serialization
             base_json = super().serialize()
             json_obj = json.loads(base_json)
@@ -209,12 +304,24 @@ class Text2Image(nndeploy.dag.Node):
             json_obj["num_inference_steps"] = self.num_inference_steps
             json_obj["guidance_scale"] = self.guidance_scale
             json_obj["guidance_rescale"] = self.guidance_rescale
+            json_obj["clip_skip"] = self.clip_skip
             json_obj["scheduler"] = self.scheduler
             json_obj["scheduler_kwargs"] = self.scheduler_kwargs
             # Memory optimization
             json_obj["enable_model_cpu_offload"] = self.enable_model_cpu_offload
             json_obj["enable_sequential_cpu_offload"] = self.enable_sequential_cpu_offload
             json_obj["enable_xformers_memory_efficient_attention"] = self.enable_xformers_memory_efficient_attention
+            json_obj["execution_profile"] = self.execution_profile
+            json_obj["enable_attention_slicing"] = self.enable_attention_slicing
+            json_obj["compile_unet"] = self.compile_unet
+            json_obj["cpu_num_threads"] = self.cpu_num_threads
+            json_obj["preview_interval"] = self.preview_interval
+            json_obj["vae_tiling"] = self.vae_tiling
+            json_obj["vae_tile_size"] = self.vae_tile_size
+            json_obj["vae_tile_overlap"] = self.vae_tile_overlap
+            # Request coalescing
+            json_obj["coalesce_window_ms"] = self.coalesce_window_ms
+            json_obj["coalesce_max_batch"] = self.coalesce_max_batch
             
             return json.dumps(json_obj, ensure_ascii=False, indent=2)
             
@@ -234,11 +341,22 @@ class Text2Image(nndeploy.dag.Node):
             self.num_inference_steps = json_obj.get("num_inference_steps", 50)
             self.guidance_scale = json_obj.get("guidance_scale", 8.0)
             self.guidance_rescale = json_obj.get("guidance_rescale", 0.0)
+            self.clip_skip = json_obj.get("clip_skip", 0)
             self.scheduler = json_obj.get("scheduler", "default")
             self.scheduler_kwargs = json_obj.get("scheduler_kwargs", {"key": "value"})
             self.enable_model_cpu_offload = json_obj.get("enable_model_cpu_offload", True)
             self.enable_sequential_cpu_offload = json_obj.get("enable_sequential_cpu_offload", False)
             self.enable_xformers_memory_efficient_attention = json_obj.get("enable_xformers_memory_efficient_attention", False)
+            self.execution_profile = json_obj.get("execution_profile", "default")
+            self.enable_attention_slicing = json_obj.get("enable_attention_slicing", False)
+            self.compile_unet = json_obj.get("compile_unet", False)
+            self.cpu_num_threads = json_obj.get("cpu_num_threads", 0)
+            self.preview_interval = json_obj.get("preview_interval", 0)
+            self.vae_tiling = json_obj.get("vae_tiling", False)
+            self.vae_tile_size = json_obj.get("vae_tile_size", 512)
+            self.vae_tile_overlap = json_obj.get("vae_tile_overlap", 64)
+            self.coalesce_window_ms = json_obj.get("coalesce_window_ms", 0)
+            self.coalesce_max_batch = json_obj.get("coalesce_max_batch", 8)
             
             # Call base class deserialization
             return super().deserialize(json_str)
@@ -289,6 +407,7 @@ class Image2Image(nndeploy.dag.Node):
         self.num_inference_steps = 50
         self.guidance_scale = 8.0
         self.guidance_rescale = 0.0
+        self.clip_skip = 0  # 跳过文本编码器最后几层，0 表示不跳过
         self.scheduler = "default"
         self.scheduler_kwargs = {"key": "value"}
         self.strength = 0.8  # Controls the degree of modification to the original image
@@ -297,78 +416,61 @@ class Image2Image(nndeploy.dag.Node):
         self.enable_model_cpu_offload = False
         self.enable_sequential_cpu_offload = False
         self.enable_xformers_memory_efficient_attention = False
+        # Execution profile: "default" or "cpu_optimized" (channels-last, bf16 autocast, VAE slicing/tiling)
+        self.execution_profile = "default"
+        self.enable_attention_slicing = False
+        self.compile_unet = False  # torch.compile the UNet (cpu_optimized profile)
+        self.cpu_num_threads = 0  # 0 keeps the torch default
+        # Step preview: every preview_interval steps (0 disables) preview_callback(step, rgb) receives an
+        # approximate latent-resolution uint8 RGB array (batch x h x w x 3); the callback is not serialized
+        self.preview_interval = 0
+        self.preview_callback = None
+        # Tiled VAE: decode (and encode) large images tile by tile, peak memory bounded by the tile size
+        self.vae_tiling = False
+        self.vae_tile_size = 512  # pixels
+        self.vae_tile_overlap = 64  # pixels, blended linearly
+        # Progressive output, called as tile_callback(y0, y1, rows) with rows a uint8 RGB array
+        # (batch x (y1 - y0) x width x 3) once a horizontal band is final; not serialized
+        self.tile_callback = None
 
         # Pipeline instance
         self.pipeline = None
+        self.phase_timer = None
 
     def init(self):
         try:
-            try:
-                # Try to load locally first
-                self.pipeline = AutoPipelineForImage2Image.from_pretrained(
-                    pretrained_model_or_path=self.pretrained_model_name_or_path,
-                    local_files_only=True,
-                    torch_dtype=get_torch_dtype(self.torch_dtype),
-                    use_safetensors=self.use_safetensors
-                )
-            except Exception as local_error:
-                self.pipeline = AutoPipelineForImage2Image.from_pretrained(
-                    pretrained_model_or_path=self.pretrained_model_name_or_path,
-                    torch_dtype=get_torch_dtype(self.torch_dtype),
-                    use_safetensors=self.use_safetensors
-                )
-                
-            print("Image2Image pipeline:", self.pipeline)
-
-            # Memory optimization
-            if self.enable_sequential_cpu_offload:
-                self.pipeline.reset_device_map()
-                try:
-                    self.pipeline.enable_sequential_cpu_offload()
-                    self.enable_model_cpu_offload = False
-                except ImportError:
-                    print("Accelerate library needs to be upgraded: pip install accelerate>=0.14.0")
-                    self.enable_model_cpu_offload = True
-                except RuntimeError:
-                    print("No available accelerator device found")
-                    self.enable_model_cpu_offload = True
-                except ValueError as e:
-                    print(f"Configuration conflict: {e}")
-                    self.enable_model_cpu_offload = True
-
-            # Move pipeline to the appropriate device
-            if not self.enable_sequential_cpu_offload:
-                device_type = self.get_device_type()
-                if device_type.code_ == nndeploy.base.DeviceTypeCode.cuda:
-                    device_id = device_type.device_id_
-                    target_device = f"cuda:{device_id}"
-                    self.pipeline.to(target_device)
-                elif device_type.code_ == nndeploy.base.DeviceTypeCode.cpu:
-                    self.pipeline.to("cpu")
-
-            # More memory optimization
-            if self.enable_model_cpu_offload:
-                self.pipeline.enable_model_cpu_offload()
-            if self.enable_xformers_memory_efficient_attention:
-                try:
-                    import xformers
-                    self.pipeline.enable_xformers_memory_efficient_attention()
-                    print("XFormers memory efficient attention enabled.")
-                except ImportError:
-                    print("Warning: xformers is not installed. Cannot enable memory efficient attention. Please refer to https://github.com/facebookresearch/xformers for installation.")
-                except Exception as e:
-                    print(f"Failed to enable XFormers memory efficient attention: {e}")
-
+            # 同一模型在进程内只加载一次，与其他扩散节点共享组件
+            self.pipeline = get_pipeline_pool().acquire(
+                "image2image",
+                self.pretrained_model_name_or_path,
+                torch_dtype=self.torch_dtype,
+                use_safetensors=self.use_safetensors,
+                device=get_pipeline_device(self),
+                enable_model_cpu_offload=self.enable_model_cpu_offload,
+                enable_sequential_cpu_offload=self.enable_sequential_cpu_offload,
+                enable_xformers_memory_efficient_attention=self.enable_xformers_memory_efficient_attention,
+                enable_attention_slicing=self.enable_attention_slicing,
+                execution_profile=self.execution_profile,
+                compile_unet=self.compile_unet,
+            )
+            prepare_pipeline_node(self)
             return nndeploy.base.Status.ok()
         except Exception as e:
             print(f"Failed to initialize Diffusers image-to-image pipeline: {e}")
             return nndeploy.base.Status.error()
 
+    def deinit(self):
+        get_pipeline_pool().release(self.pipeline)
+        self.pipeline = None
+        return nndeploy.base.Status.ok()
+
+    def get_phase_times(self) -> dict:
+        """最近一次 run 的分阶段耗时 (文本编码 / 逐步去噪 / VAE 解码)"""
+        return self.phase_timer.get_times() if self.phase_timer is not None else {}
+
     def run(self) -> nndeploy.base.Status:
         """Run image-to-image generation"""
         try:
-            if self.scheduler != "default":
-                self.pipeline.scheduler = get_scheduler(self.pipeline, self.scheduler, self.scheduler_kwargs)
             # Get input text prompt
             input_edge = self.get_input(0)
             prompt = input_edge.get(self)
@@ -398,38 +500,45 @@ class Image2Image(nndeploy.dag.Node):
                 generator = torch.Generator(device=device)
                 generator.manual_seed(self.generator_seed)
 
-            import inspect
-            pipeline_call_signature = inspect.signature(self.pipeline.__call__)
-            supports_guidance_rescale = 'guidance_rescale' in pipeline_call_signature.parameters
-            if supports_guidance_rescale:
-                result = self.pipeline(
-                    prompt=prompt,
-                    image=source_image,
-                    strength=self.strength,
-                    num_inference_steps=self.num_inference_steps,
-                    guidance_scale=self.guidance_scale,
-                    negative_prompt=negative_prompt,
-                    num_images_per_prompt=num_images_per_prompt,
-                    generator=generator,
-                    guidance_rescale=self.guidance_rescale
-                )
-            else:
-                result = self.pipeline(
-                    prompt=prompt,
-                    image=source_image,
-                    strength=self.strength,
-                    num_inference_steps=self.num_inference_steps,
-                    guidance_scale=self.guidance_scale,
-                    negative_prompt=negative_prompt,
-                    num_images_per_prompt=num_images_per_prompt,
-                    generator=generator,
-                )
+            timer = self.phase_timer
+            timer.reset()
+            # 共享组件的 pipeline 串行推理
+            with self.pipeline_lock:
+                # 相同提示词 (及初始图像) 复用缓存的嵌入/潜变量，跳过文本编码器 (和 VAE 编码)
+                model_key = (self.pretrained_model_name_or_path, self.torch_dtype)
+                with timer.measure("text_encode"):
+                    prompt_kwargs = encode_prompt_cached(self.pipeline, model_key, prompt, negative_prompt,
+                                                         self.guidance_scale, self.clip_skip)
+                with timer.measure("image_encode"):
+                    tile_size = self.vae_tile_size if self.vae_tiling else 0
+                    image_latents = encode_image_cached(self.pipeline, model_key, source_image, tile_size,
+                                                        self.vae_tile_overlap)
+                if image_latents is not None:
+                    source_image = image_latents
+            call_kwargs = {}
+            if self.supports_guidance_rescale:
+                call_kwargs["guidance_rescale"] = self.guidance_rescale
+            if self.use_tiled_vae:
+                call_kwargs["output_type"] = "latent"
+            images = call_pipeline(
+                self,
+                **prompt_kwargs,
+                image=source_image,
+                strength=self.strength,
+                num_inference_steps=self.num_inference_steps,
+                guidance_scale=self.guidance_scale,
+                num_images_per_prompt=num_images_per_prompt,
+                generator=generator,
+                **call_kwargs,
+            )
+            if self.use_tiled_vae:
+                images = decode_tiled(self, images)
 
             # Set output to output edges
-            min_len = min(len(result.images), len(self.get_all_output()))
+            min_len = min(len(images), len(self.get_all_output()))
             for i in range(min_len):
                 output_edge = self.get_output(i)
-                generated_image = result.images[i]
+                generated_image = images[i]
                 output_edge.set(generated_image)
 
             return nndeploy.base.Status.ok()
@@ -443,6 +552,7 @@ class Image2Image(nndeploy.dag.Node):
             # Add required parameters
             self.add_required_param("pretrained_model_name_or_path")
             self.add_dropdown_param("pretrained_model_name_or_path", get_image2image_pipelines_pretrained_model_paths())
+            self.add_dropdown_param("execution_profile", EXECUTION_PROFILES)
             # Get base class serialization
             base_json = super().serialize()
             json_obj = json.loads(base_json)
@@ -454,6 +564,7 @@ class Image2Image(nndeploy.dag.Node):
             json_obj["num_inference_steps"] = self.num_inference_steps
             json_obj["guidance_scale"] = self.guidance_scale
             json_obj["guidance_rescale"] = self.guidance_rescale
+            json_obj["clip_skip"] = self.clip_skip
             json_obj["scheduler"] = self.scheduler
             json_obj["scheduler_kwargs"] = self.scheduler_kwargs
             json_obj["strength"] = self.strength
@@ -462,6 +573,14 @@ class Image2Image(nndeploy.dag.Node):
             json_obj["enable_model_cpu_offload"] = self.enable_model_cpu_offload
             json_obj["enable_sequential_cpu_offload"] = self.enable_sequential_cpu_offload
             json_obj["enable_xformers_memory_efficient_attention"] = self.enable_xformers_memory_efficient_attention
+            json_obj["execution_profile"] = self.execution_profile
+            json_obj["enable_attention_slicing"] = self.enable_attention_slicing
+            json_obj["compile_unet"] = self.compile_unet
+            json_obj["cpu_num_threads"] = self.cpu_num_threads
+            json_obj["preview_interval"] = self.preview_interval
+            json_obj["vae_tiling"] = self.vae_tiling
+            json_obj["vae_tile_size"] = self.vae_tile_size
+            json_obj["vae_tile_overlap"] = self.vae_tile_overlap
 
             return json.dumps(json_obj, ensure_ascii=False, indent=2)
 
@@ -480,6 +599,7 @@ class Image2Image(nndeploy.dag.Node):
             self.num_inference_steps = json_obj.get("num_inference_steps", 50)
             self.guidance_scale = json_obj.get("guidance_scale", 8.0)
             self.guidance_rescale = json_obj.get("guidance_rescale", 0.0)
+            self.clip_skip = json_obj.get("clip_skip", 0)
             self.scheduler = json_obj.get("scheduler", "default")
             self.scheduler_kwargs = json_obj.get("scheduler_kwargs", {"key": "value"})
             self.strength = json_obj.get("strength", 0.8)
@@ -488,6 +608,14 @@ class Image2Image(nndeploy.dag.Node):
             self.enable_model_cpu_offload = json_obj.get("enable_model_cpu_offload", False)
             self.enable_sequential_cpu_offload = json_obj.get("enable_sequential_cpu_offload", False)
             self.enable_xformers_memory_efficient_attention = json_obj.get("enable_xformers_memory_efficient_attention", False)
+            self.execution_profile = json_obj.get("execution_profile", "default")
+            self.enable_attention_slicing = json_obj.get("enable_attention_slicing", False)
+            self.compile_unet = json_obj.get("compile_unet", False)
+            self.cpu_num_threads = json_obj.get("cpu_num_threads", 0)
+            self.preview_interval = json_obj.get("preview_interval", 0)
+            self.vae_tiling = json_obj.get("vae_tiling", False)
+            self.vae_tile_size = json_obj.get("vae_tile_size", 512)
+            self.vae_tile_overlap = json_obj.get("vae_tile_overlap", 64)
 
             return super().deserialize(json_str)
 
@@ -540,6 +668,7 @@ class Inpainting(nndeploy.dag.Node):
         self.num_inference_steps = 50
         self.guidance_scale = 8.0
         self.guidance_rescale = 0.0
+        self.clip_skip = 0  # 跳过文本编码器最后几层，0 表示不跳过
         self.scheduler = "default"
         self.scheduler_kwargs = {"key": "value"}
         self.strength = 0.8  # Inpainting strength, controls the degree of modification to the original image
@@ -548,73 +677,51 @@ class Inpainting(nndeploy.dag.Node):
         self.enable_model_cpu_offload = False  # Whether to enable model CPU offload
         self.enable_sequential_cpu_offload = False
         self.enable_xformers_memory_efficient_attention = False  # Whether to enable XFormers memory efficient attention
+        # Execution profile: "default" or "cpu_optimized" (channels-last, bf16 autocast, VAE slicing/tiling)
+        self.execution_profile = "default"
+        self.enable_attention_slicing = False
+        self.compile_unet = False  # torch.compile the UNet (cpu_optimized profile)
+        self.cpu_num_threads = 0  # 0 keeps the torch default
+        # Step preview: every preview_interval steps (0 disables) preview_callback(step, rgb) receives an
+        # approximate latent-resolution uint8 RGB array (batch x h x w x 3); the callback is not serialized
+        self.preview_interval = 0
+        self.preview_callback = None
 
         # Pipeline instance
         self.pipeline = None
+        self.phase_timer = None
 
     def init(self):
         try:
-            # Load model
-            try:
-                self.pipeline = AutoPipelineForInpainting.from_pretrained(
-                    pretrained_model_or_path=self.pretrained_model_name_or_path,
-                    local_files_only=True,
-                    torch_dtype=get_torch_dtype(self.torch_dtype),
-                    use_safetensors=self.use_safetensors,
-                )
-            except Exception as local_error:
-                self.pipeline = AutoPipelineForInpainting.from_pretrained(
-                    pretrained_model_or_path=self.pretrained_model_name_or_path,
-                    torch_dtype=get_torch_dtype(self.torch_dtype),
-                    use_safetensors=self.use_safetensors,
-                )
-            
-            print("Inpainting pipeline:", self.pipeline)
-
-            # Memory optimization
-            if self.enable_sequential_cpu_offload and hasattr(self.pipeline, "enable_sequential_cpu_offload"):
-                self.pipeline.reset_device_map()
-                try:
-                    self.pipeline.enable_sequential_cpu_offload()
-                    self.enable_model_cpu_offload = False 
-                except ImportError as e:
-                    print("Accelerate library needs to be upgraded: pip install accelerate>=0.14.0")
-                    self.enable_model_cpu_offload = True  
-                except RuntimeError as e:
-                    print("No available accelerator device found")
-                    self.enable_model_cpu_offload = True  
-                except ValueError as e:
-                    print(f"Configuration conflict: {e}")
-                    self.enable_model_cpu_offload = True         
-            
-            # Move pipeline to the appropriate device
-            if not self.enable_sequential_cpu_offload:
-                device_type = self.get_device_type()
-                if device_type.code_ == nndeploy.base.DeviceTypeCode.cuda:
-                    device_id = device_type.device_id_
-                    target_device = f"cuda:{device_id}"
-                    self.pipeline.to(target_device)
-                elif device_type.code_ == nndeploy.base.DeviceTypeCode.cpu:
-                    self.pipeline.to("cpu")
-                
-            # More memory optimization    
-            if self.enable_model_cpu_offload and hasattr(self.pipeline, "enable_model_cpu_offload"):
-                self.pipeline.enable_model_cpu_offload()
-            if self.enable_xformers_memory_efficient_attention and hasattr(self.pipeline, "enable_xformers_memory_efficient_attention"):
-                try:
-                    import xformers
-                    self.pipeline.enable_xformers_memory_efficient_attention()
-                    print("XFormers memory efficient attention enabled.")
-                except ImportError:
-                    print("Warning: xformers is not installed. Cannot enable memory efficient attention. Please refer to https://github.com/facebookresearch/xformers for installation.")
-                except Exception as e:
-                    print(f"Failed to enable XFormers memory efficient attention: {e}")
-                
-            return nndeploy.base.Status.ok()  
+            # 同一模型在进程内只加载一次，与其他扩散节点共享组件
+            self.pipeline = get_pipeline_pool().acquire(
+                "inpainting",
+                self.pretrained_model_name_or_path,
+                torch_dtype=self.torch_dtype,
+                use_safetensors=self.use_safetensors,
+                device=get_pipeline_device(self),
+                enable_model_cpu_offload=self.enable_model_cpu_offload,
+                enable_sequential_cpu_offload=self.enable_sequential_cpu_offload,
+                enable_xformers_memory_efficient_attention=self.enable_xformers_memory_efficient_attention,
+                enable_attention_slicing=self.enable_attention_slicing,
+                execution_profile=self.execution_profile,
+                compile_unet=self.compile_unet,
+            )
+            prepare_pipeline_node(self)
+            return nndeploy.base.Status.ok()
         except Exception as e:
             print(f"Failed to initialize Diffusers inpainting pipeline: {e}")
             return nndeploy.base.Status.error()
 
+    def deinit(self):
+        get_pipeline_pool().release(self.pipeline)
+        self.pipeline = None
+        return nndeploy.base.Status.ok()
+
+    def get_phase_times(self) -> dict:
+        """最近一次 run 的分阶段耗时 (文本编码 / 逐步去噪 / VAE 解码)"""
+        return self.phase_timer.get_times() if self.phase_timer is not None else {}
+
     def run(self) -> nndeploy.base.Status:
         """Run image inpainting"""
         try:
@@ -648,40 +755,36 @@ class Inpainting(nndeploy.dag.Node):
                 generator.manual_seed(self.generator_seed)
 
             # Inference
-            import inspect
-            pipeline_call_signature = inspect.signature(self.pipeline.__call__)
-            supports_guidance_rescale = 'guidance_rescale' in pipeline_call_signature.parameters
-            if supports_guidance_rescale:
-                result = self.pipeline(
-                    prompt=prompt,
-                    image=source_image,
-                    mask_image=mask_image,
-                    strength=self.strength,
-                    num_inference_steps=self.num_inference_steps,
-                    guidance_scale=self.guidance_scale,
-                    negative_prompt=negative_prompt,
-                    num_images_per_prompt=num_images_per_prompt,
-                    generator=generator,
-                    guidance_rescale=self.guidance_rescale
-                )
-            else:
-                result = self.pipeline(
-                    prompt=prompt,
-                    image=source_image,
-                    mask_image=mask_image,
-                    strength=self.strength,
-                    num_inference_steps=self.num_inference_steps,
-                    guidance_scale=self.guidance_scale,
-                    negative_prompt=negative_prompt,
-                    num_images_per_prompt=num_images_per_prompt,
-                    generator=generator,
-                )
+            timer = self.phase_timer
+            timer.reset()
+            # 共享组件的 pipeline 串行推理
+            with self.pipeline_lock:
+                # 相同提示词 (及初始图像) 复用缓存的嵌入/潜变量，跳过文本编码器 (和 VAE 编码)
+                model_key = (self.pretrained_model_name_or_path, self.torch_dtype)
+                with timer.measure("text_encode"):
+                    prompt_kwargs = encode_prompt_cached(self.pipeline, model_key, prompt, negative_prompt,
+                                                         self.guidance_scale, self.clip_skip)
+            call_kwargs = {}
+            if self.supports_guidance_rescale:
+                call_kwargs["guidance_rescale"] = self.guidance_rescale
+            images = call_pipeline(
+                self,
+                **prompt_kwargs,
+                image=source_image,
+                mask_image=mask_image,
+                strength=self.strength,
+                num_inference_steps=self.num_inference_steps,
+                guidance_scale=self.guidance_scale,
+                num_images_per_prompt=num_images_per_prompt,
+                generator=generator,
+                **call_kwargs,
+            )
 
             # Set output to output edges
-            min_len = min(len(result.images), len(self.get_all_output()))
+            min_len = min(len(images), len(self.get_all_output()))
             for i in range(min_len):
                 output_edge = self.get_output(i)
-                generated_image = result.images[i]
+                generated_image = images[i]
                 output_edge.set(generated_image)
 
             return nndeploy.base.Status.ok()
@@ -695,6 +798,7 @@ class Inpainting(nndeploy.dag.Node):
             # Add required parameters
             self.add_required_param("pretrained_model_name_or_path")
             self.add_dropdown_param("pretrained_model_name_or_path", get_inpainting_pipelines_pretrained_model_paths())
+            self.add_dropdown_param("execution_profile", EXECUTION_PROFILES)
             # Get base class serialization
             base_json = super().serialize()
             json_obj = json.loads(base_json)
@@ -706,6 +810,7 @@ class Inpainting(nndeploy.dag.Node):
             json_obj["num_inference_steps"] = self.num_inference_steps
             json_obj["guidance_scale"] = self.guidance_scale
             json_obj["guidance_rescale"] = self.guidance_rescale
+            json_obj["clip_skip"] = self.clip_skip
             json_obj["scheduler"] = self.scheduler
             json_obj["scheduler_kwargs"] = self.scheduler_kwargs
             json_obj["strength"] = self.strength
@@ -714,6 +819,11 @@ class Inpainting(nndeploy.dag.Node):
             json_obj["enable_model_cpu_offload"] = self.enable_model_cpu_offload
             json_obj["enable_sequential_cpu_offload"] = self.enable_sequential_cpu_offload
             json_obj["enable_xformers_memory_efficient_attention"] = self.enable_xformers_memory_efficient_attention
+            json_obj["execution_profile"] = self.execution_profile
+            json_obj["enable_attention_slicing"] = self.enable_attention_slicing
+            json_obj["compile_unet"] = self.compile_unet
+            json_obj["cpu_num_threads"] = self.cpu_num_threads
+            json_obj["preview_interval"] = self.preview_interval
 
             return json.dumps(json_obj, ensure_ascii=False, indent=2)
 
@@ -732,6 +842,7 @@ class Inpainting(nndeploy.dag.Node):
             self.num_inference_steps = json_obj.get("num_inference_steps", 50)
             self.guidance_scale = json_obj.get("guidance_scale", 8.0)
             self.guidance_rescale = json_obj.get("guidance_rescale", 0.0)
+            self.clip_skip = json_obj.get("clip_skip", 0)
             self.scheduler = json_obj.get("scheduler", "default")
             self.scheduler_kwargs = json_obj.get("scheduler_kwargs", {"key": "value"})
             self.strength = json_obj.get("strength", 0.8)
@@ -740,6 +851,11 @@ class Inpainting(nndeploy.dag.Node):
             self.enable_model_cpu_offload = json_obj.get("enable_model_cpu_offload", False)
             self.enable_sequential_cpu_offload = json_obj.get("enable_sequential_cpu_offload", False)
             self.enable_xformers_memory_efficient_attention = json_obj.get("enable_xformers_memory_efficient_attention", False)
+            self.execution_profile = json_obj.get("execution_profile", "default")
+            self.enable_attention_slicing = json_obj.get("enable_attention_slicing", False)
+            self.compile_unet = json_obj.get("compile_unet", False)
+            self.cpu_num_threads = json_obj.get("cpu_num_threads", 0)
+            self.preview_interval = json_obj.get("preview_interval", 0)
 
             return super().deserialize(json_str)
 
@@ -0,0 +1,316 @@
+# 进程级扩散模型 pipeline 池
+# 同一模型 (权重/精度/设备/显存优化选项相同) 只加载一次，Text2Image/Image2Image/Inpainting
+# 通过 from_pipe 共享 UNet/VAE/文本编码器等组件；服务端每个任务重建图时直接复用已加载的模型
+
+import os
+import gc
+import threading
+import collections
+
+import torch
+
+import nndeploy.base
+from diffusers import AutoPipelineForText2Image
+from diffusers import AutoPipelineForImage2Image
+from diffusers import AutoPipelineForInpainting
+
+from nndeploy.base import get_torch_dtype
+
+_AUTO_PIPELINES = {
+    "text2image": AutoPipelineForText2Image,
+    "image2image": AutoPipelineForImage2Image,
+    "inpainting": AutoPipelineForInpainting,
+}
+
+
+def _module_bytes(module: torch.nn.Module) -> int:
+    total = 0
+    for tensor in list(module.parameters()) + list(module.buffers()):
+        total += tensor.numel() * tensor.element_size()
+    return total
+
+
+def configure_pipeline(pipeline, device: str, enable_model_cpu_offload: bool,
+                       enable_sequential_cpu_offload: bool, enable_xformers_memory_efficient_attention: bool):
+    """设备放置与显存优化，返回实际生效的 (enable_model_cpu_offload, enable_sequential_cpu_offload)"""
+    if enable_sequential_cpu_offload and hasattr(pipeline, "enable_sequential_cpu_offload"):
+        try:
+            if hasattr(pipeline, "reset_device_map"):
+                pipeline.reset_device_map()
+            pipeline.enable_sequential_cpu_offload()
+            enable_model_cpu_offload = False
+        except ImportError:
+            print("Accelerate library needs to be upgraded: pip install accelerate>=0.14.0")
+            enable_sequential_cpu_offload = False
+            enable_model_cpu_offload = True
+        except RuntimeError:
+            print("No available accelerator device found")
+            enable_sequential_cpu_offload = False
+            enable_model_cpu_offload = True
+        except ValueError as e:
+            print(f"Configuration conflict: {e}")
+            enable_sequential_cpu_offload = False
+            enable_model_cpu_offload = True
+    else:
+        enable_sequential_cpu_offload = False
+
+    if not enable_sequential_cpu_offload and device is not None:
+        pipeline.to(device)
+
+    if enable_model_cpu_offload and hasattr(pipeline, "enable_model_cpu_offload"):
+        pipeline.enable_model_cpu_offload()
+    if enable_xformers_memory_efficient_attention and hasattr(pipeline, "enable_xformers_memory_efficient_attention"):
+        try:
+            import xformers
+            pipeline.enable_xformers_memory_efficient_attention()
+            print("XFormers memory efficient attention enabled.")
+        except ImportError:
+            print("Warning: xformers is not installed. Cannot enable memory efficient attention. Please refer to https://github.com/facebookresearch/xformers for installation.")
+        except Exception as e:
+            print(f"Failed to enable XFormers memory efficient attention: {e}")
+    return enable_model_cpu_offload, enable_sequential_cpu_offload
+
+
+EXECUTION_PROFILES = ["default", "cpu_optimized"]
+
+
+def cpu_supports_bf16() -> bool:
+    """CPU 是否有 bf16 加速指令 (AVX512-BF16 / AMX)，否则 bf16 autocast 反而更慢"""
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except Exception:
+        return False
+
+
+def apply_cpu_optimizations(pipeline, channels_last: bool = True, attention_slicing: bool = False,
+                            vae_slicing: bool = True, vae_tiling: bool = True, compile_unet: bool = False):
+    """
+    CPU 推理优化: UNet/VAE 使用 channels-last 内存布局 (oneDNN 卷积的首选布局)，VAE 分片/分块解码
+    降低峰值内存，可选注意力分片与 torch.compile 编译 UNet。对 from_pipe 共享的组件重复调用是安全的
+    """
+    if channels_last:
+        for name in ("unet", "vae"):
+            module = getattr(pipeline, name, None)
+            if isinstance(module, torch.nn.Module):
+                module.to(memory_format=torch.channels_last)
+    if attention_slicing and hasattr(pipeline, "enable_attention_slicing"):
+        pipeline.enable_attention_slicing()
+    if vae_slicing and hasattr(pipeline, "enable_vae_slicing"):
+        pipeline.enable_vae_slicing()
+    if vae_tiling and hasattr(pipeline, "enable_vae_tiling"):
+        pipeline.enable_vae_tiling()
+    unet = getattr(pipeline, "unet", None)
+    # 已编译的 UNet (OptimizedModule) 带有 _orig_mod，不重复编译
+    if compile_unet and isinstance(unet, torch.nn.Module) and not hasattr(unet, "_orig_mod") and hasattr(torch, "compile"):
+        pipeline.unet = torch.compile(unet)
+
+
+class _PoolEntry:
+    def __init__(self, key: tuple):
+        self.key = key
+        self.pipelines = {}  # task -> pipeline，除第一个外都由 from_pipe 得到，共享组件
+        self.modules = {}  # id(module) -> module，去重后的模型组件，用于估算内存
+        self.refcount = 0
+        self.nbytes = 0
+        # 共享组件 (以及 offload hook) 的 pipeline 不能同时推理
+        self.lock = threading.RLock()
+
+    def add(self, task: str, pipeline):
+        self.pipelines[task] = pipeline
+        for component in pipeline.components.values():
+            if isinstance(component, torch.nn.Module) and id(component) not in self.modules:
+                self.modules[id(component)] = component
+                self.nbytes += _module_bytes(component)
+
+
+class PipelinePool:
+    """
+    按 (模型, 精度, safetensors, 设备, offload/xformers 选项) 缓存 pipeline
+
+    acquire() 返回对应任务类型的 pipeline 并增加引用计数，节点 deinit 时 release()。
+    引用计数归零的模型不会立即释放，留给后续任务复用；所有已加载模型的参数总量超过
+    max_memory_bytes 时，按最近使用顺序淘汰未被引用的模型。
+    """
+    def __init__(self, max_memory_bytes: int):
+        self.max_memory_bytes = max_memory_bytes
+        self.entries = collections.OrderedDict()
+        self.owners = {}  # id(pipeline) -> entry
+        self.lock = threading.RLock()
+        self.loads = 0
+        self.shared = 0
+        self.hits = 0
+
+    @staticmethod
+    def make_key(pretrained_model_name_or_path: str, torch_dtype: str, use_safetensors: bool, device: str,
+                 enable_model_cpu_offload: bool, enable_sequential_cpu_offload: bool,
+                 enable_xformers_memory_efficient_attention: bool, enable_attention_slicing: bool = False,
+                 execution_profile: str = "default", compile_unet: bool = False) -> tuple:
+        return (pretrained_model_name_or_path, torch_dtype, bool(use_safetensors), device,
+                bool(enable_model_cpu_offload), bool(enable_sequential_cpu_offload),
+                bool(enable_xformers_memory_efficient_attention), bool(enable_attention_slicing),
+                execution_profile, bool(compile_unet))
+
+    @staticmethod
+    def _from_pretrained(task: str, pretrained_model_name_or_path: str, torch_dtype: str, use_safetensors: bool):
+        pipeline_class = _AUTO_PIPELINES[task]
+        try:
+            # Try to load locally first
+            return pipeline_class.from_pretrained(
+                pretrained_model_or_path=pretrained_model_name_or_path,
+                local_files_only=True,
+                torch_dtype=get_torch_dtype(torch_dtype),
+                use_safetensors=use_safetensors,
+            )
+        except Exception as local_error:
+            return pipeline_class.from_pretrained(
+                pretrained_model_or_path=pretrained_model_name_or_path,
+                torch_dtype=get_torch_dtype(torch_dtype),
+                use_safetensors=use_safetensors,
+            )
+
+    def acquire(self, task: str, pretrained_model_name_or_path: str, torch_dtype: str = "float16",
+                use_safetensors: bool = True, device: str = None, enable_model_cpu_offload: bool = False,
+                enable_sequential_cpu_offload: bool = False, enable_xformers_memory_efficient_attention: bool = False,
+                enable_attention_slicing: bool = False, execution_profile: str = "default", compile_unet: bool = False):
+        """返回 task ("text2image" / "image2image" / "inpainting") 对应的 pipeline，引用计数加一"""
+        key = self.make_key(pretrained_model_name_or_path, torch_dtype, use_safetensors, device,
+                            enable_model_cpu_offload, enable_sequential_cpu_offload,
+                            enable_xformers_memory_efficient_attention, enable_attention_slicing,
+                            execution_profile, compile_unet)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = _PoolEntry(key)
+                self.entries[key] = entry
+            self.entries.move_to_end(key)
+            pipeline = entry.pipelines.get(task)
+            if pipeline is not None:
+                self.hits += 1
+            else:
+                try:
+                    pipeline = self._create(entry, task)
+                except Exception:
+                    if len(entry.pipelines) == 0:
+                        self.entries.pop(key, None)
+                    raise
+                entry.add(task, pipeline)
+                self.owners[id(pipeline)] = entry
+            entry.refcount += 1
+            self._evict()
+            return pipeline
+
+    def _create(self, entry: _PoolEntry, task: str):
+        (pretrained_model_name_or_path, torch_dtype, use_safetensors, device, enable_model_cpu_offload,
+         enable_sequential_cpu_offload, enable_xformers_memory_efficient_attention, enable_attention_slicing,
+         execution_profile, compile_unet) = entry.key
+        pipeline = None
+        if len(entry.pipelines) > 0:
+            # 已加载同一模型的其他任务类型，直接共享组件，不再读取权重
+            base = next(iter(entry.pipelines.values()))
+            try:
+                pipeline = _AUTO_PIPELINES[task].from_pipe(base)
+                self.shared += 1
+                print(f"{task} pipeline shares components with loaded {pretrained_model_name_or_path}")
+            except Exception as e:
+                print(f"from_pipe failed for {task}, loading separately: {e}")
+        if pipeline is None:
+            pipeline = self._from_pretrained(task, pretrained_model_name_or_path, torch_dtype, use_safetensors)
+            self.loads += 1
+            print(f"{task} pipeline:", pipeline)
+        configure_pipeline(pipeline, device, enable_model_cpu_offload, enable_sequential_cpu_offload,
+                           enable_xformers_memory_efficient_attention)
+        if execution_profile == "cpu_optimized":
+            apply_cpu_optimizations(pipeline, attention_slicing=enable_attention_slicing, compile_unet=compile_unet)
+        elif enable_attention_slicing and hasattr(pipeline, "enable_attention_slicing"):
+            pipeline.enable_attention_slicing()
+        return pipeline
+
+    def release(self, pipeline):
+        """引用计数减一；模型保留在池中，直到内存预算不足时被淘汰"""
+        if pipeline is None:
+            return
+        with self.lock:
+            entry = self.owners.get(id(pipeline))
+            if entry is None:
+                return
+            entry.refcount = max(0, entry.refcount - 1)
+            self._evict()
+
+    def get_lock(self, pipeline) -> threading.RLock:
+        """共享组件的 pipeline 推理时需持有的锁"""
+        with self.lock:
+            entry = self.owners.get(id(pipeline))
+            return entry.lock if entry is not None else threading.RLock()
+
+    def _evict(self):
+        total = sum(entry.nbytes for entry in self.entries.values())
+        if total <= self.max_memory_bytes:
+            return
+        evicted = False
+        for key in list(self.entries.keys()):
+            if total <= self.max_memory_bytes:
+                break
+            entry = self.entries[key]
+            if entry.refcount > 0:
+                continue
+            total -= entry.nbytes
+            self._drop(key)
+            evicted = True
+        if evicted:
+            gc.collect()
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+
+    def _drop(self, key: tuple):
+        entry = self.entries.pop(key)
+        for pipeline in entry.pipelines.values():
+            self.owners.pop(id(pipeline), None)
+        entry.pipelines.clear()
+        entry.modules.clear()
+
+    def clear(self):
+        """释放所有未被引用的模型"""
+        with self.lock:
+            for key in [key for key, entry in self.entries.items() if entry.refcount == 0]:
+                self._drop(key)
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {
+                "models": len(self.entries),
+                "pipelines": sum(len(entry.pipelines) for entry in self.entries.values()),
+                "referenced": sum(1 for entry in self.entries.values() if entry.refcount > 0),
+                "memory_bytes": sum(entry.nbytes for entry in self.entries.values()),
+                "max_memory_bytes": self.max_memory_bytes,
+                "loads": self.loads,
+                "shared": self.shared,
+                "hits": self.hits,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pipeline_pool() -> PipelinePool:
+    """
+    进程内唯一的 pipeline 池，内存预算由环境变量 NNDEPLOY_DIFFUSION_POOL_MEMORY_GB 指定 (默认 32GB)
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            budget_gb = float(os.environ.get("NNDEPLOY_DIFFUSION_POOL_MEMORY_GB", "32"))
+            _pool = PipelinePool(int(budget_gb * (1 << 30)))
+        return _pool
+
+
+def get_pipeline_device(node) -> str:
+    device_type = node.get_device_type()
+    if device_type.code_ == nndeploy.base.DeviceTypeCode.cuda:
+        return f"cuda:{device_type.device_id_}"
+    elif device_type.code_ == nndeploy.base.DeviceTypeCode.cpu:
+        return "cpu"
+    return None
@@ -0,0 +1,180 @@
+# 分块 VAE 编解码: 大分辨率图像按带重叠的块逐块通过 VAE，重叠区线性加权融合，
+# 峰值内存只与块大小有关；解码时每完成一行块即可输出已确定的水平条带，下游可以边解码边写出
+
+import contextlib
+
+import torch
+
+
+def vae_scale_factor(vae) -> int:
+    return 2 ** (len(vae.config.block_out_channels) - 1)
+
+
+@contextlib.contextmanager
+def vae_upcast(vae):
+    """与 SDXL pipeline 一致，fp16 下会溢出的 VAE (force_upcast) 临时升到 fp32，产出 VAE 实际运行的精度"""
+    dtype = vae.dtype
+    upcast = dtype == torch.float16 and getattr(vae.config, "force_upcast", False)
+    if upcast:
+        vae.to(dtype=torch.float32)
+    try:
+        yield vae.dtype
+    finally:
+        if upcast:
+            vae.to(dtype)
+
+
+def scale_latents(vae, latents: torch.Tensor) -> torch.Tensor:
+    """VAE 原始潜变量 -> 扩散模型使用的潜变量 (与各 pipeline 编码初始图像时的归一化一致)"""
+    latents_mean = getattr(vae.config, "latents_mean", None)
+    latents_std = getattr(vae.config, "latents_std", None)
+    shift_factor = getattr(vae.config, "shift_factor", None)
+    if latents_mean is not None and latents_std is not None:
+        latents_mean = torch.tensor(latents_mean).view(1, -1, 1, 1).to(latents.device, latents.dtype)
+        latents_std = torch.tensor(latents_std).view(1, -1, 1, 1).to(latents.device, latents.dtype)
+        return (latents - latents_mean) * vae.config.scaling_factor / latents_std
+    if shift_factor is not None:
+        return (latents - shift_factor) * vae.config.scaling_factor
+    return latents * vae.config.scaling_factor
+
+
+def unscale_latents(vae, latents: torch.Tensor) -> torch.Tensor:
+    """scale_latents 的逆变换，解码前调用"""
+    latents_mean = getattr(vae.config, "latents_mean", None)
+    latents_std = getattr(vae.config, "latents_std", None)
+    shift_factor = getattr(vae.config, "shift_factor", None)
+    if latents_mean is not None and latents_std is not None:
+        latents_mean = torch.tensor(latents_mean).view(1, -1, 1, 1).to(latents.device, latents.dtype)
+        latents_std = torch.tensor(latents_std).view(1, -1, 1, 1).to(latents.device, latents.dtype)
+        return latents * latents_std / vae.config.scaling_factor + latents_mean
+    if shift_factor is not None:
+        return latents / vae.config.scaling_factor + shift_factor
+    return latents / vae.config.scaling_factor
+
+
+def _tile_starts(length: int, tile: int, overlap: int) -> list:
+    if length <= tile:
+        return [0]
+    stride = max(1, tile - overlap)
+    starts = list(range(0, length - tile, stride))
+    starts.append(length - tile)
+    return starts
+
+
+def _ramp(length: int, overlap_before: int, overlap_after: int, device) -> torch.Tensor:
+    """块内一维融合权重: 与前/后相邻块重叠的部分线性渐变，其余为 1"""
+    weight = torch.ones(length, dtype=torch.float32, device=device)
+    if overlap_before > 0:
+        weight[:overlap_before] = torch.arange(1, overlap_before + 1, dtype=torch.float32, device=device) / (overlap_before + 1)
+    if overlap_after > 0:
+        weight[length - overlap_after:] = torch.minimum(
+            weight[length - overlap_after:],
+            torch.arange(overlap_after, 0, -1, dtype=torch.float32, device=device) / (overlap_after + 1))
+    return weight
+
+
+def _tile_weight(starts_y: list, starts_x: list, iy: int, ix: int, tile_h: int, tile_w: int, scale: int,
+                 device) -> torch.Tensor:
+    """第 (iy, ix) 块在输出分辨率下的二维融合权重，scale 为输入块到输出块的放大倍数"""
+    def overlaps(starts, i, tile):
+        before = starts[i - 1] + tile - starts[i] if i > 0 else 0
+        after = starts[i] + tile - starts[i + 1] if i + 1 < len(starts) else 0
+        return max(0, before) * scale, max(0, after) * scale
+    before_y, after_y = overlaps(starts_y, iy, tile_h)
+    before_x, after_x = overlaps(starts_x, ix, tile_w)
+    ramp_y = _ramp(tile_h * scale, before_y, after_y, device)
+    ramp_x = _ramp(tile_w * scale, before_x, after_x, device)
+    return ramp_y[:, None] * ramp_x[None, :]
+
+
+def _tiled_apply(fn, inputs: torch.Tensor, tile: int, overlap: int, scale_num: int, scale_den: int,
+                 out_channels: int, on_band=None) -> torch.Tensor:
+    """
+    按块对 inputs (B x C x H x W) 调用 fn，输出分辨率为输入的 scale_num / scale_den 倍，重叠区线性融合。
+    on_band(y0, y1, band) 在每行块完成后收到输出中已确定的水平条带
+    """
+    batch, _, height, width = inputs.shape
+    tile_h, tile_w = min(tile, height), min(tile, width)
+    overlap = min(overlap, tile_h - 1, tile_w - 1)
+    starts_y = _tile_starts(height, tile_h, overlap)
+    starts_x = _tile_starts(width, tile_w, overlap)
+    out_h, out_w = height * scale_num // scale_den, width * scale_num // scale_den
+    output = torch.zeros((batch, out_channels, out_h, out_w), dtype=torch.float32, device=inputs.device)
+    weight_sum = torch.zeros((1, 1, out_h, out_w), dtype=torch.float32, device=inputs.device)
+
+    emitted = 0
+    for iy, y in enumerate(starts_y):
+        for ix, x in enumerate(starts_x):
+            result = fn(inputs[:, :, y:y + tile_h, x:x + tile_w]).float()
+            oy, ox = y * scale_num // scale_den, x * scale_num // scale_den
+            th, tw = result.shape[-2:]
+            if scale_den == 1:
+                weight = _tile_weight(starts_y, starts_x, iy, ix, tile_h, tile_w, scale_num, inputs.device)
+            else:
+                # 编码时块缩小，按输入分辨率的权重下采样
+                weight = _tile_weight(starts_y, starts_x, iy, ix, tile_h, tile_w, 1, inputs.device)
+                weight = torch.nn.functional.interpolate(weight[None, None], size=(th, tw), mode="area")[0, 0]
+            output[:, :, oy:oy + th, ox:ox + tw] += result * weight
+            weight_sum[:, :, oy:oy + th, ox:ox + tw] += weight
+        # 下一行块开始之前的区域不会再被写入
+        done = starts_y[iy + 1] * scale_num // scale_den if iy + 1 < len(starts_y) else out_h
+        if done > emitted:
+            output[:, :, emitted:done] /= weight_sum[:, :, emitted:done]
+            if on_band is not None:
+                on_band(emitted, done, output[:, :, emitted:done])
+            emitted = done
+    return output
+
+
+def tiled_decode(vae, latents: torch.Tensor, tile_size: int = 512, overlap: int = 64, on_band=None) -> torch.Tensor:
+    """
+    latents: VAE 原始潜变量 (已 unscale_latents)；tile_size/overlap 为输出像素尺寸。
+    返回 [-1, 1] 的 float32 图像 B x 3 x H x W
+    """
+    scale = vae_scale_factor(vae)
+    tile = max(1, tile_size // scale)
+    decode = lambda z: vae.decode(z.to(vae.dtype)).sample
+    with torch.no_grad():
+        return _tiled_apply(decode, latents, tile, overlap // scale, scale, 1, vae.config.out_channels, on_band)
+
+
+def tiled_encode(vae, pixels: torch.Tensor, tile_size: int = 512, overlap: int = 64) -> torch.Tensor:
+    """pixels: [-1, 1] 的 B x 3 x H x W；返回 VAE 后验均值 (未 scale_latents)"""
+    scale = vae_scale_factor(vae)
+    # 块的起点与尺寸对齐到 scale，保证每块的潜变量落在整数位置
+    tile = max(scale, tile_size // scale * scale)
+    overlap = overlap // scale * scale
+    encode = lambda x: vae.encode(x.to(vae.dtype)).latent_dist.mode()
+    with torch.no_grad():
+        return _tiled_apply(encode, pixels, tile, overlap, 1, scale, vae.config.latent_channels)
+
+
+def band_to_numpy(band: torch.Tensor):
+    """[-1, 1] 的 B x 3 x h x W 条带 -> B x h x W x 3 的 uint8 (RGB)"""
+    band = ((band / 2 + 0.5).clamp(0, 1) * 255).round().to(torch.uint8)
+    return band.permute(0, 2, 3, 1).cpu().numpy()
+
+
+def decode_latents_to_pil(pipeline, latents: torch.Tensor, tile_size: int, overlap: int, on_band=None) -> list:
+    """
+    output_type="latent" 得到的潜变量分块解码为 PIL 图像，保留 pipeline 原有的安全检查与水印。
+    on_band(y0, y1, uint8 数组) 只在 pipeline 没有安全检查器时调用，避免未检查的内容提前流出
+    """
+    vae = pipeline.vae
+    safety_checker = getattr(pipeline, "safety_checker", None)
+    band_callback = None
+    if on_band is not None and safety_checker is None:
+        band_callback = lambda y0, y1, band: on_band(y0, y1, band_to_numpy(band))
+    with vae_upcast(vae) as dtype:
+        image = tiled_decode(vae, unscale_latents(vae, latents.to(dtype)), tile_size, overlap, band_callback)
+
+    has_nsfw_concept = None
+    if safety_checker is not None and hasattr(pipeline, "run_safety_checker"):
+        image, has_nsfw_concept = pipeline.run_safety_checker(image, latents.device, latents.dtype)
+    watermark = getattr(pipeline, "watermark", None)
+    if watermark is not None:
+        image = watermark.apply_watermark(image)
+    do_denormalize = None
+    if has_nsfw_concept is not None:
+        do_denormalize = [not has_nsfw for has_nsfw in has_nsfw_concept]
+    return pipeline.image_processor.postprocess(image, output_type="pil", do_denormalize=do_denormalize)
@@ -9,3 +9,8 @@ try:
     from nndeploy.face.insightface import VideoInsightFaceSwapperWithMap
 except:
     pass
+
+try:
+    from nndeploy.face.streaming_swapper import StreamingVideoFaceSwapper
+except:
+    pass
@@ -0,0 +1,149 @@
+# 人脸分析结果的持久化缓存: 图像内容哈希 -> 检测到的人脸 (bbox/kps/embedding 等)
+# 同一张源人脸图片在多次工作流/多个任务中只需检测一次
+
+import os
+import io
+import hashlib
+import threading
+import collections
+
+import numpy as np
+import insightface
+
+
+class FaceAnalysisCache:
+    """
+    以图像内容哈希为键的人脸分析缓存，每个条目是目录下的一个 .npz 文件
+
+    namespace 区分不同的模型/检测参数 (参与哈希)。条目总数超过 max_entries 时按最近访问时间
+    淘汰，访问时间记录在文件 mtime 上，进程重启后依然有效。最近使用的 memory_entries 个
+    条目同时保存在内存中，命中时不读文件。每次 get() 返回新的 Face 对象，调用方可以随意修改。
+    """
+    def __init__(self, directory: str, max_entries: int = 1024, namespace: str = "", memory_entries: int = 32):
+        self.directory = directory
+        self.max_entries = max(1, max_entries)
+        self.namespace = namespace
+        self.memory_entries = memory_entries
+        self.memory = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+        # 磁盘条目按访问时间排序的索引
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".npz"):
+                path = os.path.join(self.directory, name)
+                entries.append((os.path.getmtime(path), name[:-4]))
+        self.index = collections.OrderedDict((key, None) for _, key in sorted(entries))
+
+    def key(self, image: np.ndarray) -> str:
+        image = np.ascontiguousarray(image)
+        h = hashlib.sha1()
+        h.update(self.namespace.encode("utf-8"))
+        h.update(str((image.shape, image.dtype.str)).encode("utf-8"))
+        h.update(memoryview(image).cast("B"))
+        return h.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".npz")
+
+    @staticmethod
+    def _pack(faces: list) -> dict:
+        arrays = {"num_faces": np.array(len(faces), dtype=np.int64)}
+        for i, face in enumerate(faces):
+            for name, value in face.items():
+                if isinstance(value, (np.ndarray, np.generic, int, float)):
+                    arrays[f"{i}.{name}"] = np.asarray(value)
+        return arrays
+
+    @staticmethod
+    def _unpack(arrays: dict) -> list:
+        faces = [{} for _ in range(int(arrays["num_faces"]))]
+        for name, value in arrays.items():
+            if name == "num_faces":
+                continue
+            i, field = name.split(".", 1)
+            faces[int(i)][field] = value[()] if value.ndim == 0 else value.copy()
+        return [insightface.app.common.Face(face) for face in faces]
+
+    def get(self, image: np.ndarray, key: str = None):
+        """返回缓存的人脸列表，未命中时返回 None"""
+        key = key if key is not None else self.key(image)
+        with self.lock:
+            arrays = self.memory.get(key)
+            if arrays is not None:
+                self.memory.move_to_end(key)
+                self.index.move_to_end(key)
+                self.hits += 1
+                return self._unpack(arrays)
+            if key not in self.index:
+                self.misses += 1
+                return None
+            path = self._path(key)
+            try:
+                with np.load(path) as data:
+                    arrays = {name: data[name] for name in data.files}
+                os.utime(path)
+            except (OSError, ValueError, KeyError):
+                self.index.pop(key, None)
+                self.misses += 1
+                return None
+            self.index.move_to_end(key)
+            self._remember(key, arrays)
+            self.hits += 1
+            return self._unpack(arrays)
+
+    def put(self, image: np.ndarray, faces: list, key: str = None):
+        key = key if key is not None else self.key(image)
+        arrays = self._pack(faces)
+        buffer = io.BytesIO()
+        # 无损压缩: 嵌入向量保持 float32，与重新检测的结果完全一致
+        np.savez_compressed(buffer, **arrays)
+        # 先写临时文件再改名，多进程共享目录时不会读到写了一半的条目
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(buffer.getvalue())
+        os.replace(tmp_path, path)
+        with self.lock:
+            self.index[key] = None
+            self.index.move_to_end(key)
+            self._remember(key, arrays)
+            while len(self.index) > self.max_entries:
+                old_key, _ = self.index.popitem(last=False)
+                self.memory.pop(old_key, None)
+                try:
+                    os.remove(self._path(old_key))
+                except OSError:
+                    pass
+
+    def _remember(self, key: str, arrays: dict):
+        if self.memory_entries <= 0:
+            return
+        self.memory[key] = arrays
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {"entries": len(self.index), "hits": self.hits, "misses": self.misses}
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_face_analysis_cache(directory: str, max_entries: int = 1024, namespace: str = "") -> FaceAnalysisCache:
+    """
+    同一进程内按 (目录, namespace) 共享缓存对象，服务端每个任务重建图时不会重复扫描目录
+    """
+    key = (os.path.abspath(directory), namespace)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = FaceAnalysisCache(directory, max_entries, namespace)
+            _caches[key] = cache
+        cache.max_entries = max(1, max_entries)
+        return cache
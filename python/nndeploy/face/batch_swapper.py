@@ -0,0 +1,130 @@
+# inswapper 批量换脸: 多帧多张人脸对齐后一次推理，源人脸 latent 按身份缓存，贴回只在人脸区域内进行
+
+import cv2
+import numpy as np
+from insightface.utils import face_align
+
+
+class BatchFaceSwapper:
+    """
+    包装 insightface 的 INSwapper，与 INSwapper.get(paste_back=True) 结果一致
+
+    swap() 接收一批 (frame, target_face, source_face)，对齐所有目标人脸后按 batch_size
+    调用一次 ONNX 会话 (模型 batch 维固定为 1 时逐个推理，但仍复用 latent 与 ROI 贴回)，
+    结果原地贴回各自的 frame。同一帧可出现多次: 与逐个调用 INSwapper.get 一样，
+    贴回区域与前面人脸重叠的人脸在前面的人脸贴回之后才对齐，因此能看到前一次换脸的结果。
+    """
+    def __init__(self, swapper, batch_size: int = 8):
+        self.swapper = swapper
+        self.batch_size = max(1, batch_size)
+        self.size = swapper.input_size[0]
+        batch_dim = swapper.input_shape[0]
+        self.dynamic_batch = not (isinstance(batch_dim, int) and batch_dim == 1)
+        self.latents = {}
+        self.white = np.full((self.size, self.size), 255, dtype=np.float32)
+
+    def source_latent(self, source_face) -> np.ndarray:
+        """源人脸 latent (normed_embedding 经 emap 投影并归一化)，每个源人脸只计算一次"""
+        entry = self.latents.get(id(source_face))
+        if entry is None or entry[0] is not source_face:
+            latent = np.dot(source_face.normed_embedding.reshape((1, -1)), self.swapper.emap)
+            latent /= np.linalg.norm(latent)
+            entry = (source_face, latent.astype(np.float32))
+            self.latents[id(source_face)] = entry
+        return entry[1]
+
+    def _infer(self, blobs: list, latents: list) -> np.ndarray:
+        session = self.swapper.session
+        names = self.swapper.input_names
+        if not self.dynamic_batch:
+            return np.concatenate([
+                session.run(self.swapper.output_names, {names[0]: blob, names[1]: latent})[0]
+                for blob, latent in zip(blobs, latents)
+            ])
+        preds = []
+        for start in range(0, len(blobs), self.batch_size):
+            feed = {names[0]: np.concatenate(blobs[start:start + self.batch_size]),
+                    names[1]: np.concatenate(latents[start:start + self.batch_size])}
+            preds.append(session.run(self.swapper.output_names, feed)[0])
+        return np.concatenate(preds)
+
+    def swap(self, items: list):
+        """items: [(frame, target_face, source_face), ...]，frame 被原地修改"""
+        if len(items) == 0:
+            return
+        matrices = [face_align.estimate_norm(target_face.kps, self.size) for _, target_face, _ in items]
+        for round_items in self._rounds(items, matrices):
+            self._swap_round([items[i] for i in round_items], [matrices[i] for i in round_items])
+
+    def _rounds(self, items: list, matrices: list) -> list:
+        """
+        把 items 分成若干轮，每轮内同一帧的人脸贴回区域互不重叠，可以先全部对齐再批量推理；
+        与同帧前面人脸重叠的人脸放到其后一轮，保持逐个换脸的先后依赖
+        """
+        rounds = []
+        placed = {}  # id(frame) -> [(region, round)]
+        for i, ((frame, _, _), M) in enumerate(zip(items, matrices)):
+            region = self._paste_region(M, frame.shape[0], frame.shape[1])[:4]
+            r = 0
+            for other, other_round in placed.get(id(frame), []):
+                if _overlaps(region, other):
+                    r = max(r, other_round + 1)
+            placed.setdefault(id(frame), []).append((region, r))
+            while len(rounds) <= r:
+                rounds.append([])
+            rounds[r].append(i)
+        return rounds
+
+    def _swap_round(self, items: list, matrices: list):
+        mean = self.swapper.input_mean
+        blobs, latents = [], []
+        for (frame, _, source_face), M in zip(items, matrices):
+            aimg = cv2.warpAffine(frame, M, (self.size, self.size), borderValue=0.0)
+            blobs.append(cv2.dnn.blobFromImage(aimg, 1.0 / self.swapper.input_std, (self.size, self.size),
+                                               (mean, mean, mean), swapRB=True))
+            latents.append(self.source_latent(source_face))
+        preds = self._infer(blobs, latents)
+        fakes = np.clip(255 * preds.transpose((0, 2, 3, 1)), 0, 255).astype(np.uint8)[..., ::-1]
+        for (frame, _, _), fake, M in zip(items, fakes, matrices):
+            self.paste_back(frame, fake, M)
+
+    def _paste_region(self, M: np.ndarray, h: int, w: int):
+        """贴回计算的区域 (x0, y0, x1, y1) 以及腐蚀/模糊核大小"""
+        IM = cv2.invertAffineTransform(M)
+        corners = np.array([[0, 0], [self.size, 0], [0, self.size], [self.size, self.size]], dtype=np.float32)
+        corners = corners @ IM[:, :2].T + IM[:, 2]
+        (x_lo, y_lo), (x_hi, y_hi) = corners.min(axis=0), corners.max(axis=0)
+        # 与原实现一致，羽化尺寸按画面内可见的人脸区域计算
+        mask_w = min(x_hi, w - 1) - max(x_lo, 0)
+        mask_h = min(y_hi, h - 1) - max(y_lo, 0)
+        mask_size = int(np.sqrt(max(0.0, mask_w) * max(0.0, mask_h)))
+        k_erode = max(mask_size // 10, 10)
+        k_blur = max(mask_size // 20, 5)
+        pad = k_erode + 2 * k_blur + 2
+        x0, y0 = max(0, int(np.floor(x_lo)) - pad), max(0, int(np.floor(y_lo)) - pad)
+        x1, y1 = min(w, int(np.ceil(x_hi)) + pad), min(h, int(np.ceil(y_hi)) + pad)
+        return x0, y0, x1, y1, k_erode, k_blur, IM
+
+    def paste_back(self, frame: np.ndarray, bgr_fake: np.ndarray, M: np.ndarray):
+        """
+        与 INSwapper.get 相同的羽化贴回，只在对齐框的包围区域 (加上腐蚀/模糊半径) 内计算
+        """
+        x0, y0, x1, y1, k_erode, k_blur, IM = self._paste_region(M, frame.shape[0], frame.shape[1])
+        if x1 <= x0 or y1 <= y0:
+            return
+
+        IM[0, 2] -= x0
+        IM[1, 2] -= y0
+        roi_size = (x1 - x0, y1 - y0)
+        fake = cv2.warpAffine(bgr_fake, IM, roi_size, borderValue=0.0)
+        mask = cv2.warpAffine(self.white, IM, roi_size, borderValue=0.0)
+        mask[mask > 20] = 255
+        mask = cv2.erode(mask, np.ones((k_erode, k_erode), np.uint8), iterations=1)
+        mask = cv2.GaussianBlur(mask, (2 * k_blur + 1, 2 * k_blur + 1), 0)
+        mask = (mask / 255)[..., None]
+        roi = frame[y0:y1, x0:x1]
+        roi[...] = (mask * fake + (1 - mask) * roi.astype(np.float32)).astype(np.uint8)
+
+
+def _overlaps(a, b) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
@@ -3,6 +3,7 @@
 
 import os
 import shutil
+import threading
 from typing import Any
 import cv2
 import json
@@ -56,7 +57,122 @@ def find_cluster_centroids(embeddings, max_k=10) -> Any:
     optimal_centroids = cluster_centroids[diffs.index(max(diffs)) + 1]['centroids']
 
     return optimal_centroids
-  
+
+
+def find_cluster_centroids_online(embeddings, max_k=10, threshold=0.4, max_samples=4096,
+                                  refine_iters=3, min_cluster_ratio=0.01) -> np.ndarray:
+    """
+    单遍在线聚类寻找人脸身份中心点，替代逐个 k 拟合 KMeans 的肘部法
+
+    参数:
+        embeddings: 人脸嵌入向量列表 (N x 512)，内部会做 L2 归一化
+        max_k: 最大身份数
+        threshold: 余弦相似度阈值，样本与所有中心的相似度都低于该值时新建一个身份，
+                   中心之间相似度不低于该值时合并
+        max_samples: 样本数超过该值时等间隔抽样，0 表示不抽样
+        refine_iters: 单遍聚类后的球面 k-means 迭代次数 (向量化，每次一次矩阵乘)
+        min_cluster_ratio: 样本占比低于该值的小簇视为误检/噪声并丢弃
+
+    返回:
+        centroids: K x D 的归一化中心点数组，K 由阈值在单遍中确定，不超过 max_k
+
+    算法原理:
+        1. 按顺序扫描样本，与当前中心的最大相似度不低于 threshold 时并入该簇并更新中心，
+           否则新建簇 (leader clustering)，簇数在这一遍中自动确定
+        2. 用全部样本做几次球面 k-means 精化，去掉空簇和过小的簇
+        3. 合并相似度过高的中心，直到簇数不超过 max_k
+    """
+    X = np.asarray(embeddings, dtype=np.float32)
+    if X.ndim != 2 or X.shape[0] == 0:
+        return np.zeros((0, X.shape[-1] if X.ndim == 2 else 512), dtype=np.float32)
+    X = X / np.maximum(np.linalg.norm(X, axis=1, keepdims=True), 1e-12)
+    if max_samples > 0 and X.shape[0] > max_samples:
+        X = X[::int(np.ceil(X.shape[0] / max_samples))]
+
+    # 1. 单遍 leader clustering，簇数上限放宽到 4 * max_k，多出的在合并阶段处理
+    max_clusters = max(1, 4 * max_k)
+    sums = np.zeros((max_clusters, X.shape[1]), dtype=np.float32)
+    centroids = np.zeros_like(sums)
+    counts = np.zeros(max_clusters, dtype=np.int64)
+    k = 0
+    for x in X:
+        if k > 0:
+            similarities = centroids[:k] @ x
+            j = int(np.argmax(similarities))
+            if similarities[j] < threshold and k < max_clusters:
+                j = k
+                k += 1
+        else:
+            j = 0
+            k = 1
+        sums[j] += x
+        counts[j] += 1
+        centroids[j] = sums[j] / max(np.linalg.norm(sums[j]), 1e-12)
+    centroids = centroids[:k]
+
+    def refine(centroids):
+        labels = np.argmax(X @ centroids.T, axis=1)
+        counts = np.bincount(labels, minlength=len(centroids))
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, X)
+        keep = counts > 0
+        sums, counts = sums[keep], counts[keep]
+        return sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12), counts
+
+    # 2. 球面 k-means 精化并丢弃过小的簇
+    for _ in range(refine_iters):
+        centroids, counts = refine(centroids)
+    min_count = max(1, int(min_cluster_ratio * X.shape[0]))
+    if np.any(counts >= min_count):
+        centroids, counts = centroids[counts >= min_count], counts[counts >= min_count]
+
+    # 3. 按样本数加权合并最相似的中心
+    while len(centroids) > 1:
+        similarities = centroids @ centroids.T
+        np.fill_diagonal(similarities, -np.inf)
+        i, j = np.unravel_index(np.argmax(similarities), similarities.shape)
+        if len(centroids) <= max_k and similarities[i, j] < threshold:
+            break
+        merged = centroids[i] * counts[i] + centroids[j] * counts[j]
+        centroids[i] = merged / max(np.linalg.norm(merged), 1e-12)
+        counts[i] += counts[j]
+        centroids = np.delete(centroids, j, axis=0)
+        counts = np.delete(counts, j)
+
+    centroids, _ = refine(centroids)
+    return centroids
+
+
+def assign_to_centroids(centroids, embeddings) -> tuple:
+    """
+    批量把人脸嵌入向量分配到最相似的聚类中心点
+
+    所有嵌入向量堆叠成 N x D 矩阵，与 K x D 的中心点做一次矩阵乘法后按行 argmax，
+    替代逐个人脸调用 find_closest_centroid
+
+    返回:
+        tuple: (labels, similarities)
+            - labels: 长度为 N 的中心点索引数组
+            - similarities: 每个向量与所分配中心点的相似度 (点积)
+    """
+    centroids = np.asarray(centroids, dtype=np.float32)
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if embeddings.ndim != 2 or embeddings.shape[0] == 0 or centroids.shape[0] == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    similarities = embeddings @ centroids.T
+    labels = np.argmax(similarities, axis=1)
+    return labels, similarities[np.arange(labels.shape[0]), labels]
+
+
+def group_by_label(labels, num_labels: int) -> list:
+    """
+    按标签分组，返回 num_labels 个索引数组，第 i 个为标签等于 i 的元素下标 (保持原有顺序)
+    """
+    labels = np.asarray(labels, dtype=np.int64)
+    order = np.argsort(labels, kind="stable")
+    bounds = np.searchsorted(labels[order], np.arange(num_labels + 1))
+    return [order[bounds[i]:bounds[i + 1]] for i in range(num_labels)]
+
 
 def find_closest_centroid(centroids: list, normed_face_embedding) -> tuple:
     """
@@ -111,8 +227,15 @@ def find_closest_centroid(centroids: list, normed_face_embedding) -> tuple:
 def create_lower_mouth_mask(
     face, frame: np.ndarray, mask_down_size: float, mask_size
 ) -> tuple[np.ndarray, np.ndarray, tuple, np.ndarray]:
-    mask = np.zeros(frame.shape[:2], dtype=np.uint8)
+    """
+    返回 (mask, mouth_cutout, mouth_box, lower_lip_polygon)
+
+    mask 只覆盖 mouth_box 区域 (与 mouth_cutout 同尺寸)，不再分配整帧大小的掩码
+    """
+    mask = None
     mouth_cutout = None
+    mouth_box = (0, 0, 0, 0)
+    lower_lip_polygon = None
     landmarks = face.landmark_2d_106
     if landmarks is not None:
         #                  0  1  2  3  4  5  6  7  8  9  10 11 12 13 14 15 16 17 18 19 20
@@ -165,10 +288,9 @@ def create_lower_mouth_mask(
         toplip_extension = (
             mask_size * 0.5
         )  # Adjust this factor to control the extension
-        for idx in toplip_indices:
-            direction = expanded_landmarks[idx] - center
-            direction = direction / np.linalg.norm(direction)
-            expanded_landmarks[idx] += direction * toplip_extension
+        direction = expanded_landmarks[toplip_indices] - center
+        direction /= np.linalg.norm(direction, axis=1, keepdims=True)
+        expanded_landmarks[toplip_indices] += direction * toplip_extension
 
         # Extend the bottom part (chin area)
         chin_indices = [
@@ -180,10 +302,9 @@ def create_lower_mouth_mask(
             16,
         ]  # Indices for landmarks 21, 22, 23, 24, 0, 8
         chin_extension = 2 * 0.2  # Adjust this factor to control the extension
-        for idx in chin_indices:
-            expanded_landmarks[idx][1] += (
-                expanded_landmarks[idx][1] - center[1]
-            ) * chin_extension
+        expanded_landmarks[chin_indices, 1] += (
+            expanded_landmarks[chin_indices, 1] - center[1]
+        ) * chin_extension
 
         # Convert back to integer coordinates
         expanded_landmarks = expanded_landmarks.astype(np.int32)
@@ -206,23 +327,21 @@ def create_lower_mouth_mask(
             if (max_y - min_y) <= 1:
                 max_y = min_y + 1
 
-        # Create the mask
-        mask_roi = np.zeros((max_y - min_y, max_x - min_x), dtype=np.uint8)
-        cv2.fillPoly(mask_roi, [expanded_landmarks - [min_x, min_y]], 255)
+        # Create the mask (ROI only)
+        mask = np.zeros((max_y - min_y, max_x - min_x), dtype=np.uint8)
+        cv2.fillPoly(mask, [expanded_landmarks - [min_x, min_y]], 255)
 
         # Apply Gaussian blur to soften the mask edges
-        mask_roi = cv2.GaussianBlur(mask_roi, (15, 15), 5)
-
-        # Place the mask ROI in the full-sized mask
-        mask[min_y:max_y, min_x:max_x] = mask_roi
+        cv2.GaussianBlur(mask, (15, 15), 5, dst=mask)
 
         # Extract the masked area from the frame
         mouth_cutout = frame[min_y:max_y, min_x:max_x].copy()
 
         # Return the expanded lower lip polygon in original frame coordinates
+        mouth_box = (int(min_x), int(min_y), int(max_x), int(max_y))
         lower_lip_polygon = expanded_landmarks
 
-    return mask, mouth_cutout, (min_x, min_y, max_x, max_y), lower_lip_polygon
+    return mask, mouth_cutout, mouth_box, lower_lip_polygon
 
 
 def draw_mouth_mask_visualization(
@@ -313,8 +432,12 @@ def apply_mouth_area(
     mouth_box: tuple,
     face_mask: np.ndarray,
     mouth_polygon: np.ndarray,
-    mask_feather_ratio: int
+    mask_feather_ratio: int,
+    face_mask_box: tuple = None
 ) -> np.ndarray:
+    """
+    face_mask 为整帧掩码；给出 face_mask_box 时 face_mask 只覆盖该区域 (create_face_mask_roi 的输出)
+    """
     min_x, min_y, max_x, max_y = mouth_box
     box_width = max_x - min_x
     box_height = max_y - min_y
@@ -329,10 +452,9 @@ def apply_mouth_area(
         return frame
 
     try:
-        resized_mouth_cutout = cv2.resize(mouth_cutout, (box_width, box_height))
         roi = frame[min_y:max_y, min_x:max_x]
-
-        if roi.shape != resized_mouth_cutout.shape:
+        resized_mouth_cutout = mouth_cutout
+        if resized_mouth_cutout.shape != roi.shape:
             resized_mouth_cutout = cv2.resize(
                 resized_mouth_cutout, (roi.shape[1], roi.shape[0])
             )
@@ -340,7 +462,7 @@ def apply_mouth_area(
         color_corrected_mouth = apply_color_transfer(resized_mouth_cutout, roi)
 
         # Use the provided mouth polygon to create the mask
-        polygon_mask = np.zeros(roi.shape[:2], dtype=np.uint8)
+        polygon_mask = np.zeros(roi.shape[:2], dtype=np.float32)
         adjusted_polygon = mouth_polygon - [min_x, min_y]
         cv2.fillPoly(polygon_mask, [adjusted_polygon], 255)
 
@@ -350,98 +472,177 @@ def apply_mouth_area(
             box_width // mask_feather_ratio,
             box_height // mask_feather_ratio,
         )
-        feathered_mask = cv2.GaussianBlur(
-            polygon_mask.astype(float), (0, 0), feather_amount
-        )
-        feathered_mask = feathered_mask / feathered_mask.max()
-
-        face_mask_roi = face_mask[min_y:max_y, min_x:max_x]
-        combined_mask = feathered_mask * (face_mask_roi / 255.0)
+        feathered_mask = cv2.GaussianBlur(polygon_mask, (0, 0), feather_amount)
+        feathered_mask /= feathered_mask.max()
 
-        combined_mask = combined_mask[:, :, np.newaxis]
+        face_mask_roi = _crop_mask(face_mask, face_mask_box, (min_x, min_y, max_x, max_y), roi.shape[:2])
+        face_mask_roi = face_mask_roi.astype(np.float32) * (1.0 / 255.0)
+        combined_mask = (feathered_mask * face_mask_roi)[:, :, np.newaxis]
+        roi_float = roi.astype(np.float32)
         blended = (
-            color_corrected_mouth * combined_mask + roi * (1 - combined_mask)
+            color_corrected_mouth * combined_mask + roi_float * (1 - combined_mask)
         ).astype(np.uint8)
 
         # Apply face mask to blended result
-        face_mask_3channel = (
-            np.repeat(face_mask_roi[:, :, np.newaxis], 3, axis=2) / 255.0
-        )
-        final_blend = blended * face_mask_3channel + roi * (1 - face_mask_3channel)
+        face_mask_3channel = face_mask_roi[:, :, np.newaxis]
+        final_blend = blended * face_mask_3channel + roi_float * (1 - face_mask_3channel)
 
-        frame[min_y:max_y, min_x:max_x] = final_blend.astype(np.uint8)
+        roi[...] = final_blend.astype(np.uint8)
     except Exception as e:
         pass
 
     return frame
 
 
-def create_face_mask(face, frame: np.ndarray) -> np.ndarray:
-    mask = np.zeros(frame.shape[:2], dtype=np.uint8)
-    landmarks = face.landmark_2d_106
-    if landmarks is not None:
-        # Convert landmarks to int32
-        landmarks = landmarks.astype(np.int32)
-
-        # Extract facial features
-        right_side_face = landmarks[0:16]
-        left_side_face = landmarks[17:32]
-        right_eye = landmarks[33:42]
-        right_eye_brow = landmarks[43:51]
-        left_eye = landmarks[87:96]
-        left_eye_brow = landmarks[97:105]
-
-        # Calculate forehead extension
-        right_eyebrow_top = np.min(right_eye_brow[:, 1])
-        left_eyebrow_top = np.min(left_eye_brow[:, 1])
-        eyebrow_top = min(right_eyebrow_top, left_eyebrow_top)
-
-        face_top = np.min([right_side_face[0, 1], left_side_face[-1, 1]])
-        forehead_height = face_top - eyebrow_top
-        extended_forehead_height = int(forehead_height * 5.0)  # Extend by 50%
-
-        # Create forehead points
-        forehead_left = right_side_face[0].copy()
-        forehead_right = left_side_face[-1].copy()
-        forehead_left[1] -= extended_forehead_height
-        forehead_right[1] -= extended_forehead_height
-
-        # Combine all points to create the face outline
-        face_outline = np.vstack(
-            [
-                [forehead_left],
-                right_side_face,
-                left_side_face[
-                    ::-1
-                ],  # Reverse left side to create a continuous outline
-                [forehead_right],
-            ]
+def _crop_mask(mask: np.ndarray, mask_box: tuple, box: tuple, shape: tuple) -> np.ndarray:
+    """从整帧掩码或位于 mask_box 的区域掩码中取出 box 区域，区域外补 0"""
+    min_x, min_y, max_x, max_y = box
+    if mask_box is None:
+        return mask[min_y:max_y, min_x:max_x]
+    mx0, my0, mx1, my1 = mask_box
+    if mx0 <= min_x and my0 <= min_y and max_x <= mx1 and max_y <= my1:
+        return mask[min_y - my0:max_y - my0, min_x - mx0:max_x - mx0]
+    out = np.zeros(shape, dtype=mask.dtype)
+    x0, y0 = max(min_x, mx0), max(min_y, my0)
+    x1, y1 = min(max_x, mx1), min(max_y, my1)
+    if x1 > x0 and y1 > y0:
+        out[y0 - min_y:y1 - min_y, x0 - min_x:x1 - min_x] = mask[y0 - my0:y1 - my0, x0 - mx0:x1 - mx0]
+    return out
+
+
+_scratch = threading.local()
+
+
+def apply_mouth_mask(
+    frame: np.ndarray,
+    face,
+    mask_down_size: float,
+    mask_size,
+    mask_feather_ratio: int,
+    show_mouth_mask_box: bool = False
+) -> np.ndarray:
+    """
+    换脸后把原始嘴部区域贴回 (create_face_mask_roi + create_lower_mouth_mask + apply_mouth_area)
+
+    人脸掩码只在人脸区域内生成，写入按线程复用的缓冲，不分配整帧掩码
+    """
+    buffer = getattr(_scratch, "face_mask", None)
+    face_mask, face_mask_box = create_face_mask_roi(face, frame.shape, buffer)
+    if face_mask is not None and face_mask.base is not buffer:
+        _scratch.face_mask = face_mask.base
+    mouth_mask, mouth_cutout, mouth_box, lower_lip_polygon = (
+        create_lower_mouth_mask(face, frame, mask_down_size, mask_size)
+    )
+    frame = apply_mouth_area(
+        frame, mouth_cutout, mouth_box, face_mask, lower_lip_polygon, mask_feather_ratio, face_mask_box
+    )
+    if show_mouth_mask_box:
+        mouth_mask_data = (mouth_mask, mouth_cutout, mouth_box, lower_lip_polygon)
+        frame = draw_mouth_mask_visualization(
+            frame, face, mouth_mask_data, mask_feather_ratio
         )
+    return frame
 
-        # Calculate padding
-        padding = int(
-            np.linalg.norm(right_side_face[0] - left_side_face[-1]) * 0.05
-        )  # 5% of face width
 
-        # Create a slightly larger convex hull for padding
-        hull = cv2.convexHull(face_outline)
-        hull_padded = []
-        for point in hull:
-            x, y = point[0]
-            center = np.mean(face_outline, axis=0)
-            direction = np.array([x, y]) - center
-            direction = direction / np.linalg.norm(direction)
-            padded_point = np.array([x, y]) + direction * padding
-            hull_padded.append(padded_point)
+def _face_hull(face) -> np.ndarray:
+    landmarks = face.landmark_2d_106
+    if landmarks is None:
+        return None
+    # Convert landmarks to int32
+    landmarks = landmarks.astype(np.int32)
+
+    # Extract facial features
+    right_side_face = landmarks[0:16]
+    left_side_face = landmarks[17:32]
+    right_eye = landmarks[33:42]
+    right_eye_brow = landmarks[43:51]
+    left_eye = landmarks[87:96]
+    left_eye_brow = landmarks[97:105]
+
+    # Calculate forehead extension
+    right_eyebrow_top = np.min(right_eye_brow[:, 1])
+    left_eyebrow_top = np.min(left_eye_brow[:, 1])
+    eyebrow_top = min(right_eyebrow_top, left_eyebrow_top)
+
+    face_top = np.min([right_side_face[0, 1], left_side_face[-1, 1]])
+    forehead_height = face_top - eyebrow_top
+    extended_forehead_height = int(forehead_height * 5.0)  # Extend by 50%
+
+    # Create forehead points
+    forehead_left = right_side_face[0].copy()
+    forehead_right = left_side_face[-1].copy()
+    forehead_left[1] -= extended_forehead_height
+    forehead_right[1] -= extended_forehead_height
+
+    # Combine all points to create the face outline
+    face_outline = np.vstack(
+        [
+            [forehead_left],
+            right_side_face,
+            left_side_face[
+                ::-1
+            ],  # Reverse left side to create a continuous outline
+            [forehead_right],
+        ]
+    )
+
+    # Calculate padding
+    padding = int(
+        np.linalg.norm(right_side_face[0] - left_side_face[-1]) * 0.05
+    )  # 5% of face width
 
-        hull_padded = np.array(hull_padded, dtype=np.int32)
+    # Create a slightly larger convex hull for padding
+    hull = cv2.convexHull(face_outline).reshape(-1, 2)
+    center = np.mean(face_outline, axis=0)
+    direction = hull - center
+    direction = direction / np.linalg.norm(direction, axis=1, keepdims=True)
+    return (hull + direction * padding).astype(np.int32)
 
-        # Fill the padded convex hull
-        cv2.fillConvexPoly(mask, hull_padded, 255)
 
-        # Smooth the mask edges
-        mask = cv2.GaussianBlur(mask, (5, 5), 3)
+def create_face_mask_roi(face, frame_shape: tuple, out: np.ndarray = None) -> tuple:
+    """
+    只在人脸凸包的包围区域内生成人脸掩码，返回 (mask_roi, (min_x, min_y, max_x, max_y))
 
+    区域四周留出模糊核半径，结果与整帧生成后裁剪一致。out 为可复用的一维 uint8 缓冲，
+    足够大时 mask_roi 是它的视图。没有 106 点关键点时返回 (None, None)
+    """
+    hull_padded = _face_hull(face)
+    if hull_padded is None:
+        return None, None
+    height, width = frame_shape[:2]
+    blur_radius = 3
+    min_x, min_y = np.maximum(hull_padded.min(axis=0) - blur_radius, 0)
+    max_x = min(width, int(hull_padded[:, 0].max()) + blur_radius + 1)
+    max_y = min(height, int(hull_padded[:, 1].max()) + blur_radius + 1)
+    min_x, min_y = int(min(min_x, max_x)), int(min(min_y, max_y))
+    size = (max_y - min_y) * (max_x - min_x)
+    if out is not None and out.size >= size:
+        mask = out[:size].reshape(max_y - min_y, max_x - min_x)
+        mask.fill(0)
+    else:
+        # 新分配的一维缓冲可通过 mask.base 取回，供下次调用复用
+        mask = np.zeros(size, dtype=np.uint8).reshape(max_y - min_y, max_x - min_x)
+    if size == 0:
+        return mask, (min_x, min_y, max_x, max_y)
+
+    # Fill the padded convex hull
+    cv2.fillConvexPoly(mask, hull_padded - [min_x, min_y], 255)
+
+    # Smooth the mask edges
+    cv2.GaussianBlur(mask, (5, 5), 3, dst=mask)
+    return mask, (min_x, min_y, max_x, max_y)
+
+
+def create_face_mask(face, frame: np.ndarray) -> np.ndarray:
+    """
+    整帧人脸掩码，保留给需要整帧掩码的外部调用；由 create_face_mask_roi 生成人脸区域后写入，
+    库内的调用都直接使用 create_face_mask_roi
+    """
+    mask = np.zeros(frame.shape[:2], dtype=np.uint8)
+    mask_roi, box = create_face_mask_roi(face, frame.shape)
+    if mask_roi is not None:
+        min_x, min_y, max_x, max_y = box
+        mask[min_y:max_y, min_x:max_x] = mask_roi
     return mask
 
 
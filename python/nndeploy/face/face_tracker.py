@@ -0,0 +1,182 @@
+# 视频人脸分析的检测跳帧: 两次完整检测之间用光流跟踪传播人脸框/关键点，复用上次的嵌入向量
+
+import cv2
+import numpy as np
+import insightface
+
+
+def bbox_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """a: N x 4, b: M x 4 的 [x_min, y_min, x_max, y_max]，返回 N x M 的 IoU"""
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    x0 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y0 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x1 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y1 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x1 - x0, 0, None) * np.clip(y1 - y0, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-6)
+
+
+def _transform_points(points: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    return points @ matrix[:, :2].T + matrix[:, 2]
+
+
+class FaceTracker:
+    """
+    基于金字塔 LK 光流的轻量人脸跟踪
+
+    update() 接收一帧的完整检测结果作为跟踪起点；propagate() 在下一帧上跟踪每张人脸
+    内部的特征点，估计相似变换并作用到 bbox/kps/landmark 上，返回复用了嵌入向量等属性的
+    新 Face 列表。任一人脸跟踪置信度 (前后向一致的内点比例) 低于 min_confidence 时返回 None，
+    调用方应改为完整检测。
+    """
+    def __init__(self, min_confidence: float = 0.6, max_points: int = 40, fb_threshold: float = 1.0):
+        self.min_confidence = min_confidence
+        self.max_points = max_points
+        self.fb_threshold = fb_threshold
+        self.prev_gray = None
+        self.faces = []
+        self.points = []
+        self.lk_params = dict(winSize=(21, 21), maxLevel=3,
+                              criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03))
+
+    def reset(self):
+        self.prev_gray = None
+        self.faces = []
+        self.points = []
+
+    @staticmethod
+    def _gray(frame: np.ndarray) -> np.ndarray:
+        return frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+    def _face_points(self, gray: np.ndarray, face) -> np.ndarray:
+        h, w = gray.shape[:2]
+        x_min, y_min, x_max, y_max = np.asarray(face.bbox).astype(np.int64)
+        x_min, y_min = max(0, x_min), max(0, y_min)
+        x_max, y_max = min(w, x_max), min(h, y_max)
+        points = [np.asarray(face.kps, dtype=np.float32).reshape(-1, 2)]
+        if x_max - x_min > 8 and y_max - y_min > 8:
+            corners = cv2.goodFeaturesToTrack(gray[y_min:y_max, x_min:x_max], self.max_points, 0.01, 5)
+            if corners is not None:
+                points.append(corners.reshape(-1, 2) + np.array([x_min, y_min], dtype=np.float32))
+        return np.concatenate(points).astype(np.float32)
+
+    def update(self, frame: np.ndarray, faces: list):
+        """以完整检测结果作为新的跟踪起点"""
+        self.prev_gray = self._gray(frame)
+        self.faces = list(faces)
+        self.points = [self._face_points(self.prev_gray, face) for face in self.faces]
+
+    def propagate(self, frame: np.ndarray):
+        """
+        跟踪到当前帧，返回新的 Face 列表；没有跟踪起点或跟踪不可靠时返回 None
+        """
+        if self.prev_gray is None:
+            return None
+        gray = self._gray(frame)
+        if len(self.faces) == 0:
+            self.prev_gray = gray
+            return []
+
+        # 所有人脸的特征点一次光流计算，前向 + 后向校验
+        counts = [len(p) for p in self.points]
+        prev_points = np.concatenate(self.points).reshape(-1, 1, 2)
+        next_points, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, prev_points, None, **self.lk_params)
+        back_points, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self.prev_gray, next_points, None, **self.lk_params)
+        fb_error = np.linalg.norm((back_points - prev_points).reshape(-1, 2), axis=1)
+        valid = (status.reshape(-1) == 1) & (back_status.reshape(-1) == 1) & (fb_error < self.fb_threshold)
+
+        tracked_faces = []
+        tracked_points = []
+        start = 0
+        for face, count in zip(self.faces, counts):
+            src = prev_points[start:start + count].reshape(-1, 2)
+            dst = next_points[start:start + count].reshape(-1, 2)
+            ok = valid[start:start + count]
+            start += count
+            if ok.sum() < 3:
+                return None
+            matrix, inliers = cv2.estimateAffinePartial2D(src[ok], dst[ok], method=cv2.RANSAC,
+                                                          ransacReprojThreshold=2.0)
+            if matrix is None:
+                return None
+            confidence = float(inliers.sum()) / count
+            if confidence < self.min_confidence:
+                return None
+            tracked_faces.append(self._transform_face(face, matrix))
+            tracked_points.append(dst[ok][inliers.reshape(-1) == 1])
+
+        self.prev_gray = gray
+        self.faces = tracked_faces
+        # 特征点逐帧减少后重新在新位置取点，保持跟踪稳定
+        self.points = [p if len(p) >= max(8, count // 2) else self._face_points(gray, face)
+                       for p, count, face in zip(tracked_points, counts, tracked_faces)]
+        return tracked_faces
+
+    @staticmethod
+    def _transform_face(face, matrix: np.ndarray):
+        tracked = insightface.app.common.Face(dict(face))
+        x_min, y_min, x_max, y_max = face.bbox
+        corners = np.array([[x_min, y_min], [x_max, y_min], [x_min, y_max], [x_max, y_max]], dtype=np.float32)
+        corners = _transform_points(corners, matrix)
+        tracked.bbox = np.concatenate([corners.min(axis=0), corners.max(axis=0)]).astype(np.float32)
+        tracked.kps = _transform_points(np.asarray(face.kps, dtype=np.float32), matrix)
+        if face.landmark_2d_106 is not None:
+            tracked.landmark_2d_106 = _transform_points(np.asarray(face.landmark_2d_106, dtype=np.float32), matrix)
+        if face.landmark_3d_68 is not None:
+            landmark = np.array(face.landmark_3d_68, dtype=np.float32)
+            landmark[:, :2] = _transform_points(landmark[:, :2], matrix)
+            landmark[:, 2] *= float(np.sqrt(abs(np.linalg.det(matrix[:, :2]))))
+            tracked.landmark_3d_68 = landmark
+        return tracked
+
+
+class TrackingStats:
+    """
+    检测跳帧的统计: 跳过检测的帧数，以及每次完整检测时与 (已传播到同一帧的) 跟踪结果的一致性
+    (IoU 及复用嵌入向量与新嵌入向量的余弦相似度)；跟踪不可靠而提前检测的次数记为 track_failures
+    """
+    def __init__(self, identity_threshold: float = 0.4):
+        self.identity_threshold = identity_threshold
+        self.frames_detected = 0
+        self.frames_tracked = 0
+        self.matched = 0
+        self.unmatched = 0
+        self.iou_sum = 0.0
+        self.similarity_sum = 0.0
+        self.identity_drift = 0
+        self.track_failures = 0
+
+    def compare(self, tracked_faces: list, detected_faces: list):
+        """完整检测时把检测结果与跟踪传播的结果按 IoU 配对并累计一致性"""
+        if len(tracked_faces) == 0 or len(detected_faces) == 0:
+            self.unmatched += len(tracked_faces)
+            return
+        iou = bbox_iou([f.bbox for f in tracked_faces], [f.bbox for f in detected_faces])
+        for i, j in enumerate(np.argmax(iou, axis=1)):
+            if iou[i, j] < 0.3:
+                self.unmatched += 1
+                continue
+            similarity = float(np.dot(tracked_faces[i].normed_embedding, detected_faces[j].normed_embedding))
+            self.matched += 1
+            self.iou_sum += float(iou[i, j])
+            self.similarity_sum += similarity
+            if similarity < self.identity_threshold:
+                self.identity_drift += 1
+
+    def get_stats(self) -> dict:
+        total = self.frames_detected + self.frames_tracked
+        return {
+            "frames": total,
+            "frames_detected": self.frames_detected,
+            "frames_tracked": self.frames_tracked,
+            "skip_ratio": self.frames_tracked / total if total > 0 else 0.0,
+            "matched": self.matched,
+            "unmatched": self.unmatched,
+            "mean_iou": self.iou_sum / self.matched if self.matched > 0 else 0.0,
+            "mean_identity_similarity": self.similarity_sum / self.matched if self.matched > 0 else 0.0,
+            "identity_drift": self.identity_drift,
+            "track_failures": self.track_failures,
+        }
@@ -0,0 +1,154 @@
+# 视频帧存储：按帧序号读写解码后的原始像素，替代逐帧 JPEG 临时文件
+# 换脸流程中各节点共享同一个 store，帧像素只在最终编码视频时经过一次编解码
+
+import os
+import abc
+import tempfile
+import collections
+from typing import Optional
+
+import numpy as np
+
+
+class FrameStore(abc.ABC):
+    """
+    按帧序号存取 HxWxC 帧的存储接口
+
+    get() 返回的数组可能直接引用存储内存，之后对同一序号的 put() 会改变其内容，
+    需要长期持有的子区域请自行 copy()
+    """
+    @abc.abstractmethod
+    def put(self, index: int, frame: np.ndarray):
+        ...
+
+    @abc.abstractmethod
+    def get(self, index: int) -> np.ndarray:
+        ...
+
+    @abc.abstractmethod
+    def __contains__(self, index: int) -> bool:
+        ...
+
+    @abc.abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    def close(self):
+        pass
+
+
+class MemmapFrameStore(FrameStore):
+    """
+    内存映射的原始帧文件，第 i 帧位于偏移 i * frame_bytes
+
+    帧尺寸在第一次 put() 时确定，capacity 为最大帧数 (通常为视频总帧数)
+    """
+    def __init__(self, capacity: int, directory: str = None):
+        self.capacity = capacity
+        self.directory = directory
+        self.path = None
+        self.data = None
+        self.written = np.zeros(capacity, dtype=bool)
+
+    def _allocate(self, frame: np.ndarray):
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(prefix="frames_", suffix=".raw", dir=self.directory)
+        os.close(fd)
+        self.data = np.memmap(self.path, dtype=frame.dtype, mode="w+",
+                              shape=(self.capacity,) + frame.shape)
+
+    def put(self, index: int, frame: np.ndarray):
+        if self.data is None:
+            self._allocate(frame)
+        target = self.data[index]
+        if target.shape != frame.shape:
+            raise ValueError(f"帧尺寸不一致: {frame.shape}, 期望 {target.shape}")
+        # get() 返回的视图原地修改后再 put 回来时无需拷贝
+        if target.ctypes.data != frame.ctypes.data:
+            target[...] = frame
+        self.written[index] = True
+
+    def get(self, index: int) -> np.ndarray:
+        if self.data is None or not self.written[index]:
+            raise KeyError(index)
+        return self.data[index]
+
+    def __contains__(self, index: int) -> bool:
+        return self.data is not None and 0 <= index < self.capacity and bool(self.written[index])
+
+    def __len__(self) -> int:
+        return int(self.written.sum())
+
+    def close(self):
+        # 仍被引用的视图会保持映射有效，这里只释放本对象的引用并删除文件
+        self.data = None
+        if self.path is not None and os.path.exists(self.path):
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+        self.path = None
+
+
+class MemoryFrameStore(FrameStore):
+    """
+    有上限的内存帧缓存，超过 max_frames 时把最久未访问的帧溢出到 MemmapFrameStore
+    """
+    def __init__(self, capacity: int, max_frames: int = 256, spill_directory: str = None):
+        self.capacity = capacity
+        self.max_frames = max_frames
+        self.spill_directory = spill_directory
+        self.cache = collections.OrderedDict()
+        self.spill: Optional[MemmapFrameStore] = None
+        self.indices = set()
+
+    def put(self, index: int, frame: np.ndarray):
+        cached = self.cache.get(index)
+        if cached is not None and cached.shape == frame.shape:
+            if cached is not frame:
+                np.copyto(cached, frame)
+        else:
+            self.cache[index] = np.array(frame, copy=True)
+        self.cache.move_to_end(index)
+        self.indices.add(index)
+        while len(self.cache) > self.max_frames:
+            old_index, old_frame = self.cache.popitem(last=False)
+            if self.spill is None:
+                self.spill = MemmapFrameStore(self.capacity, self.spill_directory)
+            self.spill.put(old_index, old_frame)
+
+    def get(self, index: int) -> np.ndarray:
+        if index in self.cache:
+            self.cache.move_to_end(index)
+            return self.cache[index]
+        if self.spill is not None and index in self.spill:
+            return self.spill.get(index)
+        raise KeyError(index)
+
+    def __contains__(self, index: int) -> bool:
+        return index in self.indices
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def close(self):
+        self.cache.clear()
+        self.indices.clear()
+        if self.spill is not None:
+            self.spill.close()
+            self.spill = None
+
+
+def create_frame_store(kind: str, capacity: int, directory: str = None, max_memory_frames: int = 256) -> FrameStore:
+    """
+    Args:
+        kind: "memmap" 全部帧写入内存映射文件; "memory" 内存缓存 max_memory_frames 帧，超出部分溢出到文件
+        capacity: 最大帧数
+        directory: 内存映射文件所在目录
+    """
+    if kind == "memmap":
+        return MemmapFrameStore(capacity, directory)
+    if kind == "memory":
+        return MemoryFrameStore(capacity, max_memory_frames, directory)
+    raise ValueError(f"不支持的 frame store 类型: {kind}")
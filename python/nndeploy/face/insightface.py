@@ -7,12 +7,17 @@ import shutil
 from typing import Any
 import cv2
 import json
-from tqdm import tqdm
 import numpy as np
 import insightface
 
-from .deep_live_cam import create_face_mask, create_lower_mouth_mask, apply_mouth_area, draw_mouth_mask_visualization
-from .deep_live_cam import find_cluster_centroids, find_closest_centroid
+from .deep_live_cam import create_face_mask_roi, create_lower_mouth_mask, apply_mouth_area, draw_mouth_mask_visualization
+from .deep_live_cam import apply_mouth_mask
+from .deep_live_cam import find_cluster_centroids, find_cluster_centroids_online
+from .deep_live_cam import assign_to_centroids, group_by_label
+from .frame_store import create_frame_store
+from .face_tracker import FaceTracker, TrackingStats
+from .batch_swapper import BatchFaceSwapper
+from .analysis_cache import get_face_analysis_cache
 
 class InsightFaceAnalysis(nndeploy.dag.Node):
     def __init__(self, name, inputs: list[nndeploy.dag.Edge] = None, outputs: list[nndeploy.dag.Edge] = None):
@@ -28,15 +33,59 @@ class InsightFaceAnalysis(nndeploy.dag.Node):
         self.ctx_id = 0
         self.det_size_ = (640, 640)
         self.det_thresh_ = 0.5
+        # 视频输入时每 detect_interval_ 帧做一次完整检测，中间帧用光流跟踪传播人脸并复用嵌入向量
+        # 1 表示每帧都检测；跟踪置信度低于 track_min_confidence_ 时立即改为完整检测
+        self.detect_interval_ = 1
+        self.track_min_confidence_ = 0.6
+        self.tracker = None
+        self.tracking_stats = None
+        # 人脸分析缓存目录，非空时以图像内容哈希缓存检测结果 (用于反复使用的源人脸图片)
+        self.cache_dir_ = ""
+        self.cache_max_entries_ = 1024
+        self.cache = None
         
     def init(self):
         self.analysis = insightface.app.FaceAnalysis(name=self.insightface_name_, providers=self.providers_)
         self.analysis.prepare(ctx_id=self.ctx_id, det_size=self.det_size_, det_thresh=self.det_thresh_)
+        if self.detect_interval_ > 1:
+            self.tracker = FaceTracker(self.track_min_confidence_)
+            self.tracking_stats = TrackingStats()
+            self.frames_since_detect_ = 0
+        elif self.cache_dir_ != "":
+            namespace = f"{self.insightface_name_}:{tuple(self.det_size_)}:{self.det_thresh_}"
+            self.cache = get_face_analysis_cache(self.cache_dir_, self.cache_max_entries_, namespace)
         return nndeploy.base.Status.ok()
+    
+    def _detect_or_track(self, input_numpy):
+        if self.tracker is None:
+            if self.cache is None:
+                return self.analysis.get(input_numpy)
+            key = self.cache.key(input_numpy)
+            faces = self.cache.get(input_numpy, key)
+            if faces is None:
+                faces = self.analysis.get(input_numpy)
+                self.cache.put(input_numpy, faces, key)
+            return faces
+        has_track = self.tracker.prev_gray is not None
+        # 跳帧和计划内的完整检测帧都先把跟踪推进到当前帧，检测帧上与检测结果比较的是同一帧的位置
+        tracked = self.tracker.propagate(input_numpy)
+        if tracked is not None and self.frames_since_detect_ < self.detect_interval_ - 1:
+            self.frames_since_detect_ += 1
+            self.tracking_stats.frames_tracked += 1
+            return tracked
+        faces = self.analysis.get(input_numpy)
+        if tracked is not None:
+            self.tracking_stats.compare(tracked, faces)
+        elif has_track:
+            self.tracking_stats.track_failures += 1
+        self.tracking_stats.frames_detected += 1
+        self.tracker.update(input_numpy, faces)
+        self.frames_since_detect_ = 0
+        return faces
         
     def run(self):
         input_numpy = self.get_input(0).get(self)
-        faces = self.analysis.get(input_numpy)
+        faces = self._detect_or_track(input_numpy)
         # faces按照从左到右的顺序排列，基于bbox的x坐标进行排序
         faces = sorted(faces, key=lambda x: x.bbox[0])
         if len(faces) == 0:
@@ -52,6 +101,22 @@ class InsightFaceAnalysis(nndeploy.dag.Node):
         self.get_output(0).set(face)
         return nndeploy.base.Status.ok()
     
+    def deinit(self):
+        if self.tracking_stats is not None:
+            stats = self.tracking_stats.get_stats()
+            print(f"InsightFaceAnalysis: 跳过检测 {stats['frames_tracked']}/{stats['frames']} 帧, "
+                  f"跟踪与检测 IoU {stats['mean_iou']:.3f}, 嵌入相似度 {stats['mean_identity_similarity']:.3f}, "
+                  f"身份漂移 {stats['identity_drift']} 次, 跟踪失败 {stats['track_failures']} 次")
+        if self.tracker is not None:
+            self.tracker.reset()
+        return nndeploy.base.Status.ok()
+    
+    def get_tracking_stats(self) -> dict:
+        """检测跳帧统计，detect_interval_ 为 1 时为空"""
+        if self.tracking_stats is None:
+            return {}
+        return self.tracking_stats.get_stats()
+    
     def serialize(self):
         json_str = super().serialize()
         json_obj = json.loads(json_str)
@@ -61,6 +126,10 @@ class InsightFaceAnalysis(nndeploy.dag.Node):
         json_obj["ctx_id"] = self.ctx_id
         # json_obj["det_size_"] = self.det_size_
         json_obj["det_thresh_"] = self.det_thresh_
+        json_obj["detect_interval_"] = self.detect_interval_
+        json_obj["track_min_confidence_"] = self.track_min_confidence_
+        json_obj["cache_dir_"] = self.cache_dir_
+        json_obj["cache_max_entries_"] = self.cache_max_entries_
         return json.dumps(json_obj)
     
     def deserialize(self, target: str):
@@ -71,6 +140,10 @@ class InsightFaceAnalysis(nndeploy.dag.Node):
         self.ctx_id = json_obj["ctx_id"]
         # self.det_size_ = tuple(json_obj["det_size_"])
         self.det_thresh_ = json_obj.get("det_thresh_", 0.5)
+        self.detect_interval_ = json_obj.get("detect_interval_", 1)
+        self.track_min_confidence_ = json_obj.get("track_min_confidence_", 0.6)
+        self.cache_dir_ = json_obj.get("cache_dir_", "")
+        self.cache_max_entries_ = json_obj.get("cache_max_entries_", 1024)
         if "map_id_" in json_obj:
             self.map_id_ = json_obj["map_id_"]
         return super().deserialize(target)
@@ -158,6 +231,13 @@ class InsightVideoFaceId(nndeploy.dag.Node):
 
         self.video_path_ = "video.mp4"
         self.faces_path_ = "resources/images/"
+        self.frame_store_ = "memmap"  # memmap: 原始帧内存映射文件; memory: 内存缓存，超出后溢出到文件
+        self.max_memory_frames_ = 256
+        self.frame_store = None
+        self.cluster_method_ = "elbow"  # elbow: 逐个 k 拟合 KMeans 的肘部法; online: 单遍在线聚类 (需显式开启)
+        self.cluster_threshold_ = 0.4  # online 聚类的余弦相似度阈值
+        self.cluster_max_samples_ = 4096  # online 聚类最多使用的样本数，超出时等间隔抽样
+        self.detect_interval_ = 1  # 每隔多少帧做一次完整人脸检测，中间帧光流跟踪
         
         self.set_output_type(list[Any])
           
@@ -172,6 +252,7 @@ class InsightVideoFaceId(nndeploy.dag.Node):
         self.video_codec.set_path(self.video_path_)
         self.face_analysis = InsightFaceAnalysis("face_analysis", [self.codec_output], [self.analysis_output])
         self.face_analysis.is_one_face_ = False
+        self.face_analysis.detect_interval_ = self.detect_interval_
         self.graph = nndeploy.dag.Graph("graph-video-face-id", [], [self.codec_output, self.analysis_output])
         self.graph.add_node(self.video_codec)
         self.graph.add_node(self.face_analysis)
@@ -185,89 +266,75 @@ class InsightVideoFaceId(nndeploy.dag.Node):
     def run(self):
         size = self.video_codec.get_size()
         face_id = []
-        frame_face_embeddings = []
+        faces_all = []
+        face_frames = []
         face_embeddings = []
+        # 解码帧按序号存入 frame store，下游换脸节点直接读写原始像素，不再经过 JPEG 临时文件
+        if self.frame_store is not None:
+            self.frame_store.close()
+        self.frame_store = create_frame_store(self.frame_store_, size, self.temp_path_, self.max_memory_frames_)
         for i in range(size):
             self.graph.run()
             frame = self.graph.get_output(0).get_graph_output()
             faces = self.graph.get_output(1).get_graph_output()
             
             for face in faces:
+                faces_all.append(face)
+                face_frames.append(i)
                 face_embeddings.append(face.normed_embedding)
             
-            cv2.imwrite(f"{self.temp_path_}/{i}.jpg", frame)
-            frame_face_embeddings.append({'frame': i, 'faces': faces, 'location': f"{self.temp_path_}/{i}.jpg"})
-            i += 1
+            self.frame_store.put(i, frame)
          
         
-        # 使用K-means聚类算法对视频中提取的所有人脸嵌入向量进行聚类分析
+        # 对视频中提取的所有人脸嵌入向量进行聚类分析
         # 目的是将相似的人脸特征归为一组，从而识别视频中的不同人物
         # 返回的centroids是每个聚类的中心点，代表了视频中各个不同人物的典型特征
-        centroids = find_cluster_centroids(face_embeddings)
-        
-        # 为每个检测到的人脸分配最匹配的聚类中心点ID
-        # 遍历视频中每一帧的人脸检测结果
-        for frame in frame_face_embeddings:
-            # 遍历当前帧中检测到的所有人脸
-            for face in frame['faces']:
-                # 通过计算当前人脸嵌入向量与各个聚类中心点的相似度，
-                # 找到最相似的聚类中心点，返回其索引和中心点向量
-                closest_centroid_index, _ = find_closest_centroid(centroids, face.normed_embedding)
-                # 将最匹配的聚类中心点索引作为该人脸的目标聚类ID保存
-                # 这样可以将同一个人在不同帧中的人脸归为同一类别
-                face['target_centroid'] = closest_centroid_index  
-                     
-        # 为每个聚类中心点（即识别出的不同人物）创建对应的人脸ID数据结构
-        for i in range(len(centroids)):
-            # 为第i个聚类中心点创建一个人脸ID字典，包含该人物的唯一标识符
-            face_id.append({
-                'id' : i  # 人物的唯一ID，对应聚类中心点的索引
-            })
-
-            # 创建临时列表，用于存储属于当前人物（聚类中心点i）的所有帧数据
-            temp = []
-            # 遍历所有帧的人脸嵌入数据，筛选出属于当前聚类中心点i的人脸
-            # tqdm用于显示处理进度条，方便监控大量帧数据的处理状态
-            for frame in tqdm(frame_face_embeddings, desc=f"Mapping frame embeddings to centroids-{i}"):
-                # 为当前帧创建数据结构，只包含目标聚类为i的人脸
-                # 通过列表推导式筛选出target_centroid等于i的人脸数据
-                temp.append({
-                    'frame': frame['frame'],  # 帧编号
-                    'faces': [face for face in frame['faces'] if face['target_centroid'] == i],  # 属于聚类i的人脸列表
-                    'location': frame['location']  # 帧在视频中的位置
-                })
-
-            # 将筛选后的帧数据保存到对应人物ID的数据结构中
-            # 这样每个人物ID就包含了该人物在所有帧中出现的人脸数据
-            face_id[i]['target_faces_in_frame'] = temp
-
-        for map in face_id:
-            best_face = None
-            best_frame = None
-            for frame in map['target_faces_in_frame']:
-                if len(frame['faces']) > 0:
-                    best_face = frame['faces'][0]
-                    best_frame = frame
-                    break
-
-            for frame in map['target_faces_in_frame']:
-                for face in frame['faces']:
-                    if face['det_score'] > best_face['det_score']:
-                        best_face = face
-                        best_frame = frame
-
+        if self.cluster_method_ == "elbow":
+            centroids = find_cluster_centroids(face_embeddings)
+        else:
+            centroids = find_cluster_centroids_online(face_embeddings, threshold=self.cluster_threshold_,
+                                                      max_samples=self.cluster_max_samples_)
+        
+        # 所有人脸一次矩阵乘法分配到最相似的聚类中心点，没有分到任何人脸的中心点不作为人物
+        labels, _ = assign_to_centroids(centroids, face_embeddings)
+        centroids = np.asarray(centroids)
+        used = np.bincount(labels, minlength=len(centroids)) > 0
+        if not np.all(used):
+            centroids = centroids[used]
+            labels, _ = assign_to_centroids(centroids, face_embeddings)
+        for face, label in zip(faces_all, labels.tolist()):
+            face['target_centroid'] = label
+        
+        # 按聚类中心点分组得到每个人物的人脸下标，每个人物只遍历属于自己的人脸
+        groups = group_by_label(labels, len(centroids))
+        face_frames = np.asarray(face_frames, dtype=np.int64)
+        det_scores = np.asarray([face['det_score'] for face in faces_all], dtype=np.float32)
+        for i, indices in enumerate(groups):
+            # target_faces_in_frame 只包含出现人物i的帧 (按帧序号升序)，不再为每个人物构建覆盖全部帧的列表；
+            # 分组保持人脸的原有顺序，同一帧的人脸在 indices 中相邻
+            frames_i = face_frames[indices]
+            frame_ids, starts = np.unique(frames_i, return_index=True)
+            ends = np.append(starts[1:], len(indices))
+            temp = [{'frame': int(f), 'faces': [faces_all[j] for j in indices[b:e].tolist()]}
+                    for f, b, e in zip(frame_ids.tolist(), starts.tolist(), ends.tolist())]
+
+            # 检测分数最高的人脸作为该人物的代表
+            best = int(indices[np.argmax(det_scores[indices])])
+            best_face = faces_all[best]
             x_min, y_min, x_max, y_max = best_face['bbox']
 
-            # 从视频中得到第i帧图片
-            # cap = cv2.VideoCapture(self.video_path_)
-            # cap.set(cv2.CAP_PROP_POS_FRAMES, best_frame['location'])
-            # ret, target_frame = cap.read()
-            # cap.release()
-            target_frame = cv2.imread(best_frame['location'])
-            map['target'] = {
-                            'cv2' : target_frame[int(y_min):int(y_max), int(x_min):int(x_max)],
-                            'face' : best_face
-                            }
+            # 从 frame store 中得到最佳帧，换脸会原地改写 store 中的帧，因此裁剪结果需要拷贝
+            target_frame = self.frame_store.get(int(face_frames[best]))
+            face_id.append({
+                'id': i,  # 人物的唯一ID，对应聚类中心点的索引
+                'target_faces_in_frame': temp,
+                'num_frames': size,  # 视频总帧数，编码时按它逐帧写出
+                'frame_store': self.frame_store,
+                'target': {
+                    'cv2': target_frame[int(y_min):int(y_max), int(x_min):int(x_max)].copy(),
+                    'face': best_face
+                },
+            })
         
         if self.faces_path_ != "":
             for map in face_id:
@@ -276,18 +343,40 @@ class InsightVideoFaceId(nndeploy.dag.Node):
         
         return nndeploy.base.Status.ok()
     
+    def deinit(self):
+        stats = self.face_analysis.get_tracking_stats()
+        if stats:
+            print(f"InsightVideoFaceId: 跳过检测 {stats['frames_tracked']}/{stats['frames']} 帧, "
+                  f"身份漂移 {stats['identity_drift']} 次")
+        if self.frame_store is not None:
+            self.frame_store.close()
+            self.frame_store = None
+        return nndeploy.base.Status.ok()
+    
     def serialize(self):
         super().add_required_param("video_path_")
         json_str = super().serialize()
         json_obj = json.loads(json_str)
         json_obj["video_path_"] = self.video_path_
         json_obj["faces_path_"] = self.faces_path_
+        json_obj["frame_store_"] = self.frame_store_
+        json_obj["max_memory_frames_"] = self.max_memory_frames_
+        json_obj["cluster_method_"] = self.cluster_method_
+        json_obj["cluster_threshold_"] = self.cluster_threshold_
+        json_obj["cluster_max_samples_"] = self.cluster_max_samples_
+        json_obj["detect_interval_"] = self.detect_interval_
         return json.dumps(json_obj)
     
     def deserialize(self, target: str):
         json_obj = json.loads(target)
         self.video_path_ = json_obj["video_path_"]
         self.faces_path_ = json_obj["faces_path_"]
+        self.frame_store_ = json_obj.get("frame_store_", "memmap")
+        self.max_memory_frames_ = json_obj.get("max_memory_frames_", 256)
+        self.cluster_method_ = json_obj.get("cluster_method_", "elbow")
+        self.cluster_threshold_ = json_obj.get("cluster_threshold_", 0.4)
+        self.cluster_max_samples_ = json_obj.get("cluster_max_samples_", 4096)
+        self.detect_interval_ = json_obj.get("detect_interval_", 1)
         return super().deserialize(target)
     
 class InsightVideoFaceIdCreator(nndeploy.dag.NodeCreator):
@@ -426,7 +515,8 @@ class InsightFaceSwapper(nndeploy.dag.Node):
             else:
                 swapped_frame = self.swapper.get(swapped_frame, single_face, source_face[0], paste_back=True)
             if self.mouth_mask_:
-                face_mask = create_face_mask(single_face, temp_frame)
+                # 人脸掩码只在人脸区域内生成
+                face_mask, face_mask_box = create_face_mask_roi(single_face, temp_frame.shape)
 
                  # Create the mouth mask
                 mouth_mask, mouth_cutout, mouth_box, lower_lip_polygon = (
@@ -435,7 +525,8 @@ class InsightFaceSwapper(nndeploy.dag.Node):
 
                 # Apply the mouth area
                 swapped_frame = apply_mouth_area(
-                    swapped_frame, mouth_cutout, mouth_box, face_mask, lower_lip_polygon, self.mask_feather_ratio_
+                    swapped_frame, mouth_cutout, mouth_box, face_mask, lower_lip_polygon, self.mask_feather_ratio_,
+                    face_mask_box
                 )
 
                 if self.show_mouth_mask_box_:
@@ -524,24 +615,10 @@ class InsightFaceSwapperWithMap(nndeploy.dag.Node):
             swapped_frame = self.swapper.get(swapped_frame, target_face['face'], source_face, paste_back=True)
 
             if self.mouth_mask_:
-                face_mask = create_face_mask(target_face['face'], swapped_frame)
-
-                 # Create the mouth mask
-                mouth_mask, mouth_cutout, mouth_box, lower_lip_polygon = (
-                    create_lower_mouth_mask(target_face['face'], swapped_frame, self.mask_down_size_, self.mask_size_)
+                swapped_frame = apply_mouth_mask(
+                    swapped_frame, target_face['face'], self.mask_down_size_, self.mask_size_,
+                    self.mask_feather_ratio_, self.show_mouth_mask_box_
                 )
-
-                # Apply the mouth area
-                swapped_frame = apply_mouth_area(
-                    swapped_frame, mouth_cutout, mouth_box, face_mask, lower_lip_polygon, self.mask_feather_ratio_
-                )
-
-                if self.show_mouth_mask_box_:
-                    mouth_mask_data = (mouth_mask, mouth_cutout, mouth_box, lower_lip_polygon)
-                    swapped_frame = draw_mouth_mask_visualization(
-                        swapped_frame, target_face['face'], mouth_mask_data, self.mask_feather_ratio_
-                    )
-                
         self.get_output(0).set(swapped_frame)
         return nndeploy.base.Status.ok()
     
@@ -597,6 +674,11 @@ class FaceSwapper(nndeploy.dag.Graph):
     def set_face_swapper_model_path(self, model_path: str):
         self.face_swapper.model_path_ = model_path
         
+    def set_face_analysis_cache(self, cache_dir: str, max_entries: int = 1024):
+        # 源人脸图片通常被反复使用，检测结果按图像内容哈希缓存到 cache_dir
+        self.face_analysis_source.cache_dir_ = cache_dir
+        self.face_analysis_source.cache_max_entries_ = max_entries
+        
     def forward(self, inputs: [nndeploy.dag.Edge]):
         source_face = self.face_analysis_source([inputs[0]])
         target_face = self.face_analysis_target([inputs[1]])
@@ -634,21 +716,52 @@ class VideoInsightFaceSwapperWithMap(nndeploy.dag.Node):
         self.is_gfpgan_ = False
         self.gfpgan_model_path_ = "gfpgan_1.4.pth"
         self.gfpgan_upscale_ = 1
+        self.gfpgan_batch_size_ = 4  # GFPGAN 一次推理的人脸数，可跨多帧
         self.gfpgan = None
+        self.swapped_kps = {}  # 帧序号 -> 已换脸人脸的 5 点关键点，GFPGAN 只增强这些人脸
         self.origin_video_path_ = "origin_video_path.mp4"
         self.video_path_ = "video_path.mp4"
         self.fourcc_ = "avc1"
+        self.swap_batch_size_ = 8  # 一次 inswapper 推理的人脸数，可跨多帧
         
     def init(self):
         self.swapper = insightface.model_zoo.get_model(self.model_path_, providers=self.providers_)
+        self.batch_swapper = BatchFaceSwapper(self.swapper, self.swap_batch_size_)
         if self.is_gfpgan_:
             import gfpgan
             self.device_, _ = nndeploy.base.get_available_device()
             self.gfpgan = gfpgan.GFPGANer(self.gfpgan_model_path_, upscale=self.gfpgan_upscale_, device=self.device_)
+            from nndeploy.gan.gfpgan import GFPGANFaceEnhancer
+            self.enhancer = GFPGANFaceEnhancer(self.gfpgan, self.gfpgan_batch_size_)
         return nndeploy.base.Status.ok()
     
+    def _write_enhanced(self, video_writer, frame_store, indices: list):
+        if len(indices) == 0:
+            return
+        frames = [frame_store.get(index) for index in indices]
+        enhanced = self.enhancer.enhance_batch(frames, [self.swapped_kps.get(index, []) for index in indices])
+        for enhanced_frame in enhanced:
+            video_writer.write(enhanced_frame)
+    
+    def _swap_window(self, frame_store, window: dict, items: list, source_face):
+        """window: 帧序号 -> 帧; items: (帧序号, 目标人脸)。换脸原地写入帧后放回 frame store"""
+        if len(items) == 0:
+            return
+        self.batch_swapper.swap([(window[index], target_face, source_face) for index, target_face in items])
+        for index, target_face in items:
+            self.swapped_kps.setdefault(index, []).append(target_face.kps)
+        if self.mouth_mask_:
+            for index, target_face in items:
+                window[index] = apply_mouth_mask(
+                    window[index], target_face, self.mask_down_size_, self.mask_size_,
+                    self.mask_feather_ratio_, self.show_mouth_mask_box_
+                )
+        for index, swapped_frame in window.items():
+            frame_store.put(index, swapped_frame)
+    
     def run(self):            
         source_target_face = self.get_input(0).get(self)
+        self.swapped_kps = {}
         
         for map in source_target_face:
             # print(map)
@@ -661,31 +774,22 @@ class VideoInsightFaceSwapperWithMap(nndeploy.dag.Node):
             else:
                 continue
             
-            # image to video swap
+            frame_store = map['frame_store']
+            
+            # image to video swap: 攒够 swap_batch_size_ 张人脸 (可跨多帧) 后批量换脸
+            window = {}
+            items = []
             for frame in target_frame:  
-                swapped_frame = cv2.imread(frame['location'])
+                if len(frame['faces']) == 0:
+                    continue
+                swapped_frame = frame_store.get(frame['frame'])
+                window[frame['frame']] = swapped_frame
                 for target_face in frame['faces']:
-                    swapped_frame = self.swapper.get(swapped_frame, target_face, source_face, paste_back=True)
-
-                    if self.mouth_mask_:
-                        face_mask = create_face_mask(target_face, swapped_frame)
-
-                        # Create the mouth mask
-                        mouth_mask, mouth_cutout, mouth_box, lower_lip_polygon = (
-                            create_lower_mouth_mask(target_face, swapped_frame, self.mask_down_size_, self.mask_size_)
-                        )
-
-                        # Apply the mouth area
-                        swapped_frame = apply_mouth_area(
-                            swapped_frame, mouth_cutout, mouth_box, face_mask, lower_lip_polygon, self.mask_feather_ratio_
-                        )
-
-                        if self.show_mouth_mask_box_:
-                            mouth_mask_data = (mouth_mask, mouth_cutout, mouth_box, lower_lip_polygon)
-                            swapped_frame = draw_mouth_mask_visualization(
-                                swapped_frame, target_face, mouth_mask_data, self.mask_feather_ratio_
-                            )
-                    cv2.imwrite(frame['location'], swapped_frame)
+                    items.append((frame['frame'], target_face))
+                if len(items) >= self.swap_batch_size_:
+                    self._swap_window(frame_store, window, items, source_face)
+                    window, items = {}, []
+            self._swap_window(frame_store, window, items, source_face)
         
         # 获取视频参数
         # 获取原始视频的信息
@@ -715,15 +819,28 @@ class VideoInsightFaceSwapperWithMap(nndeploy.dag.Node):
                 # 如果仍然失败，尝试不指定编码器让OpenCV自动选择
                 video_writer = cv2.VideoWriter(output_path, -1, fps, (width, height))
            
-        for frame in source_target_face[0]["target_faces_in_frame"]:
-            swapped_frame = cv2.imread(frame['location'])
-            if self.is_gfpgan_:
-                _, _, enhance_frame = self.gfpgan.enhance(swapped_frame, paste_back=True)
-                swapped_frame = enhance_frame
-                cv2.imwrite(frame['location'], swapped_frame)
-            
-            # 将所有帧写入视频文件
-            video_writer.write(swapped_frame)
+        frame_store = source_target_face[0]['frame_store']
+        pending = []
+        for index in range(source_target_face[0]['num_frames']):
+            if not self.is_gfpgan_:
+                # 将所有帧写入视频文件
+                video_writer.write(frame_store.get(index))
+                continue
+            # GFPGAN 只增强已换脸的人脸，直接使用换脸时的关键点，攒够一批人脸后批量推理
+            if len(self.swapped_kps.get(index, [])) == 0:
+                # 没有换脸的帧无需增强: 先写出之前攒下的帧保持顺序，再直接写入，
+                # 长时间无人脸的片段不会堆积在 pending 中
+                self._write_enhanced(video_writer, frame_store, pending)
+                pending = []
+                video_writer.write(frame_store.get(index))
+                continue
+            pending.append(index)
+            # 人脸数与帧数都不超过一批
+            if (len(pending) >= self.gfpgan_batch_size_ or
+                    sum(len(self.swapped_kps[index]) for index in pending) >= self.gfpgan_batch_size_):
+                self._write_enhanced(video_writer, frame_store, pending)
+                pending = []
+        self._write_enhanced(video_writer, frame_store, pending)
             
         # 释放视频编码器资源
         video_writer.release()
@@ -747,9 +864,11 @@ class VideoInsightFaceSwapperWithMap(nndeploy.dag.Node):
         json_obj["is_gfpgan_"] = self.is_gfpgan_
         json_obj["gfpgan_model_path_"] = self.gfpgan_model_path_
         json_obj["gfpgan_upscale_"] = self.gfpgan_upscale_
+        json_obj["gfpgan_batch_size_"] = self.gfpgan_batch_size_
         json_obj["origin_video_path_"] = self.origin_video_path_
         json_obj["video_path_"] = self.video_path_
         json_obj["fourcc_"] = self.fourcc_
+        json_obj["swap_batch_size_"] = self.swap_batch_size_
         return json.dumps(json_obj)
       
     def deserialize(self, target: str):
@@ -764,9 +883,11 @@ class VideoInsightFaceSwapperWithMap(nndeploy.dag.Node):
         self.is_gfpgan_ = json_obj["is_gfpgan_"]
         self.gfpgan_model_path_ = json_obj["gfpgan_model_path_"]
         self.gfpgan_upscale_ = json_obj["gfpgan_upscale_"]
+        self.gfpgan_batch_size_ = json_obj.get("gfpgan_batch_size_", 4)
         self.origin_video_path_ = json_obj["origin_video_path_"]
         self.video_path_ = json_obj["video_path_"]
         self.fourcc_ = json_obj["fourcc_"]
+        self.swap_batch_size_ = json_obj.get("swap_batch_size_", 8)
         return super().deserialize(target)
       
 class VideoInsightFaceSwapperWithMapCreator(nndeploy.dag.NodeCreator):
@@ -802,6 +923,7 @@ class CameraInsightFaceSwapperWithMap(nndeploy.dag.Node):
         
     def init(self):
         self.swapper = insightface.model_zoo.get_model(self.model_path_, providers=self.providers_)
+        self.batch_swapper = BatchFaceSwapper(self.swapper)
         return nndeploy.base.Status.ok()
     
     def run(self):   
@@ -815,57 +937,30 @@ class CameraInsightFaceSwapperWithMap(nndeploy.dag.Node):
                 centroids.append(map['target']['face'].normed_embedding)
                 faces.append(map['source'])
 
-        simple_map = {'source_faces': faces, 'target_embeddings': centroids}
-        for face in detected_faces:
-            # 判断face是否在source_target_face中
-            # 通过计算人脸嵌入向量的相似度来判断当前检测到的人脸是否匹配目标人脸
-            # 使用余弦相似度或欧几里得距离来衡量人脸特征的相似程度
-            face_matched = False
-            min_distance = float('inf')
-            matched_source_index = -1
-            
-            # 遍历所有目标人脸嵌入向量，寻找最相似的匹配
-            for idx, target_embedding in enumerate(simple_map['target_embeddings']):
-                # 计算当前人脸与目标人脸的欧几里得距离
-                distance = np.linalg.norm(face.normed_embedding - target_embedding)
-                # print(idx, distance)
-                
-                # 如果距离小于阈值，认为是匹配的人脸
-                if distance < self.distance_threshold_ and distance < min_distance:  # 0.6是经验阈值，可根据实际情况调整
-                    face_matched = True
-                    min_distance = distance
-                    matched_source_index = idx
-                    break
-            
-            # 只有匹配到目标人脸时才进行换脸操作
-            if not face_matched:
-                continue
-            
-            closest_centroid_index, _ = find_closest_centroid(
-                            simple_map['target_embeddings'],
-                            face.normed_embedding,
-                        )
-            if closest_centroid_index is not None:
-                swapped_frame = self.swapper.get(swapped_frame, face, simple_map['source_faces'][closest_centroid_index], paste_back=True)
-                if self.mouth_mask_:
-                    face_mask = create_face_mask(face, swapped_frame)
-
-                     # Create the mouth mask
-                    mouth_mask, mouth_cutout, mouth_box, lower_lip_polygon = (
-                        create_lower_mouth_mask(face, swapped_frame, self.mask_down_size_, self.mask_size_)
-                    )
-
-                    # Apply the mouth area
-                    swapped_frame = apply_mouth_area(
-                        swapped_frame, mouth_cutout, mouth_box, face_mask, lower_lip_polygon, self.mask_feather_ratio_
+        matched = []
+        if len(centroids) > 0 and len(detected_faces) > 0:
+            # 当前帧所有人脸与所有目标人脸一次计算: 与任一目标人脸的欧几里得距离小于阈值才换脸
+            # (0.6是经验阈值，可根据实际情况调整)，源人脸取余弦相似度最高的目标人脸对应的源人脸
+            embeddings = np.stack([face.normed_embedding for face in detected_faces]).astype(np.float32)
+            targets = np.asarray(centroids, dtype=np.float32)
+            distances = np.linalg.norm(embeddings[:, None, :] - targets[None, :, :], axis=2)
+            is_matched = np.any(distances < self.distance_threshold_, axis=1)
+            labels, _ = assign_to_centroids(targets, embeddings)
+            for face, ok, label in zip(detected_faces, is_matched.tolist(), labels.tolist()):
+                if ok:
+                    matched.append((face, faces[label]))
+
+        # 当前帧所有匹配的人脸一次批量换脸，输入帧可能被其他节点共享，在拷贝上贴回
+        if len(matched) > 0:
+            swapped_frame = swapped_frame.copy()
+            self.batch_swapper.swap([(swapped_frame, face, source_face) for face, source_face in matched])
+            if self.mouth_mask_:
+                for face, _ in matched:
+                    swapped_frame = apply_mouth_mask(
+                        swapped_frame, face, self.mask_down_size_, self.mask_size_,
+                        self.mask_feather_ratio_, self.show_mouth_mask_box_
                     )
 
-                    if self.show_mouth_mask_box_:
-                        mouth_mask_data = (mouth_mask, mouth_cutout, mouth_box, lower_lip_polygon)
-                        swapped_frame = draw_mouth_mask_visualization(
-                            swapped_frame, face, mouth_mask_data, self.mask_feather_ratio_
-                        )
-
         self.get_output(0).set(swapped_frame)
                 
         return nndeploy.base.Status.ok()
@@ -0,0 +1,256 @@
+import nndeploy.base
+import nndeploy.device
+import nndeploy.dag
+
+import os
+import json
+import collections
+import concurrent.futures
+import cv2
+import numpy as np
+import insightface
+
+from .deep_live_cam import apply_mouth_mask
+from .deep_live_cam import find_cluster_centroids_online, assign_to_centroids
+from .batch_swapper import BatchFaceSwapper
+
+
+class StreamingVideoFaceSwapper(nndeploy.dag.Node):
+    """
+    单遍流式视频换脸
+
+    先用少量采样帧聚类 (或用户提供的参考人脸图片) 确定视频中的人物身份，
+    再对整段视频做一次 解码 -> 检测 -> 身份匹配 -> 换脸 -> 编码，
+    处理中的帧数受 num_workers_ 限制，内存占用与视频长度无关。
+
+    动态输入: 第 i 个输入为身份 i 对应的源人脸 (InsightFaceAnalysis 的输出)，
+    map_ids_[i] 可把第 i 个输入映射到其他身份 id，没有源人脸的身份保持不变。
+    """
+    def __init__(self, name, inputs: list[nndeploy.dag.Edge] = None, outputs: list[nndeploy.dag.Edge] = None):
+        super().__init__(name, inputs, outputs)
+        super().set_key("nndeploy.face.StreamingVideoFaceSwapper")
+        super().set_desc("Streaming Video Face Swapper: sample identities, then swap faces in a single pass")
+        super().set_node_type(nndeploy.dag.NodeType.Output)
+        super().set_io_type(nndeploy.dag.IOType.Video)
+        self.set_dynamic_input(True)
+        self.set_input_type(list[insightface.app.common.Face])
+
+        self.origin_video_path_ = "origin_video_path.mp4"
+        self.video_path_ = "video_path.mp4"
+        self.fourcc_ = "avc1"
+        self.insightface_name_ = "buffalo_l"
+        self.model_path_ = "inswapper_128_fp16.onnx"
+        self.providers_ = ["CPUExecutionProvider"]
+        self.ctx_id = 0
+        self.det_size_ = (640, 640)
+        self.det_thresh_ = 0.5
+        self.sample_frames_ = 64  # 身份采样帧数
+        self.cluster_threshold_ = 0.4
+        self.reference_faces_ = []  # 参考人脸图片路径，非空时跳过采样，第 i 张图即身份 i
+        self.faces_path_ = "resources/images/"  # 保存各身份的人脸缩略图，便于设置 map_ids_
+        self.map_ids_ = [-1]
+        self.min_similarity_ = 0.3  # 与最近身份的余弦相似度低于该值时不换脸 (采样时未出现的人脸)
+        self.num_workers_ = 2  # 检测+换脸的并行帧数
+        self.mouth_mask_ = False
+        self.show_mouth_mask_box_ = False
+        self.mask_down_size_ = 0.5
+        self.mask_feather_ratio_ = 8
+        self.mask_size_ = 1
+
+    def init(self):
+        self.analysis = insightface.app.FaceAnalysis(name=self.insightface_name_, providers=self.providers_)
+        self.analysis.prepare(ctx_id=self.ctx_id, det_size=self.det_size_, det_thresh=self.det_thresh_)
+        self.swapper = insightface.model_zoo.get_model(self.model_path_, providers=self.providers_)
+        self.batch_swapper = BatchFaceSwapper(self.swapper)
+        return nndeploy.base.Status.ok()
+
+    def _sample_identities(self, cap, num_frames):
+        """均匀采样若干帧，聚类得到身份中心，返回 (centroids, 各身份的代表人脸缩略图)"""
+        embeddings = []
+        best = {}
+        samples = []
+        step = max(1, num_frames // max(1, self.sample_frames_))
+        for index in range(0, num_frames, step):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+            ret, frame = cap.read()
+            if not ret:
+                break
+            for face in self.analysis.get(frame):
+                embeddings.append(face.normed_embedding)
+                samples.append((face, frame))
+        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        if len(embeddings) == 0:
+            return np.zeros((0, 512), dtype=np.float32), {}
+
+        # 中心点已归一化，点积即余弦相似度
+        centroids = find_cluster_centroids_online(embeddings, threshold=self.cluster_threshold_)
+        labels, _ = assign_to_centroids(centroids, embeddings)
+        for (face, frame), label in zip(samples, labels):
+            if label not in best or face.det_score > best[label][0].det_score:
+                best[label] = (face, frame)
+        thumbnails = {}
+        for label, (face, frame) in best.items():
+            x_min, y_min, x_max, y_max = face.bbox
+            thumbnails[int(label)] = frame[int(y_min):int(y_max), int(x_min):int(x_max)].copy()
+        return centroids, thumbnails
+
+    def _reference_identities(self):
+        centroids = []
+        thumbnails = {}
+        for i, path in enumerate(self.reference_faces_):
+            image = cv2.imread(path)
+            faces = self.analysis.get(image) if image is not None else []
+            if len(faces) == 0:
+                raise RuntimeError(f"参考人脸图片中未检测到人脸: {path}")
+            face = max(faces, key=lambda f: f.det_score)
+            centroids.append(face.normed_embedding)
+            thumbnails[i] = image
+        return np.asarray(centroids, dtype=np.float32), thumbnails
+
+    def _source_faces(self):
+        sources = {}
+        for i in range(len(self.get_all_input())):
+            faces = self.get_input(i).get(self)
+            if faces is None or len(faces) == 0:
+                continue
+            identity = self.map_ids_[i] if i < len(self.map_ids_) and self.map_ids_[i] != -1 else i
+            sources[identity] = faces[0]
+        return sources
+
+    def _process_frame(self, frame, centroids, sources):
+        faces = self.analysis.get(frame)
+        if len(faces) == 0 or len(centroids) == 0:
+            return frame
+        identities, similarities = assign_to_centroids(centroids, [face.normed_embedding for face in faces])
+        matched = []
+        for face, identity, similarity in zip(faces, identities, similarities):
+            source_face = sources.get(int(identity))
+            if source_face is None or similarity < self.min_similarity_:
+                continue
+            matched.append((face, source_face))
+        # 同一帧内的人脸一次批量换脸
+        self.batch_swapper.swap([(frame, face, source_face) for face, source_face in matched])
+        if self.mouth_mask_:
+            for face, _ in matched:
+                frame = apply_mouth_mask(frame, face, self.mask_down_size_, self.mask_size_,
+                                         self.mask_feather_ratio_, self.show_mouth_mask_box_)
+        return frame
+
+    def _open_writer(self, fps, width, height):
+        try:
+            video_writer = cv2.VideoWriter(self.video_path_, cv2.VideoWriter_fourcc(*self.fourcc_), fps, (width, height))
+            if not video_writer.isOpened():
+                raise Exception("VideoWriter初始化失败")
+        except Exception as e:
+            print(f"使用指定编码器 {self.fourcc_} 失败: {e}")
+            video_writer = cv2.VideoWriter(self.video_path_, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+            if not video_writer.isOpened():
+                video_writer = cv2.VideoWriter(self.video_path_, -1, fps, (width, height))
+        return video_writer
+
+    def run(self):
+        cap = cv2.VideoCapture(self.origin_video_path_)
+        if not cap.isOpened():
+            print(f"无法打开视频文件: {self.origin_video_path_}")
+            return nndeploy.base.Status(nndeploy.base.StatusCode.ErrorInvalidParam)
+        try:
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            num_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+            if len(self.reference_faces_) > 0:
+                centroids, thumbnails = self._reference_identities()
+            else:
+                centroids, thumbnails = self._sample_identities(cap, num_frames)
+            if self.faces_path_ != "":
+                os.makedirs(self.faces_path_, exist_ok=True)
+                for identity, thumbnail in thumbnails.items():
+                    cv2.imwrite(f"{self.faces_path_}/{identity}.jpg", thumbnail)
+            sources = self._source_faces()
+
+            video_writer = self._open_writer(fps, width, height)
+            try:
+                # 解码在当前线程，检测+换脸在线程池中，按提交顺序写出；在途帧数有上限
+                pending = collections.deque()
+                max_pending = max(1, self.num_workers_) * 2
+                with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, self.num_workers_)) as pool:
+                    while True:
+                        ret, frame = cap.read()
+                        if not ret:
+                            break
+                        pending.append(pool.submit(self._process_frame, frame, centroids, sources))
+                        while len(pending) >= max_pending:
+                            video_writer.write(pending.popleft().result())
+                    while pending:
+                        video_writer.write(pending.popleft().result())
+            finally:
+                video_writer.release()
+        finally:
+            cap.release()
+        return nndeploy.base.Status.ok()
+
+    def serialize(self):
+        super().add_required_param("origin_video_path_")
+        super().add_required_param("video_path_")
+        super().add_required_param("model_path_")
+        json_str = super().serialize()
+        json_obj = json.loads(json_str)
+        json_obj["origin_video_path_"] = self.origin_video_path_
+        json_obj["video_path_"] = self.video_path_
+        json_obj["fourcc_"] = self.fourcc_
+        json_obj["insightface_name_"] = self.insightface_name_
+        json_obj["model_path_"] = self.model_path_
+        json_obj["providers_"] = self.providers_
+        json_obj["ctx_id"] = self.ctx_id
+        json_obj["det_thresh_"] = self.det_thresh_
+        json_obj["sample_frames_"] = self.sample_frames_
+        json_obj["cluster_threshold_"] = self.cluster_threshold_
+        json_obj["reference_faces_"] = self.reference_faces_
+        json_obj["faces_path_"] = self.faces_path_
+        json_obj["map_ids_"] = self.map_ids_
+        json_obj["min_similarity_"] = self.min_similarity_
+        json_obj["num_workers_"] = self.num_workers_
+        json_obj["mouth_mask_"] = self.mouth_mask_
+        json_obj["show_mouth_mask_box_"] = self.show_mouth_mask_box_
+        json_obj["mask_down_size_"] = self.mask_down_size_
+        json_obj["mask_feather_ratio_"] = self.mask_feather_ratio_
+        json_obj["mask_size_"] = self.mask_size_
+        return json.dumps(json_obj)
+
+    def deserialize(self, target: str):
+        json_obj = json.loads(target)
+        self.origin_video_path_ = json_obj["origin_video_path_"]
+        self.video_path_ = json_obj["video_path_"]
+        self.fourcc_ = json_obj.get("fourcc_", "avc1")
+        self.insightface_name_ = json_obj.get("insightface_name_", "buffalo_l")
+        self.model_path_ = json_obj["model_path_"]
+        self.providers_ = json_obj.get("providers_", ["CPUExecutionProvider"])
+        self.ctx_id = json_obj.get("ctx_id", 0)
+        self.det_thresh_ = json_obj.get("det_thresh_", 0.5)
+        self.sample_frames_ = json_obj.get("sample_frames_", 64)
+        self.cluster_threshold_ = json_obj.get("cluster_threshold_", 0.4)
+        self.reference_faces_ = json_obj.get("reference_faces_", [])
+        self.faces_path_ = json_obj.get("faces_path_", "resources/images/")
+        self.map_ids_ = json_obj.get("map_ids_", [-1])
+        self.min_similarity_ = json_obj.get("min_similarity_", 0.3)
+        self.num_workers_ = json_obj.get("num_workers_", 2)
+        self.mouth_mask_ = json_obj.get("mouth_mask_", False)
+        self.show_mouth_mask_box_ = json_obj.get("show_mouth_mask_box_", False)
+        self.mask_down_size_ = json_obj.get("mask_down_size_", 0.5)
+        self.mask_feather_ratio_ = json_obj.get("mask_feather_ratio_", 8)
+        self.mask_size_ = json_obj.get("mask_size_", 1)
+        return super().deserialize(target)
+
+
+class StreamingVideoFaceSwapperCreator(nndeploy.dag.NodeCreator):
+    def __init__(self):
+        super().__init__()
+
+    def create_node(self, name: str, inputs: list[nndeploy.dag.Edge], outputs: list[nndeploy.dag.Edge]):
+        self.node = StreamingVideoFaceSwapper(name, inputs, outputs)
+        return self.node
+
+
+streaming_video_face_swapper_node_creator = StreamingVideoFaceSwapperCreator()
+nndeploy.dag.register_node("nndeploy.face.StreamingVideoFaceSwapper", streaming_video_face_swapper_node_creator)
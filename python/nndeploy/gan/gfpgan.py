@@ -1,13 +1,158 @@
 from typing import Any, List
 import gfpgan
 import os
+import cv2
 import numpy as np
 import json
+import torch
 
 import nndeploy.base
 import nndeploy.device
 import nndeploy.dag
 
+
+class GFPGANFaceEnhancer:
+    """
+    只处理人脸区域的 GFPGAN 增强
+
+    已知人脸 5 点关键点时跳过 GFPGANer 内部的人脸检测；多张人脸 (可来自多帧) 对齐后按
+    batch_size 批量推理，贴回时只在每张人脸的包围区域内做反变换与羽化，
+    结果与 GFPGANer.enhance(paste_back=True) 一致 (不使用背景超分时)。
+    """
+    MASK_COLORMAP = [0, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 0, 255, 0, 0, 0]
+
+    def __init__(self, gfpganer, batch_size: int = 4, weight: float = 0.5):
+        self.gfpganer = gfpganer
+        self.face_helper = gfpganer.face_helper
+        self.batch_size = max(1, batch_size)
+        self.weight = weight
+
+    def detect(self, img: np.ndarray) -> list:
+        """用 GFPGANer 的检测器得到 5 点关键点，没有外部人脸信息时使用"""
+        self.face_helper.clean_all()
+        self.face_helper.read_image(img)
+        self.face_helper.get_face_landmarks_5(only_center_face=False, eye_dist_threshold=5)
+        return list(self.face_helper.all_landmarks_5)
+
+    def _align(self, img: np.ndarray, landmark: np.ndarray):
+        affine_matrix = cv2.estimateAffinePartial2D(
+            np.asarray(landmark, dtype=np.float32).reshape(5, 2), self.face_helper.face_template, method=cv2.LMEDS)[0]
+        cropped_face = cv2.warpAffine(img, affine_matrix, self.face_helper.face_size,
+                                      borderMode=cv2.BORDER_CONSTANT, borderValue=(135, 133, 132))
+        return cropped_face, affine_matrix
+
+    @staticmethod
+    def _to_tensor(images: list, device) -> torch.Tensor:
+        # BGR uint8 -> RGB [-1, 1]，与 img2tensor + normalize(0.5, 0.5) 相同
+        batch = np.stack(images)[..., ::-1].astype(np.float32) * (2.0 / 255.0) - 1.0
+        return torch.from_numpy(np.ascontiguousarray(batch.transpose(0, 3, 1, 2))).to(device)
+
+    @torch.no_grad()
+    def _restore(self, cropped_faces: list) -> list:
+        restored = []
+        for start in range(0, len(cropped_faces), self.batch_size):
+            batch = cropped_faces[start:start + self.batch_size]
+            try:
+                output = self.gfpganer.gfpgan(self._to_tensor(batch, self.gfpganer.device),
+                                              return_rgb=False, weight=self.weight)[0]
+                output = ((output.float().clamp(-1, 1) + 1) * 0.5).cpu().numpy()
+                output = (output.transpose(0, 2, 3, 1)[..., ::-1] * 255.0).round().astype(np.uint8)
+                restored.extend(list(output))
+            except RuntimeError as error:
+                print(f'\tFailed inference for GFPGAN: {error}.')
+                restored.extend(batch)
+        return restored
+
+    @torch.no_grad()
+    def _parse_masks(self, restored_faces: list) -> list:
+        masks = []
+        for start in range(0, len(restored_faces), self.batch_size):
+            batch = [cv2.resize(face, (512, 512), interpolation=cv2.INTER_LINEAR)
+                     for face in restored_faces[start:start + self.batch_size]]
+            out = self.face_helper.face_parse(self._to_tensor(batch, self.face_helper.device))[0]
+            out = out.argmax(dim=1).cpu().numpy()
+            for parse, face in zip(out, restored_faces[start:start + self.batch_size]):
+                mask = np.asarray(self.MASK_COLORMAP, dtype=np.float64)[parse]
+                mask = cv2.GaussianBlur(mask, (101, 101), 11)
+                mask = cv2.GaussianBlur(mask, (101, 101), 11)
+                thres = 10
+                mask[:thres, :] = 0
+                mask[-thres:, :] = 0
+                mask[:, :thres] = 0
+                mask[:, -thres:] = 0
+                masks.append(cv2.resize(mask / 255., face.shape[:2]))
+        return masks
+
+    def _paste(self, canvas: np.ndarray, restored_face: np.ndarray, affine_matrix: np.ndarray, parse_mask):
+        upscale = self.face_helper.upscale_factor
+        inverse_affine = cv2.invertAffineTransform(affine_matrix) * upscale
+        if upscale > 1:
+            inverse_affine[:, 2] += 0.5 * upscale
+        face_h, face_w = restored_face.shape[:2]
+        corners = np.array([[0, 0], [face_w, 0], [0, face_h], [face_w, face_h]], dtype=np.float64)
+        corners = corners @ inverse_affine[:, :2].T + inverse_affine[:, 2]
+        # 包围区域外扩腐蚀/模糊半径，区域内的计算结果与整幅图计算相同
+        area = abs(np.linalg.det(inverse_affine[:, :2])) * face_w * face_h
+        pad = int(area ** 0.5) // 20 * 2 + int(2 * upscale) + 4
+        h, w = canvas.shape[:2]
+        x0, y0 = max(0, int(np.floor(corners[:, 0].min())) - pad), max(0, int(np.floor(corners[:, 1].min())) - pad)
+        x1, y1 = min(w, int(np.ceil(corners[:, 0].max())) + pad), min(h, int(np.ceil(corners[:, 1].max())) + pad)
+        if x1 <= x0 or y1 <= y0:
+            return
+        inverse_affine[0, 2] -= x0
+        inverse_affine[1, 2] -= y0
+        roi_size = (x1 - x0, y1 - y0)
+
+        inv_restored = cv2.warpAffine(restored_face, inverse_affine, roi_size)
+        if parse_mask is not None:
+            inv_soft_mask = cv2.warpAffine(parse_mask, inverse_affine, roi_size, flags=3)[:, :, None]
+            pasted_face = inv_restored
+        else:
+            inv_mask = cv2.warpAffine(np.ones((face_h, face_w), dtype=np.float32), inverse_affine, roi_size)
+            inv_mask_erosion = cv2.erode(inv_mask, np.ones((int(2 * upscale), int(2 * upscale)), np.uint8))
+            pasted_face = inv_mask_erosion[:, :, None] * inv_restored
+            w_edge = int(np.sum(inv_mask_erosion) ** 0.5) // 20
+            inv_mask_center = cv2.erode(inv_mask_erosion, np.ones((w_edge * 2, w_edge * 2), np.uint8))
+            inv_soft_mask = cv2.GaussianBlur(inv_mask_center, (w_edge * 2 + 1, w_edge * 2 + 1), 0)[:, :, None]
+        roi = canvas[y0:y1, x0:x1]
+        roi[...] = (inv_soft_mask * pasted_face + (1 - inv_soft_mask) * roi).astype(np.uint8)
+
+    def enhance_batch(self, images: list, landmarks: list) -> list:
+        """
+        images: BGR uint8 图像列表; landmarks: 每张图像的人脸 5 点关键点列表 (None 表示检测)
+        返回增强后的新图像列表 (upscale > 1 时为放大后的尺寸)
+        """
+        crops, matrices, owners = [], [], []
+        for i, (img, points) in enumerate(zip(images, landmarks)):
+            if points is None:
+                points = self.detect(img)
+            for landmark in points:
+                cropped_face, affine_matrix = self._align(img, landmark)
+                crops.append(cropped_face)
+                matrices.append(affine_matrix)
+                owners.append(i)
+
+        upscale = self.face_helper.upscale_factor
+        outputs = []
+        for img in images:
+            if upscale == 1:
+                outputs.append(img.copy())
+            else:
+                h, w = img.shape[:2]
+                outputs.append(cv2.resize(img, (int(w * upscale), int(h * upscale)), interpolation=cv2.INTER_LANCZOS4))
+        if len(crops) == 0:
+            return outputs
+
+        restored = self._restore(crops)
+        parse_masks = self._parse_masks(restored) if self.face_helper.use_parse else [None] * len(restored)
+        for owner, restored_face, affine_matrix, parse_mask in zip(owners, restored, matrices, parse_masks):
+            self._paste(outputs[owner], restored_face, affine_matrix, parse_mask)
+        return outputs
+
+    def enhance(self, img: np.ndarray, landmarks: list = None) -> np.ndarray:
+        return self.enhance_batch([img], [landmarks])[0]
+
+
 class GFPGAN(nndeploy.dag.Node):
     def __init__(self, name, inputs: list[nndeploy.dag.Edge] = None, outputs: list[nndeploy.dag.Edge] = None):
         super().__init__(name, inputs, outputs)
@@ -18,18 +163,20 @@ class GFPGAN(nndeploy.dag.Node):
         
         self.model_path_ = "GFPGANv1.4.pth"
         self.upscale_ = 1
+        self.batch_size_ = 4
         self.device_, _ = nndeploy.base.get_available_device()
         
         # print(self.device_)
         
     def init(self):
         self.gfpgan = gfpgan.GFPGANer(self.model_path_, upscale=self.upscale_, device=self.device_)
+        self.enhancer = GFPGANFaceEnhancer(self.gfpgan, self.batch_size_)
         return nndeploy.base.Status.ok()
         
     def run(self):
         input_edge = self.get_input(0)
         input_numpy = input_edge.get(self)
-        _, _, self.temp_frame = self.gfpgan.enhance(input_numpy, paste_back=True)
+        self.temp_frame = self.enhancer.enhance(input_numpy)
         self.get_output(0).set(self.temp_frame)
         return nndeploy.base.Status.ok()
     
@@ -39,12 +186,14 @@ class GFPGAN(nndeploy.dag.Node):
         json_obj = json.loads(json_str)
         json_obj["model_path_"] = self.model_path_
         json_obj["upscale_"] = self.upscale_
+        json_obj["batch_size_"] = self.batch_size_
         return json.dumps(json_obj)
     
     def deserialize(self, target: str):
         json_obj = json.loads(target)
         self.model_path_ = json_obj["model_path_"]
         self.upscale_ = json_obj["upscale_"]
+        self.batch_size_ = json_obj.get("batch_size_", 4)
         return super().deserialize(target)
     
     
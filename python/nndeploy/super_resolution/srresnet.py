@@ -24,8 +24,29 @@ class SRResNet(nndeploy.dag.Node):
         self.model = None
         self.output_frame = None
         self.use_bicubic_fallback_ = True
+        self.fuse_bn_ = False  # CPU 部署: 融合 Conv+BN
+        self.channels_last_ = False  # CPU 部署: channels-last 布局
+        self.prepared_model_path_ = None  # srresnet_prepare 保存的 TorchScript 模型 (FP16/INT8)
+        self.input_half_ = False
         
     def init(self):
+        if self.prepared_model_path_ and os.path.exists(self.prepared_model_path_):
+            try:
+                import torch
+                from nndeploy.super_resolution.srresnet_prepare import load_prepared_model
+                self.model = load_prepared_model(self.prepared_model_path_)
+                meta = self.model.nndeploy_prepare_meta_
+                self.device_ = "cpu"
+                self.channels_last_ = meta.get("channels_last", False)
+                self.input_half_ = meta.get("precision") == "fp16"
+                self.use_bicubic_fallback_ = False
+                self.torch = torch
+                print(f"✓ SRResNet 加载准备后的模型: {self.prepared_model_path_} {meta}")
+                return nndeploy.base.Status.ok()
+            except Exception as e:
+                print(f"SRResNet 加载准备后的模型失败: {e}")
+                return nndeploy.base.Status(nndeploy.base.StatusCode.ErrorInvalidParam)
+        
         try:
             import torch
             import torch.nn as nn
@@ -124,19 +145,24 @@ class SRResNet(nndeploy.dag.Node):
             
             if self.model is not None:
                 self.model.eval()
+                if self.fuse_bn_:
+                    from nndeploy.super_resolution.srresnet_prepare import fuse_conv_bn
+                    fuse_conv_bn(self.model)
+                if self.channels_last_:
+                    self.model = self.model.to(memory_format=torch.channels_last)
             self.torch = torch
             
             return nndeploy.base.Status.ok()
         except Exception as e:
             print(f"SRResNet 初始化失败: {e}")
-            return nndeploy.base.Status(nndeploy.base.StatusCode.kStatusCodeErrorInvalidParam)
+            return nndeploy.base.Status(nndeploy.base.StatusCode.ErrorInvalidParam)
         
     def run(self):
         input_edge = self.get_input(0)
         input_numpy = input_edge.get(self)
         
         if input_numpy is None or input_numpy.size == 0:
-            return nndeploy.base.Status(nndeploy.base.StatusCode.kStatusCodeErrorInvalidParam)
+            return nndeploy.base.Status(nndeploy.base.StatusCode.ErrorInvalidParam)
         
         try:
             if self.use_bicubic_fallback_ and self.model is None:
@@ -155,11 +181,15 @@ class SRResNet(nndeploy.dag.Node):
             img = img.astype(np.float32) / 255.0
             img_tensor = self.torch.from_numpy(img).permute(2, 0, 1).unsqueeze(0)
             img_tensor = img_tensor.to(self.torch.device(self.device_))
+            if self.channels_last_:
+                img_tensor = img_tensor.contiguous(memory_format=self.torch.channels_last)
+            if self.input_half_:
+                img_tensor = img_tensor.half()
             
             with self.torch.no_grad():
                 output_tensor = self.model(img_tensor)
             
-            self.output_frame = output_tensor.squeeze(0).permute(1, 2, 0).cpu().numpy()
+            self.output_frame = output_tensor.squeeze(0).permute(1, 2, 0).float().cpu().numpy()
             self.output_frame = np.clip(self.output_frame * 255.0, 0, 255).astype(np.uint8)
             self.output_frame = cv2.cvtColor(self.output_frame, cv2.COLOR_RGB2BGR)
             
@@ -181,7 +211,7 @@ class SRResNet(nndeploy.dag.Node):
                 self.get_output(0).set(self.output_frame)
                 return nndeploy.base.Status.ok()
             except Exception as e2:
-                return nndeploy.base.Status(nndeploy.base.StatusCode.kStatusCodeErrorInvalidParam)
+                return nndeploy.base.Status(nndeploy.base.StatusCode.ErrorInvalidParam)
     
     def serialize(self):
         json_str = super().serialize()
@@ -191,6 +221,9 @@ class SRResNet(nndeploy.dag.Node):
         json_obj["num_features_"] = self.num_features_
         json_obj["num_blocks_"] = self.num_blocks_
         json_obj["use_bicubic_fallback_"] = self.use_bicubic_fallback_
+        json_obj["fuse_bn_"] = self.fuse_bn_
+        json_obj["channels_last_"] = self.channels_last_
+        json_obj["prepared_model_path_"] = self.prepared_model_path_
         return json.dumps(json_obj)
     
     def deserialize(self, target: str):
@@ -200,6 +233,9 @@ class SRResNet(nndeploy.dag.Node):
         self.num_features_ = json_obj.get("num_features_", 32)
         self.num_blocks_ = json_obj.get("num_blocks_", 8)
         self.use_bicubic_fallback_ = json_obj.get("use_bicubic_fallback_", True)
+        self.fuse_bn_ = json_obj.get("fuse_bn_", False)
+        self.channels_last_ = json_obj.get("channels_last_", False)
+        self.prepared_model_path_ = json_obj.get("prepared_model_path_", None)
         return super().deserialize(target)
     
     
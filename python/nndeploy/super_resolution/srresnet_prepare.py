@@ -0,0 +1,216 @@
+# SRResNet-lite CPU 部署准备
+# Conv+BN 融合、FP16 / INT8 静态量化、channels-last 布局，以及准备后模型的保存/加载与精度速度评测
+
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+import torch
+import torch.nn as nn
+
+PRECISIONS = ("fp32", "fp16", "int8")
+
+# torch.jit.save 的附加文件名，记录准备参数，加载时据此恢复输入布局/精度
+_META_FILE = "srresnet_prepare.json"
+
+
+def fuse_conv_bn(model: nn.Module) -> nn.Module:
+    """
+    原地融合 SRResNet-lite 中的 Conv+BN
+
+    按命名约定配对: bn1 -> conv1, bn2 -> conv2, bn_mid -> conv_mid,
+    融合后 BN 替换为 nn.Identity，模型须处于 eval 模式
+
+    Args:
+        model: SRResNetLite 模型
+
+    Returns:
+        融合后的模型 (与输入为同一对象)
+    """
+    from torch.nn.utils.fusion import fuse_conv_bn_eval
+
+    model.eval()
+    for module in list(model.modules()):
+        for name, child in list(module.named_children()):
+            if not isinstance(child, nn.BatchNorm2d) or not name.startswith("bn"):
+                continue
+            conv = getattr(module, "conv" + name[2:], None)
+            if not isinstance(conv, nn.Conv2d):
+                continue
+            setattr(module, "conv" + name[2:], fuse_conv_bn_eval(conv, child))
+            setattr(module, name, nn.Identity())
+    return model
+
+
+def frame_to_tensor(frame: np.ndarray, channels_last: bool = False) -> torch.Tensor:
+    """BGR uint8 帧 -> 1x3xHxW float32 张量 (RGB, 0~1)"""
+    img = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    img = img.astype(np.float32) / 255.0
+    tensor = torch.from_numpy(img).permute(2, 0, 1).unsqueeze(0)
+    if channels_last:
+        tensor = tensor.contiguous(memory_format=torch.channels_last)
+    return tensor
+
+
+def tensor_to_frame(tensor: torch.Tensor) -> np.ndarray:
+    """1x3xHxW 张量 -> BGR uint8 帧"""
+    img = tensor.squeeze(0).permute(1, 2, 0).float().cpu().numpy()
+    img = np.clip(img * 255.0, 0, 255).astype(np.uint8)
+    return cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+
+
+def _quantize_int8(model: nn.Module, calib_frames, channels_last: bool) -> nn.Module:
+    """FX 图模式静态 INT8 量化，使用校准帧统计激活范围"""
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    if not calib_frames:
+        raise ValueError("INT8 静态量化需要校准帧 (calib_frames)")
+
+    backend = "x86" if "x86" in torch.backends.quantized.supported_engines else "fbgemm"
+    if backend not in torch.backends.quantized.supported_engines:
+        backend = "qnnpack"
+    torch.backends.quantized.engine = backend
+
+    example = frame_to_tensor(calib_frames[0], channels_last)
+    prepared = prepare_fx(model, get_default_qconfig_mapping(backend), (example,))
+    with torch.no_grad():
+        for frame in calib_frames:
+            prepared(frame_to_tensor(frame, channels_last))
+    return convert_fx(prepared)
+
+
+def prepare_srresnet_lite(model: nn.Module, precision: str = "fp32", fuse_bn: bool = True,
+                          channels_last: bool = False, calib_frames=None) -> nn.Module:
+    """
+    为 CPU 推理准备 SRResNet-lite 模型
+
+    Args:
+        model: FP32 的 SRResNetLite 模型 (会被原地修改)
+        precision: 'fp32' / 'fp16' / 'int8' (int8 为静态量化，需要 calib_frames)
+        fuse_bn: 是否融合 Conv+BN
+        channels_last: 是否使用 channels-last 内存布局
+        calib_frames: INT8 校准用的 BGR 帧列表
+
+    Returns:
+        准备后的模型
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"不支持的精度: {precision}, 可选 {PRECISIONS}")
+
+    model = model.cpu().eval()
+    if fuse_bn or precision == "int8":
+        # 量化前必须融合 BN，否则 BN 会作为单独的量化算子保留
+        fuse_conv_bn(model)
+    if channels_last:
+        model = model.to(memory_format=torch.channels_last)
+
+    if precision == "fp16":
+        model = model.half()
+    elif precision == "int8":
+        model = _quantize_int8(model, calib_frames, channels_last)
+
+    model.nndeploy_prepare_meta_ = {
+        "precision": precision,
+        "fuse_bn": bool(fuse_bn or precision == "int8"),
+        "channels_last": bool(channels_last),
+    }
+    return model
+
+
+def run_prepared(model, frame: np.ndarray) -> np.ndarray:
+    """使用准备后的模型 (nn.Module 或 TorchScript) 处理单帧 BGR 图像"""
+    meta = getattr(model, "nndeploy_prepare_meta_", {})
+    tensor = frame_to_tensor(frame, meta.get("channels_last", False))
+    if meta.get("precision") == "fp16":
+        tensor = tensor.half()
+    with torch.no_grad():
+        output = model(tensor)
+    return tensor_to_frame(output)
+
+
+def save_prepared_model(model, path: str, example_frame: np.ndarray):
+    """
+    以 TorchScript 格式保存准备后的模型，准备参数写入附加文件
+
+    Args:
+        model: prepare_srresnet_lite 的返回值
+        path: 保存路径 (.pt)
+        example_frame: 用于 trace 的示例 BGR 帧
+    """
+    meta = getattr(model, "nndeploy_prepare_meta_", {"precision": "fp32", "fuse_bn": False,
+                                                     "channels_last": False})
+    example = frame_to_tensor(example_frame, meta["channels_last"])
+    if meta["precision"] == "fp16":
+        example = example.half()
+    with torch.no_grad():
+        scripted = torch.jit.freeze(torch.jit.trace(model, example).eval())
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    torch.jit.save(scripted, path, _extra_files={_META_FILE: json.dumps(meta)})
+
+
+def load_prepared_model(path: str):
+    """加载 save_prepared_model 保存的模型，返回可直接传给 run_prepared 的对象"""
+    extra_files = {_META_FILE: ""}
+    model = torch.jit.load(path, map_location="cpu", _extra_files=extra_files)
+    meta = extra_files[_META_FILE]
+    if isinstance(meta, bytes):
+        meta = meta.decode("utf-8")
+    model.nndeploy_prepare_meta_ = json.loads(meta) if meta else {}
+    return model
+
+
+def psnr(reference: np.ndarray, target: np.ndarray) -> float:
+    """两帧之间的 PSNR (dB)，完全一致时返回 inf"""
+    mse = np.mean((reference.astype(np.float64) - target.astype(np.float64)) ** 2)
+    if mse == 0:
+        return float("inf")
+    return float(10.0 * np.log10(255.0 ** 2 / mse))
+
+
+def benchmark_prepared(reference_model, variants: dict, frames, warmup: int = 2):
+    """
+    对比各准备方案相对 FP32 参考模型的速度与精度
+
+    Args:
+        reference_model: 未做任何准备的 FP32 模型
+        variants: {名称: 准备后的模型}
+        frames: BGR 帧列表
+        warmup: 预热帧数 (不计时)
+
+    Returns:
+        [{"name", "fps", "ms_per_frame", "psnr"}]，fp32 参考项 psnr 为 inf；
+        运行失败的方案 (如 CPU 不支持的 FP16 算子) 只有 {"name", "error"}
+    """
+    def _timed(model):
+        for frame in frames[:warmup]:
+            run_prepared(model, frame)
+        outputs = []
+        start = time.perf_counter()
+        for frame in frames:
+            outputs.append(run_prepared(model, frame))
+        elapsed = time.perf_counter() - start
+        return outputs, elapsed
+
+    reference_outputs, reference_time = _timed(reference_model)
+    report = [{
+        "name": "fp32",
+        "fps": len(frames) / reference_time,
+        "ms_per_frame": reference_time * 1000.0 / len(frames),
+        "psnr": float("inf"),
+    }]
+    for name, model in variants.items():
+        try:
+            outputs, elapsed = _timed(model)
+        except Exception as e:
+            report.append({"name": name, "error": str(e)})
+            continue
+        report.append({
+            "name": name,
+            "fps": len(frames) / elapsed,
+            "ms_per_frame": elapsed * 1000.0 / len(frames),
+            "psnr": float(np.mean([psnr(r, o) for r, o in zip(reference_outputs, outputs)])),
+        })
+    return report
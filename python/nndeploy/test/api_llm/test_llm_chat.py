@@ -0,0 +1,190 @@
+import os
+import json
+import time
+import tempfile
+import unittest
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from nndeploy.api_llm.llm_chat import LLMParams, call_llm, call_llm_batch
+from nndeploy.api_llm.response_cache import LLMResponseCache
+
+"""
+在本地桩服务上测试 call_llm 的连接复用 (keep-alive)、并发请求与响应缓存
+
+python3 -m unittest nndeploy/test/api_llm/test_llm_chat.py
+"""
+
+
+class _StubState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connections = set()
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.delay_s = 0.0
+        self.fail_first = 0
+        self.cookies = []
+        self.stream_done = True  # 流式回复是否以 data: [DONE] 结束
+
+
+def _make_handler(state: _StubState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            with state.lock:
+                state.connections.add(self.client_address)
+                state.requests += 1
+                state.cookies.append(self.headers.get("Cookie"))
+                state.in_flight += 1
+                state.max_in_flight = max(state.max_in_flight, state.in_flight)
+                rate_limited = state.fail_first > 0
+                if rate_limited:
+                    state.fail_first -= 1
+            time.sleep(state.delay_s)
+            with state.lock:
+                state.in_flight -= 1
+            if rate_limited:
+                self._reply(429, {"error": "rate limited"}, {"Retry-After": "0"})
+                return
+            content = "echo: " + body["messages"][-1]["content"]
+            if body.get("stream"):
+                self._reply_stream(content.split(" "))
+                return
+            self._reply(200, {"choices": [{"message": {"role": "assistant", "content": content}}]},
+                        {"Set-Cookie": "session=" + content.replace(" ", "_")})
+
+        def _reply_stream(self, pieces):
+            lines = [json.dumps({"choices": [{"delta": {"content": piece}}]}) for piece in pieces]
+            if state.stream_done:
+                lines.append("[DONE]")
+            data = "".join(f"data: {line}\n\n" for line in lines).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _reply(self, code, obj, headers=None):
+            data = json.dumps(obj).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+class TestLLMChatHttp(unittest.TestCase):
+    def setUp(self):
+        self.state = _StubState()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(self.state))
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.params = LLMParams(api_base=f"http://127.0.0.1:{self.server.server_port}", retry=2,
+                                retry_backoff_s=0.01)
+        self.kwargs = {"api_key_override": "test-key", "proxies": {}, "verify": True,
+                       "emit_usage_to_log": False}
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connection_reuse(self):
+        for i in range(5):
+            text = call_llm(self.params, [{"role": "user", "content": f"hi {i}"}], **self.kwargs)
+            self.assertEqual(text, f"echo: hi {i}")
+        self.assertEqual(self.state.requests, 5)
+        # 顺序调用共用同一条 keep-alive 连接
+        self.assertEqual(len(self.state.connections), 1)
+
+    def test_batch_concurrency(self):
+        self.state.delay_s = 0.2
+        messages_list = [[{"role": "user", "content": f"q{i}"}] for i in range(8)]
+        results = call_llm_batch(self.params, messages_list, max_concurrency=4, **self.kwargs)
+        self.assertEqual(results, [f"echo: q{i}" for i in range(8)])
+        self.assertLessEqual(self.state.max_in_flight, 4)
+        # 并发请求的连接在之后的调用中复用，不会每次新建
+        connections = len(self.state.connections)
+        call_llm_batch(self.params, messages_list, max_concurrency=4, **self.kwargs)
+        self.assertEqual(len(self.state.connections), connections)
+
+    def test_no_shared_cookies(self):
+        # 共享 Session 不会把服务端下发给前一个调用方的 cookie 带到后续请求上
+        for i in range(3):
+            call_llm(self.params, [{"role": "user", "content": f"c{i}"}], **self.kwargs)
+        self.assertEqual(self.state.cookies, [None, None, None])
+
+    def test_retry_after_429(self):
+        self.state.fail_first = 1
+        text = call_llm(self.params, [{"role": "user", "content": "again"}], **self.kwargs)
+        self.assertEqual(text, "echo: again")
+        self.assertEqual(self.state.requests, 2)
+
+
+    def test_response_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = LLMResponseCache(directory)
+            messages = [{"role": "user", "content": "cached"}]
+            params = LLMParams(api_base=self.params.api_base, temperature=0.0)
+            first = call_llm(params, messages, cache=cache, **self.kwargs)
+            second = call_llm(params, messages, cache=cache, **self.kwargs)
+            self.assertEqual(first, second)
+            self.assertEqual(self.state.requests, 1)
+
+            # temperature > 0 默认不走缓存，cache_force 时缓存
+            sampled = LLMParams(api_base=self.params.api_base, temperature=0.7)
+            call_llm(sampled, messages, cache=cache, **self.kwargs)
+            call_llm(sampled, messages, cache=cache, **self.kwargs)
+            self.assertEqual(self.state.requests, 3)
+            call_llm(sampled, messages, cache=cache, cache_force=True, **self.kwargs)
+            call_llm(sampled, messages, cache=cache, cache_force=True, **self.kwargs)
+            self.assertEqual(self.state.requests, 4)
+
+            # 不同的 max_tokens 是不同的请求
+            call_llm(LLMParams(api_base=self.params.api_base, temperature=0.0, max_tokens=16), messages,
+                     cache=cache, **self.kwargs)
+            self.assertEqual(self.state.requests, 5)
+
+    def test_stream_cache_requires_done(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = LLMResponseCache(directory)
+            messages = [{"role": "user", "content": "streamed"}]
+            params = LLMParams(api_base=self.params.api_base, temperature=0.0, stream=True)
+            # 没有 [DONE] 的流可能被截断，不缓存
+            self.state.stream_done = False
+            call_llm(params, messages, cache=cache, **self.kwargs)
+            call_llm(params, messages, cache=cache, **self.kwargs)
+            self.assertEqual(self.state.requests, 2)
+            self.state.stream_done = True
+            self.assertEqual(call_llm(params, messages, cache=cache, **self.kwargs), "echo:streamed")
+            self.assertEqual(call_llm(params, messages, cache=cache, **self.kwargs), "echo:streamed")
+            self.assertEqual(self.state.requests, 3)
+
+    def test_response_cache_eviction(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = LLMResponseCache(directory, max_bytes=1024, ttl_s=0.2)
+            for i in range(20):
+                cache.put(f"key{i}", "x" * 100)
+            self.assertLessEqual(cache.get_stats()["bytes"], 1024)
+            self.assertIsNone(cache.get("key0"))
+            self.assertEqual(cache.get("key19")[0], "x" * 100)
+            self.assertEqual(len(os.listdir(directory)), cache.get_stats()["entries"])
+            # 重新打开目录时恢复索引
+            self.assertEqual(LLMResponseCache(directory, max_bytes=1024).get_stats()["entries"],
+                             cache.get_stats()["entries"])
+            time.sleep(0.3)
+            self.assertIsNone(cache.get("key19"))
+
+
+if __name__ == "__main__":
+    unittest.main()
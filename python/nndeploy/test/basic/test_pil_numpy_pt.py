@@ -0,0 +1,157 @@
+import unittest
+
+import numpy as np
+import torch
+from PIL import Image
+
+from nndeploy.basic.pil_numpy_pt import (PILImage2Numpy, Numpy2PILImage, PILImage2Pt, Pt2PILImage,
+                                         Numpy2Pt, Pt2Numpy)
+
+"""
+测试 PIL / numpy / torch 转换链: init 时按输出边的消费者决定是否融合，
+融合与不融合时结果一致，输出可写且不与上游数据混用
+
+python3 -m unittest nndeploy/test/basic/test_pil_numpy_pt.py
+"""
+
+
+class FakeEdge:
+    """代替图中的边，只提供转换节点用到的接口; 消费者为 None 表示图输出"""
+    def __init__(self):
+        self.data = None
+        self.consumers = []
+
+    def get(self, node=None):
+        return self.data
+
+    def set(self, data):
+        self.data = data
+
+    def get_consumers(self):
+        return self.consumers
+
+
+def connect(node, inputs, outputs):
+    for edge in inputs:
+        edge.consumers.append(node)
+    node.get_input = lambda index=0: inputs[index]
+    node.get_output = lambda index=0: outputs[index]
+    node.get_all_output = lambda: outputs
+
+
+def run_chain(chain, obj, fuse):
+    """构建线性链 (最后一条边为图输出)，init 后逐个 run，返回链的输出"""
+    edges = [FakeEdge() for _ in range(len(chain) + 1)]
+    edges[-1].consumers.append(None)
+    nodes = []
+    for i, node_type in enumerate(chain):
+        node = node_type(f"node_{i}")
+        node.fuse = fuse
+        connect(node, [edges[i]], [edges[i + 1]])
+        nodes.append(node)
+    for node in nodes:
+        node.init()
+    edges[0].set(obj)
+    for node in nodes:
+        node.run()
+    return edges[-1].get()
+
+
+def as_numpy(obj):
+    if isinstance(obj, torch.Tensor):
+        return obj.numpy()
+    return np.array(obj)
+
+
+class TestConversionChain(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.pixels = rng.integers(0, 255, (32, 24, 3), dtype=np.uint8)
+        self.image = Image.fromarray(self.pixels)
+        self.array = rng.random((8, 6), dtype=np.float32)
+
+    def test_fused_matches_unfused(self):
+        chains = [
+            ([PILImage2Numpy, Numpy2Pt, Pt2Numpy], self.image),
+            ([PILImage2Pt, Pt2Numpy, Numpy2PILImage], self.image),
+            ([PILImage2Numpy, Numpy2PILImage], self.image),
+            ([Numpy2Pt, Pt2PILImage], self.array),
+            ([Pt2Numpy, Numpy2PILImage], torch.from_numpy(self.array)),
+            ([Numpy2PILImage, PILImage2Pt], self.array),
+        ]
+        for chain, obj in chains:
+            with self.subTest(chain=[node_type.__name__ for node_type in chain]):
+                fused = run_chain(chain, obj, True)
+                unfused = run_chain(chain, obj, False)
+                self.assertIs(type(fused), type(unfused))
+                np.testing.assert_array_equal(as_numpy(fused), as_numpy(unfused))
+
+    def test_pil_to_numpy_writable(self):
+        for fuse in (False, True):
+            for chain in ([PILImage2Numpy], [PILImage2Numpy, Numpy2Pt, Pt2Numpy]):
+                with self.subTest(fuse=fuse, chain=[node_type.__name__ for node_type in chain]):
+                    array = run_chain(chain, self.image, fuse)
+                    np.testing.assert_array_equal(array, self.pixels)
+                    self.assertTrue(array.flags.writeable)
+                    # 下游原地修改不影响上游的图像
+                    array[0, 0] = 255 - array[0, 0]
+                    np.testing.assert_array_equal(np.array(self.image), self.pixels)
+
+    def test_pil_round_trip_not_aliased(self):
+        for fuse in (False, True):
+            with self.subTest(fuse=fuse):
+                image = run_chain([PILImage2Numpy, Numpy2PILImage], self.image, fuse)
+                self.assertIsNot(image, self.image)
+                np.testing.assert_array_equal(np.array(image), self.pixels)
+                image.putpixel((0, 0), (0, 0, 0))
+                np.testing.assert_array_equal(np.array(self.image), self.pixels)
+
+    def test_numpy_torch_shares_memory(self):
+        # numpy <-> torch 在 cpu 上与逐节点执行一样共享内存
+        for fuse in (False, True):
+            with self.subTest(fuse=fuse):
+                array = run_chain([Numpy2Pt, Pt2Numpy], self.array, fuse)
+                self.assertTrue(np.shares_memory(array, self.array))
+
+
+class TestConversionFusion(unittest.TestCase):
+    def _forward_only(self, node_type, consumers, num_outputs=1):
+        node = node_type("node")
+        outputs = [FakeEdge() for _ in range(num_outputs)]
+        outputs[0].consumers.extend(consumers)
+        connect(node, [FakeEdge()], outputs)
+        node.init()
+        return node.forward_only
+
+    def test_fused_when_only_consumer_is_conversion(self):
+        self.assertTrue(self._forward_only(PILImage2Numpy, [Numpy2Pt("consumer")]))
+        self.assertTrue(self._forward_only(Numpy2Pt, [Pt2PILImage("consumer")]))
+
+    def test_not_fused(self):
+        unfused_consumer = Pt2Numpy("consumer")
+        unfused_consumer.fuse = False
+        cases = {
+            "graph_output": (Numpy2Pt, [Pt2Numpy("consumer"), None], 1),
+            "only_graph_output": (Numpy2Pt, [None], 1),
+            "multiple_consumers": (Numpy2Pt, [Pt2Numpy("a"), Pt2Numpy("b")], 1),
+            "non_conversion_consumer": (Numpy2Pt, [object()], 1),
+            "consumer_fuse_disabled": (Numpy2Pt, [unfused_consumer], 1),
+            "lossy_node": (Numpy2PILImage, [PILImage2Numpy("consumer")], 1),
+            "multiple_outputs": (Numpy2Pt, [Pt2Numpy("consumer")], 2),
+        }
+        for name, (node_type, consumers, num_outputs) in cases.items():
+            with self.subTest(name):
+                self.assertFalse(self._forward_only(node_type, consumers, num_outputs))
+
+    def test_fuse_disabled(self):
+        node = Numpy2Pt("node")
+        node.fuse = False
+        output = FakeEdge()
+        output.consumers.append(Pt2Numpy("consumer"))
+        connect(node, [FakeEdge()], [output])
+        node.init()
+        self.assertFalse(node.forward_only)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+# 对比合成节点的逐帧开销 (1080p / 4K)
+# 逐帧新建画布的旧实现 vs 持久画布 + 原地 resize 的 compose()
+#
+# python3 nndeploy/test/benchmark/compare_composite_benchmark.py
+
+import time
+
+import cv2
+import numpy as np
+
+import nndeploy.codec
+from nndeploy.codec.side_by_side_compare import SideBySideCompare
+from nndeploy.codec.detail_zoom_compare import DetailZoomCompare
+
+count = 100
+
+
+def side_by_side_per_frame_alloc(frame_original, frame_enhanced, target_height=720, title_height=40):
+    """旧实现: 每帧 resize 出新图、新建标题画布、vstack/hstack 拼接"""
+    h1, w1 = frame_original.shape[:2]
+    h2, w2 = frame_enhanced.shape[:2]
+    new_w1 = int(w1 * target_height / h1)
+    new_w2 = int(w2 * target_height / h2)
+    left_img = cv2.resize(frame_original, (new_w1, target_height))
+    right_img = cv2.resize(frame_enhanced, (new_w2, target_height))
+    left_canvas = np.zeros((target_height + title_height, new_w1, 3), dtype=np.uint8)
+    right_canvas = np.zeros((target_height + title_height, new_w2, 3), dtype=np.uint8)
+    left_canvas[:title_height] = (40, 40, 40)
+    right_canvas[:title_height] = (40, 40, 40)
+    cv2.putText(left_canvas, f"Original ({w1}x{h1})", (10, 28), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+    cv2.putText(right_canvas, f"Enhanced ({w2}x{h2})", (10, 28), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+    left_canvas[title_height:, :] = left_img
+    right_canvas[title_height:, :] = right_img
+    combined = np.hstack([left_canvas, right_canvas])
+    cv2.putText(combined, "FPS: 30.0", (combined.shape[1] - 150, 28), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+    return combined
+
+
+def detail_zoom_per_frame_alloc(frame_original, frame_enhanced, zoom=4, roi_size=200):
+    """旧实现: 每帧拷贝原图、新建中/右画布并 hstack"""
+    h1, w1 = frame_original.shape[:2]
+    h2, w2 = frame_enhanced.shape[:2]
+    cx, cy, half = int(w1 * 0.3), int(h1 * 0.3), roi_size // 2
+    x1, y1, x2, y2 = max(0, cx - half), max(0, cy - half), min(w1, cx + half), min(h1, cy + half)
+    roi = frame_original[y1:y2, x1:x2]
+    zw, zh = roi.shape[1] * zoom, roi.shape[0] * zoom
+    zoomed_o = cv2.resize(roi, (zw, zh), interpolation=cv2.INTER_NEAREST)
+    s = w2 / w1
+    zoomed_e = cv2.resize(frame_enhanced[int(y1 * s):int(y2 * s), int(x1 * s):int(x2 * s)], (zw, zh),
+                          interpolation=cv2.INTER_NEAREST)
+    display_h = max(h1, h2, zh)
+    left = frame_original.copy()
+    cv2.rectangle(left, (x1, y1), (x2, y2), (0, 255, 0), 2)
+    middle = np.zeros((display_h, zw, 3), dtype=np.uint8)
+    middle[:zh] = zoomed_o
+    right = np.zeros((display_h, zw, 3), dtype=np.uint8)
+    right[:zh] = zoomed_e
+    if left.shape[0] != display_h:
+        canvas = np.zeros((display_h, w1, 3), dtype=np.uint8)
+        canvas[:h1] = left
+        left = canvas
+    return np.hstack([left, middle, right])
+
+
+def bench(fn, *args):
+    for _ in range(5):
+        fn(*args)
+    start = time.perf_counter()
+    for _ in range(count):
+        fn(*args)
+    return (time.perf_counter() - start) * 1000.0 / count
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    for label, (h, w) in [("1080p", (1080, 1920)), ("4K", (2160, 3840))]:
+        # 原图为输出的一半分辨率 (2x 超分对比)
+        original = rng.integers(0, 255, (h // 2, w // 2, 3), dtype=np.uint8)
+        enhanced = rng.integers(0, 255, (h, w, 3), dtype=np.uint8)
+
+        side = SideBySideCompare("side_by_side")
+        zoom = DetailZoomCompare("detail_zoom")
+
+        t_side_old = bench(side_by_side_per_frame_alloc, original, enhanced)
+        t_side_new = bench(side.compose, original, enhanced, 30.0)
+        t_zoom_old = bench(detail_zoom_per_frame_alloc, original, enhanced)
+        t_zoom_new = bench(zoom.compose, original, enhanced, 30.0)
+
+        print(f"[{label}] SideBySideCompare  per-frame alloc: {t_side_old:.2f} ms, persistent canvas: {t_side_new:.2f} ms")
+        print(f"[{label}] DetailZoomCompare  per-frame alloc: {t_zoom_old:.2f} ms, persistent canvas: {t_zoom_new:.2f} ms")
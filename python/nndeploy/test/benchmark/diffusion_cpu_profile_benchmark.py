@@ -0,0 +1,102 @@
+# 扩散模型 CPU 推理的各项优化对每个去噪步耗时的影响 (execution_profile = "cpu_optimized")
+# 每项优化单独在基线 (fp32 eager) 上开启，然后是 cpu_optimized 组合，
+# 最后是基线在不同线程数 (cpu_num_threads: 1 / 物理核数 / 逻辑核数) 下的耗时
+#
+# python3 nndeploy/test/benchmark/diffusion_cpu_profile_benchmark.py [model] [steps] [size]
+# 默认 stabilityai/sd-turbo, 4 步, 512x512
+
+import os
+import sys
+import contextlib
+
+import torch
+from diffusers import AutoPipelineForText2Image
+
+from nndeploy.diffusion.pipeline_pool import apply_cpu_optimizations, cpu_supports_bf16
+from nndeploy.diffusion.phase_timer import DiffusionPhaseTimer
+
+model = sys.argv[1] if len(sys.argv) > 1 else "stabilityai/sd-turbo"
+steps = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+size = int(sys.argv[3]) if len(sys.argv) > 3 else 512
+repeat = 3
+prompt = "a photo of a cat sitting on a wooden table, soft light"
+
+
+def reset(pipeline, unet):
+    pipeline.unet = unet
+    pipeline.unet.to(memory_format=torch.contiguous_format)
+    pipeline.vae.to(memory_format=torch.contiguous_format)
+    pipeline.disable_attention_slicing()
+    pipeline.disable_vae_slicing()
+    pipeline.disable_vae_tiling()
+
+
+def thread_counts() -> list:
+    """1、物理核数、逻辑核数 (去重); 没有安装 psutil 时无法区分物理核，只测 1 和逻辑核数"""
+    logical = os.cpu_count() or 1
+    try:
+        import psutil
+        physical = psutil.cpu_count(logical=False) or logical
+    except ImportError:
+        physical = logical
+    return sorted({1, physical, logical})
+
+
+def bench(pipeline, autocast: bool):
+    timer = DiffusionPhaseTimer()
+    context = torch.autocast("cpu", dtype=torch.bfloat16) if autocast else contextlib.nullcontext()
+    per_step, decode = [], []
+    # 第一次运行用于预热 (torch.compile 在这里编译)
+    for i in range(repeat + 1):
+        timer.reset()
+        generator = torch.Generator("cpu").manual_seed(0)
+        with context, torch.no_grad():
+            timer.begin_call()
+            pipeline(prompt=prompt, num_inference_steps=steps, guidance_scale=0.0, height=size, width=size,
+                     generator=generator, callback_on_step_end=timer.step_callback)
+            timer.end_call()
+        if i > 0:
+            # 第一个去噪步含准备工作，不计入
+            per_step.extend(timer.step_times[1:] or timer.step_times)
+            decode.append(timer.decode)
+    return sum(per_step) / len(per_step), sum(decode) / len(decode)
+
+
+if __name__ == "__main__":
+    pipeline = AutoPipelineForText2Image.from_pretrained(model, torch_dtype=torch.float32).to("cpu")
+    pipeline.set_progress_bar_config(disable=True)
+    unet = pipeline.unet
+    bf16 = cpu_supports_bf16()
+    print(f"{model}, {size}x{size}, {steps} steps, {torch.get_num_threads()} threads, bf16 supported: {bf16}")
+
+    options = [
+        ("fp32 eager (baseline)", {}, False),
+        ("channels-last", {"channels_last": True}, False),
+        ("bf16 autocast", {}, True),
+        ("attention slicing", {"attention_slicing": True}, False),
+        ("vae slicing + tiling", {"vae_slicing": True, "vae_tiling": True}, False),
+        ("torch.compile unet", {"compile_unet": True}, False),
+        ("cpu_optimized", {"channels_last": True, "vae_slicing": True, "vae_tiling": True}, bf16),
+    ]
+    for name, kwargs, autocast in options:
+        if autocast and not bf16:
+            print(f"[{name}] skipped, CPU has no bf16 support")
+            continue
+        reset(pipeline, unet)
+        flags = {"channels_last": False, "attention_slicing": False, "vae_slicing": False, "vae_tiling": False,
+                 "compile_unet": False}
+        flags.update(kwargs)
+        apply_cpu_optimizations(pipeline, **flags)
+        step_time, decode_time = bench(pipeline, autocast)
+        print(f"[{name}] {step_time:.3f} s/step, vae decode {decode_time:.3f} s")
+
+    # 线程数固定 (与节点的 cpu_num_threads 相同，torch.set_num_threads)，其余为基线配置
+    default_threads = torch.get_num_threads()
+    reset(pipeline, unet)
+    apply_cpu_optimizations(pipeline, channels_last=False, attention_slicing=False, vae_slicing=False,
+                            vae_tiling=False, compile_unet=False)
+    for num_threads in thread_counts():
+        torch.set_num_threads(num_threads)
+        step_time, decode_time = bench(pipeline, False)
+        print(f"[fp32 eager, cpu_num_threads={num_threads}] {step_time:.3f} s/step, vae decode {decode_time:.3f} s")
+    torch.set_num_threads(default_threads)
@@ -0,0 +1,48 @@
+# 人脸身份聚类耗时与一致性对比
+# KMeans 肘部法 (k=1..10 逐个拟合) vs 单遍在线聚类 find_cluster_centroids_online
+# 使用合成的 512 维归一化嵌入: 每个身份一个随机方向 + 噪声，噪声水平接近 ArcFace 同人样本的相似度分布
+#
+# python3 nndeploy/test/benchmark/face_cluster_benchmark.py
+
+import time
+
+import numpy as np
+from sklearn.metrics import adjusted_rand_score
+
+from nndeploy.face.deep_live_cam import find_cluster_centroids, find_cluster_centroids_online
+
+
+def make_embeddings(num_identities, num_faces, dim=512, noise=0.045, seed=0):
+    rng = np.random.default_rng(seed)
+    identities = rng.normal(size=(num_identities, dim)).astype(np.float32)
+    identities /= np.linalg.norm(identities, axis=1, keepdims=True)
+    # 身份出现次数不均衡，模拟主角/配角
+    weights = rng.dirichlet(np.ones(num_identities) * 2)
+    labels = rng.choice(num_identities, size=num_faces, p=weights)
+    embeddings = identities[labels] + rng.normal(scale=noise, size=(num_faces, dim)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings, labels
+
+
+def assign(centroids, embeddings):
+    return np.argmax(embeddings @ np.asarray(centroids, dtype=np.float32).T, axis=1)
+
+
+if __name__ == "__main__":
+    for num_identities, num_faces in [(2, 2000), (4, 10000), (6, 50000)]:
+        embeddings, labels = make_embeddings(num_identities, num_faces)
+
+        start = time.perf_counter()
+        elbow = find_cluster_centroids(embeddings)
+        t_elbow = time.perf_counter() - start
+
+        start = time.perf_counter()
+        online = find_cluster_centroids_online(embeddings)
+        t_online = time.perf_counter() - start
+
+        elbow_labels = assign(elbow, embeddings)
+        online_labels = assign(online, embeddings)
+        print(f"[{num_identities} ids / {num_faces} faces] "
+              f"elbow: {t_elbow * 1000:.0f} ms, k={len(elbow)}, ARI={adjusted_rand_score(labels, elbow_labels):.3f} | "
+              f"online: {t_online * 1000:.0f} ms, k={len(online)}, ARI={adjusted_rand_score(labels, online_labels):.3f} | "
+              f"agreement ARI={adjusted_rand_score(elbow_labels, online_labels):.3f}")
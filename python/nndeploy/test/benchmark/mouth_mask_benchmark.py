@@ -0,0 +1,92 @@
+# 嘴部掩码 (mouth_mask_) 的逐人脸开销，1080p
+# 旧实现: 基线版本 (--baseline，默认为引入 ROI 掩码之前的版本) 的 deep_live_cam，通过 git show 加载后原样运行
+# 新实现: deep_live_cam.apply_mouth_mask，掩码只在人脸/嘴部区域内生成并复用缓冲
+#
+# python3 nndeploy/test/benchmark/mouth_mask_benchmark.py [--baseline <git rev>]
+
+import os
+import time
+import types
+import argparse
+import subprocess
+
+import cv2
+import numpy as np
+import insightface
+
+from nndeploy.face.deep_live_cam import apply_mouth_mask
+
+count = 200
+
+
+def make_face(cx, cy, r, seed=0):
+    """合成 106 点关键点: 0-32 下半脸轮廓，眉毛在上，52-86 嘴部附近"""
+    rng = np.random.default_rng(seed)
+    landmarks = np.zeros((106, 2), dtype=np.float32)
+    angles = np.linspace(np.pi * 1.05, -0.05 * np.pi, 33)
+    landmarks[0:33] = np.stack([cx + r * np.cos(angles), cy + r * np.abs(np.sin(angles)) * 1.2], axis=1)
+    landmarks[33:52] = np.stack([np.linspace(cx - 0.8 * r, cx - 0.2 * r, 19), np.full(19, cy - 0.5 * r)], axis=1)
+    landmarks[87:106] = np.stack([np.linspace(cx + 0.2 * r, cx + 0.8 * r, 19), np.full(19, cy - 0.5 * r)], axis=1)
+    landmarks[52:87] = np.array([cx, cy + 0.55 * r]) + rng.normal(scale=0.12 * r, size=(35, 2))
+    return insightface.app.common.Face(landmark_2d_106=landmarks, bbox=np.array([cx - r, cy - r, cx + r, cy + r]))
+
+
+deep_live_cam_path = "python/nndeploy/face/deep_live_cam.py"
+
+
+def find_baseline_rev() -> str:
+    """运行时查找引入 create_face_mask_roi 的提交，其父提交即 ROI 掩码改动之前的版本"""
+    repo = os.path.dirname(os.path.abspath(__file__))
+    command = ["git", "log", "--format=%H", "-S", "def create_face_mask_roi(", "--", ":/" + deep_live_cam_path]
+    revs = subprocess.run(command, cwd=repo, capture_output=True, text=True, check=True).stdout.split()
+    if len(revs) == 0:
+        raise RuntimeError("git 历史中找不到引入 create_face_mask_roi 的提交，请用 --baseline 指定旧实现所在的版本")
+    return revs[-1] + "^"
+
+
+def load_baseline_module(rev: str):
+    """从 git 版本 rev 中加载未改动前的 deep_live_cam.py，基准直接运行当时的代码"""
+    repo = os.path.dirname(os.path.abspath(__file__))
+    source = subprocess.run(["git", "show", f"{rev}:{deep_live_cam_path}"],
+                            cwd=repo, capture_output=True, text=True, check=True).stdout
+    module = types.ModuleType("deep_live_cam_baseline")
+    exec(compile(source, f"{rev}:deep_live_cam.py", "exec"), module.__dict__)
+    return module
+
+
+def make_legacy_mouth_mask(baseline):
+    """旧节点 (InsightFaceSwapper 等) 的调用序列: 整帧人脸掩码 + 嘴部掩码 + apply_mouth_area"""
+    def legacy_mouth_mask(frame, face, mask_down_size=0.5, mask_size=1, mask_feather_ratio=8):
+        face_mask = baseline.create_face_mask(face, frame)
+        mouth_mask, mouth_cutout, mouth_box, lower_lip_polygon = (
+            baseline.create_lower_mouth_mask(face, frame, mask_down_size, mask_size)
+        )
+        return baseline.apply_mouth_area(
+            frame, mouth_cutout, mouth_box, face_mask, lower_lip_polygon, mask_feather_ratio
+        )
+    return legacy_mouth_mask
+
+
+def bench(fn, frame, face):
+    for _ in range(5):
+        fn(frame, face)
+    start = time.perf_counter()
+    for _ in range(count):
+        fn(frame, face)
+    return (time.perf_counter() - start) * 1000.0 / count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="mouth mask benchmark")
+    parser.add_argument("--baseline", type=str, default="",
+                        help="旧实现所在的 git 版本 (默认在 git 历史中查找 ROI 掩码改动之前的版本)")
+    args = parser.parse_args()
+    baseline_rev = args.baseline if args.baseline != "" else find_baseline_rev()
+    legacy_mouth_mask = make_legacy_mouth_mask(load_baseline_module(baseline_rev))
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, (1080, 1920, 3), dtype=np.uint8)
+    for r in [80, 160, 320]:
+        face = make_face(960, 480, r)
+        t_old = bench(legacy_mouth_mask, frame, face)
+        t_new = bench(lambda f, fc: apply_mouth_mask(f, fc, 0.5, 1, 8), frame, face)
+        print(f"[1080p, face radius {r}px] full-frame masks: {t_old:.2f} ms, ROI masks: {t_new:.2f} ms")
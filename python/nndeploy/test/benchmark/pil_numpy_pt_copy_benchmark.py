@@ -0,0 +1,128 @@
+# 统计典型转换链每帧拷贝的字节数与耗时 (1080p / 4K RGB):
+#   PIL -> numpy -> torch -> numpy: 输出为可写数组，各实现都是 PIL 导出像素 + 一次拷贝，融合只省去中间节点
+#   PIL -> numpy -> PIL: 融合后只拷贝一次原图，不再经过 numpy 往返
+# 旧实现 (np.array + torch.from_numpy + .numpy() + Image.fromarray) vs 逐节点转换 vs 融合后的转换链
+# 拷贝字节数按节点输入输出是否共享内存统计; PIL 导出像素 (tobytes) 本身算一次拷贝，
+# 得到的数组若不是直接引用导出的 bytes 则再算一次，生成新的 PIL 图像算一次
+#
+# python3 nndeploy/test/benchmark/pil_numpy_pt_copy_benchmark.py
+
+import time
+
+import numpy as np
+import torch
+from PIL import Image
+
+from nndeploy.basic.pil_numpy_pt import PILImage2Numpy, Numpy2PILImage, Numpy2Pt, Pt2Numpy, run_conversion
+
+count = 50
+
+
+def old_pil_image2numpy(image):
+    return np.array(image)
+
+
+def old_numpy2pt(array):
+    return torch.from_numpy(array)
+
+
+def old_pt2numpy(tensor):
+    if tensor.is_cuda:
+        tensor = tensor.cpu()
+    return tensor.numpy()
+
+
+def old_numpy2pil(array):
+    return Image.fromarray(array)
+
+
+chains = [
+    ("PIL -> numpy -> torch -> numpy", [PILImage2Numpy, Numpy2Pt, Pt2Numpy],
+     [old_pil_image2numpy, old_numpy2pt, old_pt2numpy]),
+    ("PIL -> numpy -> PIL", [PILImage2Numpy, Numpy2PILImage], [old_pil_image2numpy, old_numpy2pil]),
+]
+
+
+def node_steps(chain, fuse):
+    # 线性链中除最后一个节点外的无损转换节点在 init 时被融合 (见 ConversionNode.init)
+    steps = []
+    for i, node_type in enumerate(chain):
+        forward_only = fuse and node_type.lossless and i + 1 < len(chain)
+        steps.append(lambda obj, t=node_type, f=forward_only: run_conversion(t, obj, f))
+    return steps
+
+
+def _buffer(obj):
+    """(数据起始地址, 字节数)"""
+    if isinstance(obj, torch.Tensor):
+        return obj.data_ptr(), obj.numel() * obj.element_size()
+    return obj.__array_interface__["data"][0], obj.nbytes
+
+
+def _root_base(obj):
+    if isinstance(obj, torch.Tensor):
+        obj = obj.numpy()
+    while isinstance(obj, np.ndarray) and obj.base is not None:
+        obj = obj.base
+    return obj
+
+
+def _step_copied(src, dst):
+    if src is dst:
+        return 0
+    if isinstance(dst, Image.Image):
+        return len(dst.getbands()) * dst.width * dst.height
+    if isinstance(src, Image.Image):
+        nbytes = _buffer(dst)[1]
+        return nbytes if isinstance(_root_base(dst), bytes) else 2 * nbytes
+    src_ptr, src_bytes = _buffer(src)
+    dst_ptr, dst_bytes = _buffer(dst)
+    shared = dst_ptr < src_ptr + src_bytes and src_ptr < dst_ptr + dst_bytes
+    return 0 if shared else dst_bytes
+
+
+def bytes_copied(steps, image):
+    """返回 (每帧拷贝字节数, 最终结果)"""
+    obj = image
+    copied = 0
+    for step in steps:
+        result = step(obj)
+        copied += _step_copied(obj, result)
+        obj = result
+    return copied, obj
+
+
+def run_time(steps, image):
+    obj = None
+    start = time.perf_counter()
+    for _ in range(count):
+        obj = image
+        for step in steps:
+            obj = step(obj)
+    return (time.perf_counter() - start) / count * 1000, obj
+
+
+def _as_array(obj):
+    return np.array(obj) if isinstance(obj, Image.Image) else obj
+
+
+def main():
+    for name, (w, h) in [("1080p", (1920, 1080)), ("4K", (3840, 2160))]:
+        image = Image.fromarray(np.random.randint(0, 255, (h, w, 3), dtype=np.uint8))
+        frame_bytes = w * h * 3
+        print(f"{name}: {w}x{h} RGB, {frame_bytes / 1e6:.1f} MB/frame")
+        for chain_name, chain, old in chains:
+            print(f"  {chain_name}")
+            reference = None
+            for label, steps in [("old", old), ("per-node", node_steps(chain, False)),
+                                 ("fused", node_steps(chain, True))]:
+                copied, result = bytes_copied(steps, image)
+                ms, _ = run_time(steps, image)
+                if reference is None:
+                    reference = _as_array(result)
+                assert np.array_equal(_as_array(result), reference)
+                print(f"    {label:>9}: {copied / 1e6:7.1f} MB copied ({copied / frame_bytes:.1f} frames), "
+                      f"{ms:7.2f} ms/frame")
+
+if __name__ == "__main__":
+    main()
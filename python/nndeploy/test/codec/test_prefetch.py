@@ -0,0 +1,115 @@
+import collections
+import threading
+import types
+import unittest
+
+import numpy as np
+
+from nndeploy.codec.prefetch import FrameRing, PrefetchVideoDecode
+
+"""
+测试预解码环形缓冲: 解码线程出错或提前结束时环都会关闭，消费者不会一直阻塞
+"""
+
+
+class FakeCapture:
+    """依次返回 frames 中的帧，之后返回读取失败"""
+    def __init__(self, frames):
+        self.frames = list(frames)
+
+    def read(self, buffer=None):
+        if not self.frames:
+            return False, None
+        return True, self.frames.pop(0)
+
+
+def _start_decode(ring, frames):
+    decoder = types.SimpleNamespace(ring=ring, cap_=FakeCapture(frames))
+    thread = threading.Thread(target=PrefetchVideoDecode._decode_loop, args=(decoder,), daemon=True)
+    thread.start()
+    return thread
+
+
+def _drain(ring, timeout=5.0):
+    """取出所有帧 (拷贝) 并归还槽位，超时视为阻塞"""
+    frames = []
+    result = {}
+
+    def consume():
+        while True:
+            index, frame = ring.get()
+            if index is None:
+                break
+            frames.append(frame.copy())
+            ring.release(index)
+        result["done"] = True
+
+    thread = threading.Thread(target=consume, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    return frames, result.get("done", False)
+
+
+class TestFrameRing(unittest.TestCase):
+    shape = (4, 6, 3)
+
+    def _frame(self, value, shape=None):
+        return np.full(shape or self.shape, value, dtype=np.uint8)
+
+    def test_end_of_stream(self):
+        ring = FrameRing(2, self.shape)
+        thread = _start_decode(ring, [self._frame(i) for i in range(5)])
+        frames, done = _drain(ring)
+        thread.join(5.0)
+        self.assertTrue(done)
+        self.assertEqual([int(f[0, 0, 0]) for f in frames], [0, 1, 2, 3, 4])
+        self.assertIsNone(ring.error)
+
+    def test_close_on_error(self):
+        ring = FrameRing(2, self.shape)
+        # 第三帧分辨率改变，np.copyto 抛出异常
+        frames = [self._frame(0), self._frame(1), self._frame(2, (8, 6, 3)), self._frame(3)]
+        thread = _start_decode(ring, frames)
+        frames, done = _drain(ring)
+        thread.join(5.0)
+        self.assertTrue(done)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(frames), 2)
+        self.assertIsInstance(ring.error, ValueError)
+
+    def test_close_wakes_producer(self):
+        ring = FrameRing(1, self.shape)
+        index, _ = ring.acquire()
+        ring.publish(index)
+        result = {}
+        thread = threading.Thread(target=lambda: result.update(slot=ring.acquire()), daemon=True)
+        thread.start()
+        ring.close()
+        thread.join(5.0)
+        self.assertEqual(result["slot"], (None, None))
+
+
+class _Output:
+    def __init__(self):
+        self.frames = []
+
+    def set(self, frame):
+        self.frames.append(frame)
+
+
+class TestPrefetchVideoDecode(unittest.TestCase):
+    def test_pipeline_outputs_survive_recycling(self):
+        # 流水线并行时输出边缓存多帧，输出的帧不能在槽位被回收后被覆盖
+        ring = FrameRing(2, (4, 6, 3))
+        output = _Output()
+        decoder = types.SimpleNamespace(ring=ring, held_=collections.deque(), hold_frames_=1, index_=0,
+                                        copy_output_=True, get_output=lambda i: output)
+        thread = _start_decode(ring, [np.full((4, 6, 3), i, dtype=np.uint8) for i in range(6)])
+        for _ in range(6):
+            PrefetchVideoDecode.run(decoder)
+        thread.join(5.0)
+        self.assertEqual([int(f[0, 0, 0]) for f in output.frames], [0, 1, 2, 3, 4, 5])
+
+
+if __name__ == '__main__':
+    unittest.main()
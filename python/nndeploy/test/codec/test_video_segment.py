@@ -0,0 +1,61 @@
+import json
+import unittest
+from unittest import mock
+
+from nndeploy.codec import video_segment
+
+"""
+测试视频分段: 关键帧帧序号 (显示顺序) 的解析与分段起始帧的规划
+"""
+
+
+def _ffprobe_output(start_time, frame_rate, times):
+    return json.dumps({
+        "streams": [{"start_time": start_time, "avg_frame_rate": frame_rate}],
+        "frames": [{"best_effort_timestamp_time": t} for t in times],
+    })
+
+
+class TestKeyframeIndices(unittest.TestCase):
+    def _probe(self, stdout, fps=None):
+        result = mock.Mock(returncode=0, stdout=stdout)
+        with mock.patch.object(video_segment, "_has_ffmpeg", return_value=True), \
+                mock.patch.object(video_segment.subprocess, "run", return_value=result) as run:
+            indices = video_segment.get_keyframe_indices("input.mp4", fps)
+        return indices, run.call_args[0][0]
+
+    def test_timestamps_to_frame_indices(self):
+        # 有 B 帧的流 start_time 通常不为 0，关键帧按显示时间戳换算
+        stdout = _ffprobe_output("0.080000", "25/1", ["0.080000", "2.080000", "4.080000"])
+        indices, cmd = self._probe(stdout)
+        self.assertEqual(indices, [0, 50, 100])
+        self.assertIn("nokey", cmd)
+
+    def test_explicit_fps(self):
+        stdout = _ffprobe_output("0.000000", "0/0", ["0.000000", "1.001000"])
+        indices, _ = self._probe(stdout, fps=30000 / 1001)
+        self.assertEqual(indices, [0, 30])
+
+    def test_bad_output(self):
+        indices, _ = self._probe("not json")
+        self.assertEqual(indices, [])
+
+
+class TestPlanSegments(unittest.TestCase):
+    def test_empty_video(self):
+        self.assertEqual(video_segment.plan_segments(0, 4), [])
+        self.assertEqual(video_segment.plan_segments(0, 4, [0]), [])
+
+    def test_even_split(self):
+        self.assertEqual(video_segment.plan_segments(100, 4), [0, 25, 50, 75])
+        self.assertEqual(video_segment.plan_segments(3, 8), [0, 1, 2])
+
+    def test_align_to_keyframes(self):
+        keyframes = [0, 30, 60, 90]
+        self.assertEqual(video_segment.plan_segments(120, 4, keyframes), [0, 30, 60, 90])
+        # 关键帧稀疏时合并相同的切分点
+        self.assertEqual(video_segment.plan_segments(120, 4, [0, 100]), [0, 100])
+
+
+if __name__ == '__main__':
+    unittest.main()
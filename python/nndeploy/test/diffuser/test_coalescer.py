@@ -0,0 +1,88 @@
+import threading
+import unittest
+
+import torch
+
+from nndeploy.diffusion.coalescer import DiffusionCoalescer, _Request, merge_prompt_kwargs
+
+"""
+测试文生图请求合批: 提示词参数的合并、合批键以及结果按请求拆分
+"""
+
+
+class FakeScheduler:
+    def __init__(self, **config):
+        self.config = config
+
+
+class FakeResult:
+    def __init__(self, images):
+        self.images = images
+
+
+class FakePipeline:
+    """每个样本的 "图像" 为 (提示词, 初始噪声的第一个值)，记录每次调用的 batch 大小"""
+    def __init__(self):
+        self.scheduler = FakeScheduler(name="default")
+        self.calls = []
+
+    def __call__(self, prompt=None, negative_prompt=None, num_images_per_prompt=1, latents=None, **kwargs):
+        prompts = prompt if isinstance(prompt, list) else [prompt]
+        prompts = [p for p in prompts for _ in range(num_images_per_prompt)]
+        self.calls.append(len(prompts))
+        return FakeResult([(p, float(l.flatten()[0])) for p, l in zip(prompts, latents)])
+
+
+def _latents(values):
+    return torch.tensor(values, dtype=torch.float32).reshape(-1, 1, 1, 1).expand(-1, 4, 2, 2).contiguous()
+
+
+class TestMergePromptKwargs(unittest.TestCase):
+    def test_strings_and_tensors(self):
+        a = _Request({"prompt": "cat", "negative_prompt": None, "prompt_embeds": torch.zeros(1, 3, 2), "clip_skip": 1},
+                     _latents([0, 1]), 2)
+        b = _Request({"prompt": ["dog"], "negative_prompt": None, "prompt_embeds": torch.ones(1, 3, 2), "clip_skip": 1},
+                     _latents([2]), 1)
+        merged = merge_prompt_kwargs([a, b])
+        self.assertEqual(merged["prompt"], ["cat", "cat", "dog"])
+        self.assertIsNone(merged["negative_prompt"])
+        self.assertEqual(merged["clip_skip"], 1)
+        self.assertEqual(tuple(merged["prompt_embeds"].shape), (3, 3, 2))
+        self.assertEqual(merged["prompt_embeds"][:, 0, 0].tolist(), [0.0, 0.0, 1.0])
+
+
+class TestDiffusionCoalescer(unittest.TestCase):
+    def test_key_uses_scheduler_config(self):
+        pipeline = FakePipeline()
+        latents = _latents([0])
+        key = lambda scheduler: DiffusionCoalescer.make_key(pipeline, scheduler, {"prompt": "x"}, latents, {"steps": 4})
+        # 不同节点各自创建的调度器实例，配置相同即可合批
+        self.assertEqual(key(FakeScheduler(beta=1, spacing="leading")), key(FakeScheduler(spacing="leading", beta=1)))
+        self.assertNotEqual(key(FakeScheduler(beta=1)), key(FakeScheduler(beta=2)))
+        self.assertEqual(key(None), key(pipeline.scheduler))
+
+    def test_results_split_per_request(self):
+        coalescer = DiffusionCoalescer()
+        pipeline = FakePipeline()
+        lock = threading.Lock()
+        requests = [("a", [0, 1]), ("b", [2]), ("c", [3, 4, 5])]
+        results = {}
+
+        def submit(prompt, values):
+            results[prompt] = coalescer.submit(pipeline, lock, {"prompt": prompt}, _latents(values), {},
+                                               window_ms=2000, max_batch=6,
+                                               scheduler=FakeScheduler(name="euler"))
+
+        threads = [threading.Thread(target=submit, args=request) for request in requests]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+        self.assertEqual(pipeline.calls, [6])
+        for prompt, values in requests:
+            self.assertEqual(results[prompt], [(prompt, float(v)) for v in values])
+        self.assertEqual(coalescer.get_stats(), {"batches": 1, "requests": 3})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+import torch
+
+from nndeploy.diffusion.embedding_cache import encode_prompt_cached, get_prompt_embedding_cache
+
+"""
+测试提示词嵌入缓存: 相同提示词只编码一次，encode_prompt 返回值格式未知的 pipeline 只尝试一次
+"""
+
+
+class FakePipeline:
+    _execution_device = torch.device("cpu")
+
+    def __init__(self):
+        self.encode_calls = 0
+
+    def __call__(self, prompt=None, negative_prompt=None, prompt_embeds=None, negative_prompt_embeds=None):
+        pass
+
+    def encode_prompt(self, prompt, device, num_images_per_prompt, do_classifier_free_guidance, negative_prompt=None):
+        self.encode_calls += 1
+        return torch.ones(1, 4, 8), torch.zeros(1, 4, 8)
+
+
+class TriplePipeline(FakePipeline):
+    """encode_prompt 返回 (prompt_embeds, pooled_prompt_embeds, text_ids)，与 Flux 一致"""
+    def encode_prompt(self, prompt, device, num_images_per_prompt, do_classifier_free_guidance, negative_prompt=None):
+        self.encode_calls += 1
+        return torch.ones(1, 4, 8), torch.ones(1, 8), torch.zeros(4, 3)
+
+
+class TestEncodePromptCached(unittest.TestCase):
+    def setUp(self):
+        get_prompt_embedding_cache().clear()
+
+    def test_cached_embeddings(self):
+        pipeline = FakePipeline()
+        for _ in range(3):
+            kwargs = encode_prompt_cached(pipeline, ("model",), "a cat", "blurry", 7.5)
+        self.assertEqual(pipeline.encode_calls, 1)
+        self.assertEqual(sorted(kwargs), ["negative_prompt_embeds", "prompt_embeds"])
+
+    def test_unsupported_result_encoded_once(self):
+        pipeline = TriplePipeline()
+        for prompt in ["a cat", "a dog", "a cat"]:
+            kwargs = encode_prompt_cached(pipeline, ("model",), prompt, None, 3.5)
+            self.assertEqual(kwargs, {"prompt": prompt, "negative_prompt": None})
+        self.assertEqual(pipeline.encode_calls, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
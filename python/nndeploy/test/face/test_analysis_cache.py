@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+import zipfile
+
+import numpy as np
+import insightface
+
+from nndeploy.face.analysis_cache import FaceAnalysisCache
+
+"""
+测试人脸分析缓存: 条目压缩存储，从磁盘读回的人脸与写入时完全一致
+"""
+
+
+def _make_faces(rng, num_faces):
+    faces = []
+    for i in range(num_faces):
+        embedding = rng.standard_normal(512).astype(np.float32)
+        faces.append(insightface.app.common.Face(
+            bbox=np.array([10.0 * i, 20.0, 10.0 * i + 64.0, 84.0], dtype=np.float32),
+            kps=rng.random((5, 2), dtype=np.float32) * 64,
+            det_score=np.float32(0.9 - 0.1 * i),
+            landmark_2d_106=rng.random((106, 2), dtype=np.float32) * 64,
+            embedding=embedding,
+            normed_embedding=embedding / np.linalg.norm(embedding),
+            gender=1,
+            age=30 + i,
+        ))
+    return faces
+
+
+class TestFaceAnalysisCache(unittest.TestCase):
+    def test_round_trip(self):
+        rng = np.random.default_rng(0)
+        image = rng.integers(0, 255, (64, 48, 3), dtype=np.uint8)
+        faces = _make_faces(rng, 2)
+        with tempfile.TemporaryDirectory() as directory:
+            FaceAnalysisCache(directory, namespace="test").put(image, faces)
+            # 新的缓存对象没有内存条目，从磁盘读取
+            cache = FaceAnalysisCache(directory, namespace="test")
+            loaded = cache.get(image)
+            self.assertIsNotNone(loaded)
+            self.assertEqual(len(loaded), len(faces))
+            for face, cached in zip(faces, loaded):
+                self.assertEqual(set(face.keys()), set(cached.keys()))
+                for name, value in face.items():
+                    np.testing.assert_array_equal(np.asarray(cached[name]), np.asarray(value))
+                    self.assertEqual(np.asarray(cached[name]).dtype, np.asarray(value).dtype)
+                self.assertEqual(cached.normed_embedding.dtype, np.float32)
+
+            path = os.path.join(directory, cache.key(image) + ".npz")
+            with zipfile.ZipFile(path) as archive:
+                for info in archive.infolist():
+                    self.assertEqual(info.compress_type, zipfile.ZIP_DEFLATED)
+
+    def test_miss_and_empty(self):
+        image = np.zeros((8, 8, 3), dtype=np.uint8)
+        with tempfile.TemporaryDirectory() as directory:
+            cache = FaceAnalysisCache(directory)
+            self.assertIsNone(cache.get(image))
+            cache.put(image, [])
+            self.assertEqual(FaceAnalysisCache(directory).get(image), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import gc
+import unittest
+import numpy as np
+
+from nndeploy.device.tensor import Tensor, create_tensor_from_numpy, create_numpy_from_tensor
+
+"""
+测试 host 上 nndeploy.device.Tensor 与 numpy / DLPack (torch) 之间的零拷贝互转:
+转换前后数据指针相同，且来源对象释放后数据依然有效
+"""
+
+
+def _ptr(array):
+    return array.__array_interface__["data"][0]
+
+
+class TestZeroCopy(unittest.TestCase):
+    def test_numpy_round_trip(self):
+        np_array = np.arange(2 * 3 * 4, dtype=np.float32).reshape(2, 3, 4)
+        tensor = create_tensor_from_numpy(np_array)
+        self.assertEqual(tensor.__array_interface__["data"][0], _ptr(np_array))
+        self.assertEqual(_ptr(np.asarray(tensor)), _ptr(np_array))
+        self.assertEqual(_ptr(tensor.to_numpy()), _ptr(np_array))
+        self.assertEqual(_ptr(create_numpy_from_tensor(tensor)), _ptr(np_array))
+        self.assertNotEqual(_ptr(tensor.to_numpy(copy=True)), _ptr(np_array))
+
+        # 共享内存: 一侧的修改另一侧可见
+        view = tensor.to_numpy()
+        view[0, 0, 0] = 42.0
+        self.assertEqual(np_array[0, 0, 0], 42.0)
+
+    def test_lifetime(self):
+        np_array = np.ones((4, 4), dtype=np.float32)
+        ptr = _ptr(np_array)
+        tensor = create_tensor_from_numpy(np_array)
+        del np_array
+        gc.collect()
+        # Tensor 持有原数组
+        view = tensor.to_numpy()
+        self.assertEqual(_ptr(view), ptr)
+        del tensor
+        gc.collect()
+        # 视图持有 Tensor
+        self.assertEqual(float(view.sum()), 16.0)
+
+    def test_dlpack(self):
+        try:
+            import torch
+        except ImportError:
+            self.skipTest("torch is not installed")
+        torch_tensor = torch.arange(12, dtype=torch.float32).reshape(3, 4)
+        tensor = Tensor.from_dlpack(torch_tensor)
+        self.assertEqual(tensor.__array_interface__["data"][0], torch_tensor.data_ptr())
+
+        exported = torch.from_dlpack(tensor)
+        self.assertEqual(exported.data_ptr(), torch_tensor.data_ptr())
+        self.assertTrue(torch.equal(exported, torch_tensor))
+
+        del torch_tensor, tensor
+        gc.collect()
+        self.assertEqual(float(exported.sum()), 66.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
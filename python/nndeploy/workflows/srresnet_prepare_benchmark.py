@@ -0,0 +1,77 @@
+# SRResNet-lite CPU 部署准备评测
+# 对比 FP32 原始模型与 Conv+BN 融合 / channels-last / FP16 / INT8 各方案的 fps 与 PSNR
+
+import argparse
+import copy
+import os
+
+import torch
+
+from nndeploy.super_resolution.srresnet_prepare import (
+    benchmark_prepared, prepare_srresnet_lite, save_prepared_model)
+from srresnet_video_sr import SRResNetLite, read_frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SRResNet-lite CPU 部署准备评测')
+    parser.add_argument('--input', type=str, required=True, help='评测视频路径')
+    parser.add_argument('--model', type=str, default=None, help='预训练模型路径 (可选)')
+    parser.add_argument('--scale', type=int, default=2, choices=[2, 4], help='超分倍数')
+    parser.add_argument('--features', type=int, default=32, help='特征通道数')
+    parser.add_argument('--blocks', type=int, default=8, help='残差块数量')
+    parser.add_argument('--frames', type=int, default=30, help='评测帧数')
+    parser.add_argument('--calib-frames', type=int, default=16, help='INT8 校准帧数')
+    parser.add_argument('--threads', type=int, default=0, help='torch 线程数 (0=默认)')
+    parser.add_argument('--save-dir', type=str, default=None,
+                       help='保存各准备方案的 TorchScript 模型 (可选)')
+    args = parser.parse_args()
+
+    if args.threads > 0:
+        torch.set_num_threads(args.threads)
+
+    frames = read_frames(args.input, args.frames)
+    if not frames:
+        print(f"错误: 无法读取视频帧: {args.input}")
+        return
+    calib_frames = frames[:args.calib_frames]
+
+    reference = SRResNetLite(scale_factor=args.scale, num_features=args.features,
+                             num_blocks=args.blocks)
+    if args.model and os.path.exists(args.model):
+        reference.load_state_dict(torch.load(args.model, map_location='cpu'))
+    reference.eval()
+
+    configs = {
+        'fp32+fuse': dict(precision='fp32', fuse_bn=True),
+        'fp32+fuse+cl': dict(precision='fp32', fuse_bn=True, channels_last=True),
+        'fp16+fuse': dict(precision='fp16', fuse_bn=True),
+        'int8': dict(precision='int8', calib_frames=calib_frames),
+        'int8+cl': dict(precision='int8', channels_last=True, calib_frames=calib_frames),
+    }
+    variants = {}
+    for name, config in configs.items():
+        try:
+            variants[name] = prepare_srresnet_lite(copy.deepcopy(reference), **config)
+        except Exception as e:
+            print(f"跳过 {name}: {e}")
+            continue
+        if args.save_dir:
+            save_prepared_model(variants[name], os.path.join(args.save_dir, f"srresnet_{name}.pt"),
+                                frames[0])
+
+    h, w = frames[0].shape[:2]
+    print(f"评测: {len(frames)} 帧 {w}x{h} -> {w * args.scale}x{h * args.scale}, "
+          f"threads={torch.get_num_threads()}")
+    print(f"{'方案':<16}{'FPS':>10}{'ms/帧':>12}{'PSNR(dB)':>12}{'加速比':>10}")
+    report = benchmark_prepared(reference, variants, frames)
+    base_fps = report[0]['fps']
+    for item in report:
+        if "error" in item:
+            print(f"{item['name']:<16}运行失败: {item['error']}")
+            continue
+        print(f"{item['name']:<16}{item['fps']:>10.2f}{item['ms_per_frame']:>12.2f}"
+              f"{item['psnr']:>12.2f}{item['fps'] / base_fps:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -98,7 +98,7 @@ class SRResNetLite(nn.Module):
 
 class SRResNetVideoSR:
     def __init__(self, model_path=None, scale=2, device='cpu', 
-                 num_features=32, num_blocks=8):
+                 num_features=32, num_blocks=8, prepared_model_path=None):
         """
         初始化 SRResNet-lite 模型
         
@@ -108,9 +108,17 @@ class SRResNetVideoSR:
             device: 'cpu' 或 'cuda'
             num_features: 特征通道数 (默认32, 标准版为64)
             num_blocks: 残差块数量 (默认8, 标准版为16)
+            prepared_model_path: srresnet_prepare 保存的 TorchScript 模型 (仅 CPU)
         """
         self.scale = scale
         self.device = torch.device(device)
+        self.prepared_model = None
+        
+        if prepared_model_path:
+            from nndeploy.super_resolution.srresnet_prepare import load_prepared_model
+            self.device = torch.device('cpu')
+            self.prepared_model = load_prepared_model(prepared_model_path)
+            print(f"加载准备后的模型: {prepared_model_path} {self.prepared_model.nndeploy_prepare_meta_}")
         
         # 创建模型
         self.model = SRResNetLite(
@@ -134,6 +142,32 @@ class SRResNetVideoSR:
         print(f"SRResNet-lite 模型参数量: {total_params/1e6:.2f}M")
         print(f"配置: scale={scale}, features={num_features}, blocks={num_blocks}, device={device}")
     
+    def prepare(self, precision='fp32', fuse_bn=True, channels_last=False, calib_frames=None,
+                save_path=None):
+        """
+        CPU 部署准备: Conv+BN 融合、FP16/INT8 量化、channels-last
+        
+        Args:
+            precision: 'fp32' / 'fp16' / 'int8'
+            fuse_bn: 是否融合 Conv+BN
+            channels_last: 是否使用 channels-last 布局
+            calib_frames: INT8 校准帧列表
+            save_path: 保存准备后模型的路径 (None 表示不保存)
+        """
+        from nndeploy.super_resolution.srresnet_prepare import (
+            prepare_srresnet_lite, save_prepared_model)
+        
+        self.device = torch.device('cpu')
+        self.prepared_model = prepare_srresnet_lite(
+            self.model, precision=precision, fuse_bn=fuse_bn,
+            channels_last=channels_last, calib_frames=calib_frames)
+        print(f"模型准备完成: {self.prepared_model.nndeploy_prepare_meta_}")
+        
+        if save_path:
+            example = calib_frames[0] if calib_frames else np.zeros((64, 64, 3), dtype=np.uint8)
+            save_prepared_model(self.prepared_model, save_path, example)
+            print(f"准备后的模型已保存: {save_path}")
+    
     def preprocess(self, frame):
         """预处理图像"""
         # BGR -> RGB -> Tensor
@@ -160,6 +194,10 @@ class SRResNetVideoSR:
             超分后的图像
         """
         try:
+            if self.prepared_model is not None:
+                from nndeploy.super_resolution.srresnet_prepare import run_prepared
+                return run_prepared(self.prepared_model, frame)
+            
             with torch.no_grad():
                 # 预处理
                 input_tensor = self.preprocess(frame)
@@ -292,6 +330,19 @@ class SRResNetVideoSR:
                 print(f"输出文件: {output_path}")
 
 
+def read_frames(input_path, max_frames):
+    """读取视频前 max_frames 帧 (用于校准/评测)"""
+    cap = cv2.VideoCapture(input_path)
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
 def main():
     parser = argparse.ArgumentParser(description='SRResNet-lite 视频超分处理')
     parser.add_argument('--input', type=str, required=True, help='输入视频路径')
@@ -310,6 +361,18 @@ def main():
                        help='跳帧间隔 (1=不跳帧, 2=每2帧处理1帧)')
     parser.add_argument('--no-display', action='store_true',
                        help='不显示实时结果')
+    parser.add_argument('--precision', type=str, default=None, choices=['fp32', 'fp16', 'int8'],
+                       help='CPU 部署准备的精度 (不指定则直接使用原始 FP32 模型)')
+    parser.add_argument('--no-fuse-bn', action='store_true',
+                       help='准备时不融合 Conv+BN')
+    parser.add_argument('--channels-last', action='store_true',
+                       help='准备时使用 channels-last 布局')
+    parser.add_argument('--calib-frames', type=int, default=16,
+                       help='INT8 校准使用的输入视频帧数')
+    parser.add_argument('--save-prepared', type=str, default=None,
+                       help='保存准备后的模型 (TorchScript)')
+    parser.add_argument('--prepared-model', type=str, default=None,
+                       help='加载已准备好的模型 (TorchScript)')
     
     args = parser.parse_args()
     
@@ -324,9 +387,21 @@ def main():
         scale=args.scale,
         device=args.device,
         num_features=args.features,
-        num_blocks=args.blocks
+        num_blocks=args.blocks,
+        prepared_model_path=args.prepared_model
     )
     
+    # CPU 部署准备
+    if args.precision and not args.prepared_model:
+        calib_frames = read_frames(args.input, args.calib_frames)
+        processor.prepare(
+            precision=args.precision,
+            fuse_bn=not args.no_fuse_bn,
+            channels_last=args.channels_last,
+            calib_frames=calib_frames,
+            save_path=args.save_prepared
+        )
+    
     # 处理视频
     processor.process_video(
         input_path=args.input,
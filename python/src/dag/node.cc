@@ -432,6 +432,10 @@ NNDEPLOY_API_PYBIND11_MODULE("dag", m) {
       .def("run", &Node::run, py::call_guard<py::gil_scoped_release>())
       .def("synchronize", &Node::synchronize,
            py::call_guard<py::gil_scoped_release>())
+      .def("interrupt", &Node::interrupt,
+           py::call_guard<py::gil_scoped_release>())
+      .def("check_interrupt_status", &Node::checkInterruptStatus)
+      .def("clear_interrupt", &Node::clearInterrupt)
       .def("forward", py::overload_cast<std::vector<Edge *>>(&Node::forward),
            py::arg("inputs"), py::return_value_policy::reference,
            py::call_guard<py::gil_scoped_release>())
@@ -150,6 +150,17 @@ py::buffer_info bufferToBufferInfo(device::Buffer *buffer,
   );
 }
 
+py::array bufferToNumpy(py::handle self, const py::dtype &dt, bool copy) {
+  device::Buffer *buffer = self.cast<device::Buffer *>();
+  py::buffer_info info = bufferToBufferInfo(buffer, dt);
+  // base 持有 Python 侧的 Buffer 对象，不拷贝内存
+  py::array view(dt, info.shape, info.strides, info.ptr, self);
+  if (copy) {
+    return view.attr("copy")();
+  }
+  return view;
+}
+
 Buffer bufferFromNumpy(const py::array &array) {
   auto shape = array.shape();
   auto dtype = array.dtype();
@@ -251,29 +262,40 @@ NNDEPLOY_API_PYBIND11_MODULE("device", m) {
       .def_buffer([](Buffer &self) {
         return bufferToBufferInfo(&self, py::dtype::of<uint8_t>());
       })
-      .def("__array__",
-           [](Buffer &self) {
-             return bufferToBufferInfo(&self, py::dtype::of<uint8_t>());
-           })
+      .def(
+          "__array__",
+          [](py::object self, py::object dtype, py::object copy) {
+            bool do_copy = !copy.is_none() && copy.cast<bool>();
+            py::object array =
+                bufferToNumpy(self, py::dtype::of<uint8_t>(), do_copy);
+            if (!dtype.is_none()) {
+              array = array.attr("astype")(dtype, py::arg("copy") = false);
+            }
+            return array;
+          },
+          py::arg("dtype") = py::none(), py::arg("copy") = py::none())
       .def(
           "to_numpy_v0",
-          [](Buffer &self, const py::dtype &dtype) {
-            py::buffer_info buffer_info = bufferToBufferInfo(&self, dtype);
-            return py::array(buffer_info);
+          [](py::object self, const py::dtype &dtype, bool copy) {
+            return bufferToNumpy(self, dtype, copy);
           },
-          py::arg("dtype"),
-          "Convert buffer to numpy array with specified dtype")
+          py::arg("dtype"), py::arg("copy") = false,
+          "Convert buffer to numpy array with specified dtype (shares memory "
+          "unless copy)")
       .def(
           "to_numpy_v1",
-          [](Buffer &self, py::object dtype_obj) {
+          [](py::object self, py::object dtype_obj, bool copy) {
             py::dtype dtype = py::dtype::from_args(dtype_obj);
-            py::buffer_info buffer_info = bufferToBufferInfo(&self, dtype);
-            return py::array(buffer_info);
+            return bufferToNumpy(self, dtype, copy);
           },
-          py::arg("dtype"), "Convert buffer to numpy array with dtype object")
-      .def_static("from_numpy", [](const py::array &array) {
-        return bufferFromNumpy(array);
-      });
+          py::arg("dtype"), py::arg("copy") = false,
+          "Convert buffer to numpy array with dtype object (shares memory "
+          "unless copy)")
+      // Buffer 直接使用数组的内存，keep_alive 保证数组在 Buffer 存活期间不被释放
+      .def_static(
+          "from_numpy",
+          [](const py::array &array) { return bufferFromNumpy(array); },
+          py::keep_alive<0, 1>());
 }
 
 }  // namespace device
@@ -19,6 +19,8 @@ base::DataType getDataTypeFromNumpy(char kind, int itemsize);
 
 py::buffer_info bufferToBufferInfo(device::Buffer *buffer, const py::dtype &dt);
 
+py::array bufferToNumpy(py::handle self, const py::dtype &dt, bool copy);
+
 Buffer bufferFromNumpy(const py::array &array);
 
 }  // namespace device
@@ -181,16 +181,29 @@ NNDEPLOY_API_PYBIND11_MODULE("device", m) {
              return os.str();
            })
       .def_buffer([](Tensor &self) { return tensorToBufferInfo(&self); })
-      .def("__array__", [](Tensor &self) { return tensorToBufferInfo(&self); })
+      // host Tensor 与 numpy 共享内存: np.asarray(tensor) / tensor.to_numpy() 不拷贝
+      .def(
+          "__array__",
+          [](py::object self, py::object dtype, py::object copy) {
+            bool do_copy = !copy.is_none() && copy.cast<bool>();
+            py::object array = tensorToNumpy(self, do_copy);
+            if (!dtype.is_none()) {
+              array = array.attr("astype")(dtype, py::arg("copy") = false);
+            }
+            return array;
+          },
+          py::arg("dtype") = py::none(), py::arg("copy") = py::none())
+      .def_property_readonly(
+          "__array_interface__",
+          [](Tensor &self) { return tensorArrayInterface(&self); })
       .def("to",
            [](Tensor &self, const base::DeviceType &device_type) {
              return moveTensorToDevice(&self, device_type);
            })
-      .def("to_numpy",
-           [](Tensor &self) {
-             py::buffer_info buffer_info = tensorToBufferInfo(&self);
-             return py::array(buffer_info);
-           })
+      .def(
+          "to_numpy",
+          [](py::object self, bool copy) { return tensorToNumpy(self, copy); },
+          py::arg("copy") = false)
       .def_static("from_numpy", [](const py::buffer &buffer,
                                    const base::DeviceType &device_type) {
         return bufferInfoToTensor(buffer, device_type);
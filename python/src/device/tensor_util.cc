@@ -69,6 +69,28 @@ py::buffer_info tensorToBufferInfo(device::Tensor* tensor) {
   );
 }
 
+py::array tensorToNumpy(py::handle self, bool copy) {
+  device::Tensor* tensor = self.cast<device::Tensor*>();
+  py::buffer_info info = tensorToBufferInfo(tensor);
+  py::array view(py::dtype(info), info.shape, info.strides, info.ptr, self);
+  if (copy) {
+    return view.attr("copy")();
+  }
+  return view;
+}
+
+py::dict tensorArrayInterface(device::Tensor* tensor) {
+  py::buffer_info info = tensorToBufferInfo(tensor);
+  py::dict interface;
+  interface["shape"] = py::tuple(py::cast(info.shape));
+  interface["strides"] = py::tuple(py::cast(info.strides));
+  interface["typestr"] = py::dtype(info).attr("str");
+  interface["data"] =
+      py::make_tuple(reinterpret_cast<uintptr_t>(info.ptr), false);
+  interface["version"] = 3;
+  return interface;
+}
+
 device::Tensor* bufferInfoToTensorByDeviceTypeCode(
     const py::buffer& buffer, const base::DeviceTypeCode& device_type_code) {
   base::DeviceType device_type = device_type_code;
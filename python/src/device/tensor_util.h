@@ -1,6 +1,7 @@
 #ifndef _NNDEPLOY_PYTHON_SRC_DEVICE_TENSOR_UTIL_H_
 #define _NNDEPLOY_PYTHON_SRC_DEVICE_TENSOR_UTIL_H_
 
+#include <pybind11/numpy.h>
 #include <pybind11/pybind11.h>
 
 #include <string>
@@ -20,6 +21,13 @@ std::vector<long> calculateStridesBaseShape(const base::IntVector& shape);
 // 获取nndepoly::device::Tensor 转 numpy array的必要信息
 py::buffer_info tensorToBufferInfo(device::Tensor* tensor);
 
+// host Tensor 的 numpy 视图，不拷贝内存；数组的 base 持有 Python 侧的 Tensor 对象，
+// 数组存活期间 Tensor 不会被释放。copy 为 true 时返回独立的拷贝
+py::array tensorToNumpy(py::handle self, bool copy);
+
+// numpy __array_interface__ (version 3)，data 指向 Tensor 的内存
+py::dict tensorArrayInterface(device::Tensor* tensor);
+
 // 从numpy初始化Tensor
 device::Tensor* bufferInfoToTensorByDeviceTypeCode(const py::buffer& buffer,
                                    const base::DeviceTypeCode& device_type_code);